@@ -0,0 +1,236 @@
+"""Time every public Database method at several data scales.
+
+Usage:
+    python -m benchmarks.bench_database --scales small medium
+        --output bench_database.json
+
+The report is JSON with sorted keys so two runs can be diffed directly.
+"""
+
+import argparse
+import collections
+import inspect
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from benchmarks.synthetic_data import generate
+from models.attention_heatmap import AttentionHeatmap
+from models.database import Database
+
+
+SCALES = {
+    'small': {'students': 100, 'classes': 10, 'behaviors': 10000},
+    'medium': {'students': 1000, 'classes': 50, 'behaviors': 250000},
+    'large': {'students': 10000, 'classes': 500, 'behaviors': 5000000},
+}
+
+# Methods that manage threads rather than touch data
+SKIPPED = {'start_archive_job', 'stop_archive_job'}
+
+# Methods that reshape the data set; they run after everything else
+RUN_LAST = ['rebuild_rollups', 'rotate_behaviors']
+
+
+class Workload:
+    """Deterministic arguments for each public Database method."""
+
+    def __init__(self, database, counts, seed=1):
+        self.database = database
+        self.rng = np.random.default_rng(seed)
+        self.counts = counts
+        self.serial = 0
+        self.day = datetime(2024, 10, 1)
+
+    def student(self):
+        return f"S{self.rng.integers(self.counts['students']):06d}"
+
+    def klass(self):
+        return f"C{self.rng.integers(self.counts['classes']):04d}"
+
+    def fresh(self, prefix):
+        self.serial += 1
+        return f"{prefix}{self.serial:06d}"
+
+    def encoding(self):
+        return self.rng.normal(0.0, 0.1, size=128)
+
+    def heatmap(self):
+        heatmap = AttentionHeatmap()
+        heatmap.counts += self.rng.integers(
+            0, 1000, heatmap.counts.shape, dtype=np.int32
+        )
+        return heatmap
+
+    def week(self):
+        return self.day.date(), (self.day + timedelta(days=6)).date()
+
+    def args(self, name):
+        """Fresh argument tuple for one call of name, or None."""
+        factories = {
+            'add_student': lambda: (
+                self.fresh('N'), 'New Student', self.encoding().tobytes(),
+                'faces/new.jpg', 'C0000'
+            ),
+            'get_student': lambda: (self.student(),),
+            'get_student_name': lambda: (self.student(),),
+            'get_all_students': lambda: (),
+            'iter_students': lambda: (),
+            'identify_student': lambda: (self.encoding().tobytes(),),
+            'load_checkin_cache': lambda: (),
+            'record_attendance': lambda: (self.student(), self.klass()),
+            'get_attendance_records': lambda: (self.day.date(),),
+            'iter_attendance_records': lambda: self.week(),
+            'get_attendance_data': lambda: self.week(),
+            'save_attendance': lambda: ({
+                'class_id': self.klass(),
+                'session_id': self.fresh('SESSION'),
+                'date': self.day.date(),
+                'students': [self.student() for _ in range(50)],
+                'check_in_times': {}
+            },),
+            'add_class': lambda: (
+                self.fresh('K'), 'New Class', 'Subject', 'Room', {}
+            ),
+            'get_class': lambda: (self.klass(),),
+            'get_classes': lambda: (),
+            'update_class': lambda: (
+                self.klass(), 'Renamed', 'Subject', 'Room', '{}'
+            ),
+            'delete_class': lambda: (self.fresh('K'),),
+            'enroll_student': lambda: (self.fresh('K'), self.student()),
+            'unenroll_student': lambda: (self.klass(), self.fresh('N')),
+            'get_enrolled_students': lambda: (self.klass(),),
+            'get_student_classes': lambda: (self.student(),),
+            'record_behavior': lambda: (
+                self.student(), self.klass(), 'attentive', 0.9,
+                self.day, self.day, 12.0
+            ),
+            'get_behavior_data': lambda: self.week(),
+            'iter_behavior_data': lambda: self.week(),
+            'refresh_rollups': lambda: (),
+            'rebuild_rollups': lambda: (),
+            'get_behavior_summary': lambda: self.week(),
+            'get_attendance_summary': lambda: self.week(),
+            'refresh_analytics_snapshot': lambda: (),
+            'snapshot_age': lambda: (),
+            'close_analytics_snapshot': lambda: (),
+            'add_face_template': lambda: (self.student(), self.encoding()),
+            'get_face_templates': lambda: (self.student(),),
+            'delete_face_template': lambda: (
+                int(self.rng.integers(1, self.counts['students'] + 1)),
+            ),
+            'load_template_matrix': lambda: (),
+            'prune_face_templates': lambda: (self.student(), 1),
+            'rotate_behaviors': lambda: (),
+            'save_attention_heatmap': lambda: (
+                self.fresh('SESSION'), self.klass(), self.day, self.heatmap()
+            ),
+            'get_attention_heatmaps': lambda: self.week(),
+        }
+        factory = factories.get(name)
+        return factory() if factory else None
+
+
+def public_methods():
+    """Names of all public Database methods."""
+    return sorted(
+        name for name, _ in inspect.getmembers(Database, inspect.isfunction)
+        if not name.startswith('_') and name not in SKIPPED
+    )
+
+
+def time_call(method, make_args, repeats):
+    """Run method repeats times; generators are fully consumed."""
+    samples = []
+    for _ in range(repeats):
+        args = make_args()
+        start = time.perf_counter()
+        result = method(*args)
+        if inspect.isgenerator(result):
+            collections.deque(result, maxlen=0)
+        samples.append(time.perf_counter() - start)
+    return {
+        'min_s': round(min(samples), 6),
+        'median_s': round(statistics.median(samples), 6),
+        'repeats': repeats
+    }
+
+
+def run_scale(scale, params, repeats, workdir, seed):
+    db_path = os.path.join(workdir, f"bench_{scale}.db")
+    start = time.perf_counter()
+    _, counts = generate(db_path, seed=seed, **params)
+    generate_s = time.perf_counter() - start
+
+    database = Database(db_path, reset=False)
+    workload = Workload(database, counts, seed=seed + 1)
+    # The first rollup refresh folds the whole data set; time it apart
+    start = time.perf_counter()
+    database.refresh_rollups()
+    initial_rollup_s = time.perf_counter() - start
+
+    names = public_methods()
+    ordered = [n for n in names if n not in RUN_LAST] + [
+        n for n in RUN_LAST if n in names
+    ]
+
+    methods = {}
+    for name in ordered:
+        if workload.args(name) is None:
+            methods[name] = {'skipped': 'no workload defined'}
+            continue
+        methods[name] = time_call(
+            getattr(database, name), lambda: workload.args(name), repeats
+        )
+
+    database.close_analytics_snapshot()
+    return {
+        'rows': counts,
+        'generate_s': round(generate_s, 3),
+        'initial_rollup_s': round(initial_rollup_s, 3),
+        'methods': methods
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--scales', nargs='+', choices=sorted(SCALES), default=['small']
+    )
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', help='Where to build the databases')
+    parser.add_argument('--output', help='Write the JSON report here')
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='classroom_bench_')
+    report = {
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'seed': args.seed,
+        'scales': {
+            scale: run_scale(
+                scale, SCALES[scale], args.repeats, workdir, args.seed
+            )
+            for scale in args.scales
+        }
+    }
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Per-face timing of the eye cascade, fixed versus adaptive parameters.
+
+Usage:
+    python -m benchmarks.bench_eye_cascade --crops data/known_faces
+    python -m benchmarks.bench_eye_cascade --output bench_eyes.json
+
+Each image in --crops is treated as one tight face crop. Without --crops
+a synthetic corpus of drawn faces at several sizes is used, which is
+only meaningful for timing. The baseline is the original call: the
+full-resolution face with scaleFactor=1.1, minNeighbors=5. The report
+groups faces by width and gives median microseconds per face for both
+paths, plus how often they agree on the number of eyes.
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import time
+
+import cv2
+import numpy as np
+
+from models.behavior_monitor import BehaviorMonitor
+
+
+SIZE_BUCKETS = (64, 128, 256, 512)
+
+
+def synthetic_faces(sizes, per_size, seed):
+    """Grey face-like crops with two dark eyes, plus sensor noise."""
+    rng = np.random.default_rng(seed)
+    for size in sizes:
+        for _ in range(per_size):
+            face = np.full((size, size), 170, dtype=np.uint8)
+            cv2.ellipse(face, (size // 2, size // 2), (size * 9 // 20, size // 2),
+                        0, 0, 360, 200, -1)
+            eye_y = int(size * rng.uniform(0.33, 0.42))
+            radius = max(2, size // 14)
+            for eye_x in (size * 3 // 10, size * 7 // 10):
+                cv2.ellipse(face, (eye_x, eye_y), (radius * 2, radius), 0, 0, 360, 60, -1)
+                cv2.circle(face, (eye_x, eye_y), radius // 2 + 1, 20, -1)
+            noise = rng.normal(0, 6, face.shape)
+            yield np.clip(face + noise, 0, 255).astype(np.uint8)
+
+
+def load_crops(directory):
+    for path in sorted(glob.glob(os.path.join(directory, '*'))):
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if image is not None:
+            yield image
+
+
+def bucket(width):
+    for limit in SIZE_BUCKETS:
+        if width <= limit:
+            return f"<={limit}"
+    return f">{SIZE_BUCKETS[-1]}"
+
+
+def time_call(call, repeats):
+    """Best-of-repeats wall time of call() in microseconds, and its result."""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = call()
+        elapsed = (time.perf_counter() - start) * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--crops', help='Directory of face crop images')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[48, 96, 192, 384])
+    parser.add_argument('--per-size', type=int, default=25)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the JSON report here')
+    args = parser.parse_args()
+
+    monitor = BehaviorMonitor()
+    faces = (
+        load_crops(args.crops) if args.crops
+        else synthetic_faces(args.sizes, args.per_size, args.seed)
+    )
+
+    samples = {}
+    for face in faces:
+        height, width = face.shape
+        face_loc = (0, width, height, 0)
+        baseline_us, baseline = time_call(lambda: monitor.eye_cascade.detectMultiScale(
+            face, scaleFactor=1.1, minNeighbors=5, minSize=(20, 20)
+        ), args.repeats)
+        adaptive_us, adaptive = time_call(
+            lambda: monitor.detect_eyes(face, face_loc), args.repeats
+        )
+        entry = samples.setdefault(bucket(width), {
+            'baseline_us': [], 'adaptive_us': [], 'agree': 0
+        })
+        entry['baseline_us'].append(baseline_us)
+        entry['adaptive_us'].append(adaptive_us)
+        entry['agree'] += len(baseline) == len(adaptive)
+
+    report = {
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'corpus': args.crops or 'synthetic',
+        'buckets': {
+            name: {
+                'faces': len(entry['baseline_us']),
+                'baseline_median_us': round(statistics.median(entry['baseline_us']), 1),
+                'adaptive_median_us': round(statistics.median(entry['adaptive_us']), 1),
+                'speedup': round(
+                    statistics.median(entry['baseline_us'])
+                    / max(statistics.median(entry['adaptive_us']), 1e-9), 2
+                ),
+                'eye_count_agreement': round(entry['agree'] / len(entry['baseline_us']), 3)
+            }
+            for name, entry in samples.items()
+        }
+    }
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
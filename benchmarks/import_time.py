@@ -0,0 +1,92 @@
+"""Check that the attendance path imports without the heavy libraries.
+
+Each module is imported in a fresh interpreter under ``python -X importtime``;
+the check fails if pandas, matplotlib or sklearn get pulled in, or if a
+module's cumulative import time exceeds its budget.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 300 models.student_manager
+
+Exits with status 1 on a regression, so it can gate CI.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+
+# Modules on the cold-start attendance path and their budgets (ms)
+MODULES = {
+    'models.database': 150,
+    'models.attendance_store': 150,
+    'models.storage_backends': 150,
+    'models.student_manager': 200,
+    'models.behavior_trainer': 300,
+    'gui.main_window': 1500,
+}
+
+# Libraries that only reports and training may import
+HEAVY = {'pandas', 'matplotlib', 'sklearn'}
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module):
+    """Import module in a child interpreter.
+
+    Returns (cumulative_us, imported_packages), or raises RuntimeError
+    with the child's last error line if the import fails.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    lines = result.stderr.splitlines()
+    if result.returncode:
+        raise RuntimeError(lines[-1] if lines else 'import failed')
+
+    cumulative = 0
+    imported = set()
+    for line in lines:
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, total, name = (part.strip() for part in line[12:].split('|'))
+        if not total.isdigit():
+            continue  # header row
+        imported.add(name.split('.')[0])
+        if name == module:
+            cumulative = int(total)
+    return cumulative, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('modules', nargs='*', default=list(MODULES))
+    parser.add_argument('--budget-ms', type=float,
+                        help='Override the per-module budget')
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        try:
+            cumulative, imported = measure(module)
+        except RuntimeError as e:
+            # Optional GUI/vision dependencies may be absent
+            print(f"{module:28} skipped ({e})")
+            continue
+
+        budget = args.budget_ms or MODULES.get(module, 300)
+        heavy = sorted(imported & HEAVY)
+        ok = not heavy and cumulative / 1000 <= budget
+        failed |= not ok
+        detail = f"imports {', '.join(heavy)}" if heavy else f"budget {budget:.0f} ms"
+        print(f"{module:28} {cumulative / 1000:8.1f} ms  "
+              f"{'ok' if ok else 'FAIL'} ({detail})")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""Deterministic synthetic data for exercising the Database layer."""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from models.database import Database
+
+
+BEHAVIOR_TYPES = [
+    'attentive', 'inattentive', 'hand_raised', 'sleeping', 'using_phone'
+]
+
+
+def _chunks(total, chunk_size):
+    for start in range(0, total, chunk_size):
+        yield start, min(start + chunk_size, total)
+
+
+def generate(db_path, students=1000, classes=50, behaviors=100000,
+             checkins_per_student=20, classes_per_student=5,
+             term_start=datetime(2024, 9, 2), term_days=120, seed=0,
+             chunk_size=50000):
+    """Create a fresh database at db_path filled with synthetic rows.
+
+    The same arguments always produce the same rows. Returns the
+    Database instance and a dict of row counts.
+    """
+    rng = np.random.default_rng(seed)
+    database = Database(db_path, reset=True)
+
+    student_ids = [f"S{i:06d}" for i in range(students)]
+    class_ids = [f"C{i:04d}" for i in range(classes)]
+    term_seconds = term_days * 86400
+
+    def timestamps(count):
+        offsets = rng.integers(0, term_seconds, size=count)
+        return [
+            (term_start + timedelta(seconds=int(o))).isoformat(sep=' ')
+            for o in offsets
+        ]
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        cursor.executemany(
+            """
+            INSERT INTO classes (id, name, subject, room, schedule)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (cid, f"Class {i}", f"Subject {i % 12}", f"Room {i % 40}",
+                 "{}")
+                for i, cid in enumerate(class_ids)
+            ]
+        )
+
+        # 128-d unit-scale embeddings, as produced by the face encoder
+        for start, end in _chunks(students, chunk_size):
+            encodings = rng.normal(0.0, 0.1, size=(end - start, 128))
+            cursor.executemany(
+                """
+                INSERT INTO students
+                (id, name, class_name, face_encoding, face_image_path)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [
+                    (student_ids[i], f"Student {i}",
+                     class_ids[i % classes],
+                     encodings[i - start].tobytes(),
+                     f"faces/{student_ids[i]}.jpg")
+                    for i in range(start, end)
+                ]
+            )
+            cursor.executemany(
+                """
+                INSERT INTO face_templates (student_id, template, source)
+                VALUES (?, ?, 'synthetic')
+                """,
+                [
+                    (student_ids[i],
+                     encodings[i - start].astype(np.float32).tobytes())
+                    for i in range(start, end)
+                ]
+            )
+
+        enrolments = {
+            (class_ids[c], student_ids[s])
+            for s in range(students)
+            for c in rng.choice(
+                classes, size=min(classes_per_student, classes),
+                replace=False
+            )
+        }
+        enrolments = sorted(enrolments)
+        cursor.executemany(
+            "INSERT INTO class_students (class_id, student_id) VALUES (?, ?)",
+            enrolments
+        )
+
+        checkins = students * checkins_per_student
+        for start, end in _chunks(checkins, chunk_size):
+            picks = rng.integers(0, len(enrolments), size=end - start)
+            cursor.executemany(
+                """
+                INSERT INTO attendance (student_id, class_id, timestamp)
+                VALUES (?, ?, ?)
+                """,
+                [
+                    (enrolments[p][1], enrolments[p][0], ts)
+                    for p, ts in zip(picks, timestamps(end - start))
+                ]
+            )
+
+        for start, end in _chunks(behaviors, chunk_size):
+            count = end - start
+            picks = rng.integers(0, len(enrolments), size=count)
+            kinds = rng.integers(0, len(BEHAVIOR_TYPES), size=count)
+            confidence = rng.uniform(0.5, 1.0, size=count)
+            duration = rng.exponential(30.0, size=count)
+            cursor.executemany(
+                """
+                INSERT INTO behaviors
+                (student_id, class_id, behavior_type, confidence,
+                 start_time, end_time, duration)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (enrolments[p][1], enrolments[p][0],
+                     BEHAVIOR_TYPES[k], float(c), ts, ts, float(d))
+                    for p, k, c, d, ts in zip(
+                        picks, kinds, confidence, duration, timestamps(count)
+                    )
+                ]
+            )
+            conn.commit()
+
+        conn.commit()
+    finally:
+        conn.close()
+
+    database.load_checkin_cache()
+    counts = {
+        'students': students,
+        'classes': classes,
+        'enrolments': len(enrolments),
+        'attendance': checkins,
+        'behaviors': behaviors
+    }
+    return database, counts
@@ -154,8 +154,8 @@ class ClassDialog(QDialog):
     
     def load_students(self):
         """Load available and enrolled students."""
-        # Get all students
-        all_students = self.database.get_all_students()
+        # Get all students (without face encodings)
+        all_students = list(self.database.iter_students())
         
         # If editing existing class, get enrolled students
         if self.class_id:
@@ -9,12 +9,18 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, QTimer, QDate
 from PyQt5.QtGui import QImage, QPixmap, QFont, QColor, QPalette
 import cv2
+import csv
+import json
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timezone
 from models.face_detector import FaceDetector
-from models.behavior_monitor import BehaviorMonitor
+from models.behavior_monitor import BehaviorMonitor, BehaviorOverlayRenderer
+from models.attention_heatmap import AttentionHeatmap
 from models.behavior_trainer import BehaviorTrainer
 from models.database import Database
+from models.occupancy import OccupancyMonitor, PowerMode
+from models.pipeline_scheduler import PipelineScheduler
+from models.pose_estimator import PoseEstimator
 from gui.registration_dialog import RegistrationDialog
 import time
 
@@ -28,7 +34,18 @@ class MainWindow(QMainWindow):
         # Initialize components
         self.face_detector = FaceDetector()
         self.behavior_monitor = BehaviorMonitor()
-        self.database = Database()
+        # One pose pass per scheduled frame, shared by every consumer
+        self.pose_estimator = PoseEstimator()
+        self.pose_estimator.subscribe(self.behavior_monitor.on_pose)
+        self.scheduler = PipelineScheduler()
+        self.occupancy = OccupancyMonitor()
+        self.overlay_renderer = BehaviorOverlayRenderer(
+            max_fps=self.scheduler.rates['display']
+        )
+        # Keep the file across launches: the SQLite student storage
+        # backend shares these tables
+        self.database = Database(reset=False)
+        self.database.start_archive_job()
         self.setup_ui()
         self.setup_camera()
         
@@ -38,9 +55,16 @@ class MainWindow(QMainWindow):
         self.current_behavior = None
         self.class_start_time = None
         self.current_class = None
+        self.session_id = None
+        self.session_started_at = None
+        self.attention_heatmap = None
         self.check_in_window_active = False
         self.current_attendance = []
         self.check_in_times = {}
+        # Latest per-stage results, reused between scheduled runs
+        self.faces = []
+        self.recognized_ids = []
+        self.latest_behaviors = {}
         
     def setup_ui(self):
         """Setup the main UI components."""
@@ -282,6 +306,11 @@ class MainWindow(QMainWindow):
         self.analytics_label.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.analytics_label)
         
+        # Seating-grid attention heatmap
+        self.heatmap_label = QLabel()
+        self.heatmap_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.heatmap_label)
+        
         return tab
         
     def setup_camera(self):
@@ -295,7 +324,7 @@ class MainWindow(QMainWindow):
             cap = cv2.VideoCapture(i, cv2.CAP_DSHOW)  # Use DirectShow
             if cap.isOpened():
                 self.capture = cap
-                self.timer.start(30)
+                self.timer.start(self.occupancy.interval_ms)
                 break
         
         if self.capture is None:
@@ -314,29 +343,71 @@ class MainWindow(QMainWindow):
         if not ret:
             return
             
-        # Process frame
-        faces = self.face_detector.detect_faces(frame)
+        # Each stage runs at its own rate and reuses the latest results
+        # of the stages it depends on in between
+        now = time.monotonic()
+        # An empty room only gets a cheap motion check at a low frame rate
+        if self.occupancy.should_process(frame, now):
+            if (self.occupancy.mode is PowerMode.IDLE or
+                    self.scheduler.due('detection', now)):
+                self.faces = self.face_detector.detect_faces(frame)
+                self.occupancy.report_faces(len(self.faces), now)
+        self.apply_power_mode()
+        faces = self.faces
         
         if self.monitoring:
-            # Convert face detections to recognized students format
+            if self.scheduler.due('recognition', now) or len(self.recognized_ids) != len(faces):
+                self.recognized_ids = self.recognize_students(frame, faces)
             recognized_students = [
-                {
-                    'id': f'student_{i}',  # Placeholder ID until face recognition is implemented
-                    'face_location': face
-                }
-                for i, face in enumerate(faces)
+                {'id': student_id, 'face_location': face}
+                for student_id, face in zip(self.recognized_ids, faces)
             ]
             
-            # Get behaviors and annotated frame
-            behaviors, annotated_frame = self.behavior_monitor.analyze_frame(
-                frame, recognized_students
-            )
+            # Inference runs on the estimator's worker, off the GUI thread;
+            # behavior analysis uses the latest pose it has published
+            if self.pose_estimator.available and self.scheduler.due('pose', now):
+                self.pose_estimator.estimate_async(frame)
+            
+            if self.scheduler.due('behavior', now):
+                # Round-robin share of the class; everyone is refreshed
+                # within the scheduler's latency bound
+                behaviors = self.behavior_monitor.analyze_frame(
+                    frame, self.scheduler.select_students(recognized_students)
+                )
+                
+                # Persist behaviors as intervals rather than per frame
+                self.save_behavior_intervals(
+                    self.behavior_monitor.collect_intervals(behaviors)
+                )
+                for behavior in behaviors:
+                    self.latest_behaviors[behavior['student_id']] = behavior
+                if self.attention_heatmap is not None:
+                    self.attention_heatmap.add(behaviors, frame.shape)
+                    
+            # Latest behavior of every student still in view, at the
+            # face's current location
+            present = {student['id']: student['face_location'] for student in recognized_students}
+            self.latest_behaviors = {
+                student_id: dict(behavior, face_location=present[student_id])
+                for student_id, behavior in self.latest_behaviors.items()
+                if student_id in present
+            }
             
             # Update analytics with detected behaviors
-            self.update_analytics(behaviors)
+            self.update_analytics(list(self.latest_behaviors.values()))
+        
+        # Only draw and convert frames someone can see, at display rate
+        self.overlay_renderer.viewer_attached = (
+            self.camera_label.isVisible() and not self.isMinimized()
+        )
+        if not self.overlay_renderer.frame_due():
+            return
             
-            # Display annotated frame
-            frame = annotated_frame
+        if self.monitoring:
+            # Draw onto the captured buffer; it is not reused after this
+            self.overlay_renderer.render(
+                frame, list(self.latest_behaviors.values())
+            )
         else:
             # Just draw face rectangles when not monitoring
             for face in faces:
@@ -357,6 +428,24 @@ class MainWindow(QMainWindow):
             QPixmap.fromImage(image).scaled(960, 720, Qt.KeepAspectRatio)
         )
 
+    def apply_power_mode(self):
+        """Match the capture timer to the occupancy mode and report it."""
+        interval = self.occupancy.interval_ms
+        if self.timer.interval() == interval:
+            return
+        self.timer.setInterval(interval)
+        totals = self.occupancy.time_in_mode()
+        self.statusBar().showMessage(
+            f"Power mode: {self.occupancy.mode.value} "
+            f"(active {totals['active'] / 60:.0f} min, "
+            f"idle {totals['idle'] / 60:.0f} min)"
+        )
+
+    def recognize_students(self, frame, faces):
+        """Student id for each detected face."""
+        # Placeholder IDs until face recognition is implemented
+        return [f'student_{i}' for i in range(len(faces))]
+
     def toggle_monitoring(self):
         self.monitoring = not self.monitoring
         if self.monitoring:
@@ -374,6 +463,7 @@ class MainWindow(QMainWindow):
                 }
             """)
             self.class_start_time = datetime.now()
+            self.behavior_monitor.set_active_class(self.current_class)
         else:
             self.monitor_btn.setText("Start Monitoring")
             self.monitor_btn.setStyleSheet("""
@@ -389,6 +479,26 @@ class MainWindow(QMainWindow):
                 }
             """)
             self.class_start_time = None
+            self.save_behavior_intervals(
+                self.behavior_monitor.flush_intervals()
+            )
+            self.behavior_monitor.set_active_class(None)
+            self.save_attention_heatmap()
+            self.latest_behaviors = {}
+
+    def save_attention_heatmap(self):
+        """Persist the current session's attention heatmap counts."""
+        if self.attention_heatmap is None or not self.session_id:
+            return
+        self.database.save_attention_heatmap(
+            self.session_id, self.current_class,
+            self.session_started_at, self.attention_heatmap
+        )
+
+    def save_behavior_intervals(self, intervals):
+        """Write closed behavior intervals to the database."""
+        for interval in intervals:
+            self.database.record_behavior(**interval)
 
     def show_add_class_dialog(self):
         """Show dialog for adding a new class."""
@@ -494,16 +604,28 @@ class MainWindow(QMainWindow):
             
     def start_class(self):
         """Start monitoring a class session."""
+        self.current_class = self.class_combo.currentData()
         if not self.current_class:
             QMessageBox.warning(
                 self, "Error", "Please select a class first"
             )
             return
             
+        # Intervals still open belong to the previous class
+        self.save_behavior_intervals(self.behavior_monitor.flush_intervals())
+        self.behavior_monitor.set_active_class(self.current_class)
         self.class_start_time = datetime.now()
+        self.session_id = (
+            f"{self.current_class}_{self.class_start_time:%Y%m%d_%H%M%S}"
+        )
+        self.session_started_at = self.class_start_time
+        self.attention_heatmap = AttentionHeatmap()
         self.check_in_window_active = True
         self.monitoring = True
         
+        # Seed the attendance cooldown table for this session
+        self.database.load_checkin_cache()
+        
         # Start check-in window timer (15 minutes)
         QTimer.singleShot(900000, self.close_check_in_window)
         
@@ -521,6 +643,7 @@ class MainWindow(QMainWindow):
             
         attendance_data = {
             'class_id': self.current_class,
+            'session_id': self.session_id,
             'date': datetime.now().date(),
             'students': self.current_attendance,
             'check_in_times': self.check_in_times
@@ -545,7 +668,7 @@ class MainWindow(QMainWindow):
         # Get class roster
         if self.current_class:
             total_students = len(
-                self.database.get_class_students(self.current_class)
+                self.database.get_enrolled_students(self.current_class)
             )
         else:
             total_students = 0
@@ -565,7 +688,8 @@ class MainWindow(QMainWindow):
             for behavior in behaviors:
                 student_id = behavior['student_id']
                 if student_id not in self.check_in_times:
-                    self.check_in_times[student_id] = datetime.now()
+                    # UTC, the clock the attendance cooldown compares on
+                    self.check_in_times[student_id] = datetime.now(timezone.utc)
                     
         # Update behavior statistics
         behavior_counts = {}
@@ -615,19 +739,41 @@ class MainWindow(QMainWindow):
         start_date = self.start_date.date().toPyDate()
         end_date = self.end_date.date().toPyDate()
         
-        # Get analytics data
-        attendance_data = self.database.get_attendance_data(
-            start_date, end_date
+        # Get analytics data from the daily rollups, read from the
+        # snapshot so reports never stall live check-ins
+        attendance_data = self.database.get_attendance_summary(
+            start_date, end_date, snapshot=True
         )
-        behavior_data = self.database.get_behavior_data(
-            start_date, end_date
+        behavior_data = self.database.get_behavior_summary(
+            start_date, end_date, snapshot=True
         )
         
+        # Summary text
+        behavior_totals = {}
+        for row in behavior_data:
+            behavior_totals[row['behavior_type']] = (
+                behavior_totals.get(row['behavior_type'], 0)
+                + row['observations']
+            )
+        stats = [
+            f"Check-ins: {sum(row['checkins'] for row in attendance_data)}"
+        ]
+        for behavior, count in sorted(behavior_totals.items()):
+            stats.append(f"{behavior.title()}: {count}")
+        stats.append(f"Data as of {self.database.snapshot_age():.0f}s ago")
+        self.analytics_label.setText("\n".join(stats))
+        
         # Generate visualizations
         self.plot_attendance_trends(attendance_data)
         self.plot_behavior_distribution(behavior_data)
         self.plot_student_engagement(behavior_data)
         
+        # Heatmaps come from per-session accumulators, not raw rows
+        self.save_attention_heatmap()
+        self.plot_attention_heatmap(
+            self.database.get_attention_heatmaps(start_date, end_date)
+        )
+        
     def plot_attendance_trends(self, data):
         """Plot attendance trends over time."""
         # Implementation for attendance visualization
@@ -643,6 +789,27 @@ class MainWindow(QMainWindow):
         # Implementation for engagement visualization
         pass
         
+    def plot_attention_heatmap(self, records):
+        """Show the combined attention heatmap of the given sessions."""
+        combined = None
+        for record in records:
+            heatmap = AttentionHeatmap.from_record(record)
+            if combined is None:
+                combined = heatmap
+            elif ((heatmap.rows, heatmap.cols, heatmap.behaviors) ==
+                    (combined.rows, combined.cols, combined.behaviors)):
+                combined.merge(heatmap)
+                
+        if combined is None or not combined.observations:
+            self.heatmap_label.setText("No attention data for this range")
+            return
+            
+        image = cv2.cvtColor(combined.render(), cv2.COLOR_BGR2RGB)
+        h, w, ch = image.shape
+        self.heatmap_label.setPixmap(QPixmap.fromImage(
+            QImage(image.data, w, h, ch * w, QImage.Format_RGB888).copy()
+        ))
+        
     def export_data(self, format):
         """Export analytics data in specified format."""
         if not self.start_date.date() or not self.end_date.date():
@@ -654,14 +821,6 @@ class MainWindow(QMainWindow):
         start_date = self.start_date.date().toPyDate()
         end_date = self.end_date.date().toPyDate()
         
-        # Get data
-        attendance_data = self.database.get_attendance_data(
-            start_date, end_date
-        )
-        behavior_data = self.database.get_behavior_data(
-            start_date, end_date
-        )
-        
         # Export path
         file_path, _ = QFileDialog.getSaveFileName(
             self,
@@ -671,6 +830,13 @@ class MainWindow(QMainWindow):
         )
         
         if file_path:
+            # Rows are streamed from the database straight into the file
+            attendance_data = self.database.iter_attendance_records(
+                start_date, end_date
+            )
+            behavior_data = self.database.iter_behavior_data(
+                start_date, end_date
+            )
             if format.lower() == 'csv':
                 self.export_csv(file_path, attendance_data, behavior_data)
             else:
@@ -678,13 +844,35 @@ class MainWindow(QMainWindow):
                 
     def export_csv(self, path, attendance_data, behavior_data):
         """Export data in CSV format."""
-        # Implementation for CSV export
-        pass
+        fields = [
+            'record_type', 'student_id', 'student_name', 'class_name',
+            'timestamp', 'behavior_type', 'confidence', 'start_time',
+            'end_time', 'duration'
+        ]
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for record in attendance_data:
+                writer.writerow({
+                    'record_type': 'attendance',
+                    'student_id': record['student_id'],
+                    'student_name': record['name'],
+                    'class_name': record['class_title'],
+                    'timestamp': record['timestamp']
+                })
+            for record in behavior_data:
+                writer.writerow({'record_type': 'behavior', **record})
         
     def export_json(self, path, attendance_data, behavior_data):
         """Export data in JSON format."""
-        # Implementation for JSON export
-        pass
+        with open(path, 'w') as f:
+            f.write('{"attendance": [')
+            for i, record in enumerate(attendance_data):
+                f.write((',\n' if i else '\n') + json.dumps(record, default=str))
+            f.write('\n], "behaviors": [')
+            for i, record in enumerate(behavior_data):
+                f.write((',\n' if i else '\n') + json.dumps(record, default=str))
+            f.write('\n]}\n')
 
     def load_training_video(self):
         """Load a video file for training."""
@@ -760,4 +948,8 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event):
         self.capture.release()
         self.timer.stop()
+        self.pose_estimator.close()
+        self.save_behavior_intervals(self.behavior_monitor.flush_intervals())
+        self.save_attention_heatmap()
+        self.database.stop_archive_job()
         event.accept()
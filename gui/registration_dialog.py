@@ -233,9 +233,9 @@ class RegistrationDialog(QDialog):
             success = self.parent().database.add_student(
                 student_id,
                 name,
-                class_name,
-                self.face_encoding.tobytes(),
-                image_path
+                face_encoding=self.face_encoding.tobytes(),
+                face_image_path=image_path,
+                class_name=class_name
             )
             
             if success:
@@ -29,18 +29,25 @@ class TrainingThread(QThread):
             self.training_complete.emit(False, f"Error during training: {str(e)}")
             
 class ActionTrainingDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, pose_estimator=None):
         super().__init__(parent)
         self.setWindowTitle("Action Recognition Training")
         self.setMinimumSize(800, 600)
         
-        # Initialize action recognizer
-        self.action_recognizer = ActionRecognizer()
+        # Initialize action recognizer on the main window's pose network
+        # rather than loading a second copy of it
+        if pose_estimator is None:
+            pose_estimator = getattr(parent, 'pose_estimator', None)
+        self.action_recognizer = ActionRecognizer(pose_estimator=pose_estimator)
         self.training_data = {}  # {action_name: {behavior_type: [video_paths]}}
         
         # Create UI
         self.init_ui()
         
+    def done(self, result):
+        self.action_recognizer.close()
+        super().done(result)
+        
     def init_ui(self):
         # Main layout
         main_layout = QVBoxLayout()
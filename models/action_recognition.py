@@ -2,6 +2,9 @@ import os
 import cv2
 import numpy as np
 import warnings
+from collections import deque
+
+from models.pose_estimator import BODY_PARTS, PoseEstimator
 
 # Force CPU mode and disable DirectML
 os.environ['CUDA_VISIBLE_DEVICES'] = '-1'
@@ -15,7 +18,6 @@ try:
     from tensorflow.keras.models import Sequential, load_model
     from tensorflow.keras.layers import LSTM, Dense, Dropout
     from tensorflow.keras.utils import to_categorical
-    from sklearn.model_selection import train_test_split
     TF_AVAILABLE = True
 except ImportError as e:
     warnings.warn(f"TensorFlow import failed: {str(e)}")
@@ -23,7 +25,7 @@ except ImportError as e:
 
 
 class ActionRecognizer:
-    def __init__(self, model_path='data/models/action_model.h5'):
+    def __init__(self, model_path='data/models/action_model.h5', pose_estimator=None):
         if not TF_AVAILABLE:
             raise ImportError("TensorFlow is not available. Action recognition is disabled.")
 
@@ -33,66 +35,66 @@ class ActionRecognizer:
         self.model = None
         self.tf_available = TF_AVAILABLE
 
-        # Initialize OpenCV's DNN models for pose estimation
-        try:
-            model_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-                                     'data', 'models', 'pose')
-            os.makedirs(model_dir, exist_ok=True)
+        # Pose inference is shared with BehaviorMonitor when an estimator
+        # is passed in; live poses arrive through on_pose
+        self.pose_estimator = pose_estimator or PoseEstimator()
+        self.pose_net = self.pose_estimator.net
+        self.pose_estimator.subscribe(self.on_pose)
+        self.live_poses = deque(maxlen=self.sequence_length)
 
-            pose_model_path = os.path.join(model_dir, 'graph_opt.pb')
-            if os.path.exists(pose_model_path):
-                self.pose_net = cv2.dnn.readNetFromTensorflow(pose_model_path)
-            else:
-                print(f"Pose model not found at {pose_model_path}")
-                self.pose_net = None
-        except Exception as e:
-            print(f"Error initializing pose model: {str(e)}")
-            self.pose_net = None
+        self.threshold = self.pose_estimator.threshold
+        self.BODY_PARTS = BODY_PARTS
 
-        self.threshold = 0.2
-        self.BODY_PARTS = {
-            "Nose": 0, "Neck": 1, "RShoulder": 2, "RElbow": 3, "RWrist": 4,
-            "LShoulder": 5, "LElbow": 6, "LWrist": 7, "RHip": 8, "RKnee": 9,
-            "RAnkle": 10, "LHip": 11, "LKnee": 12, "LAnkle": 13, "REye": 14,
-            "LEye": 15, "REar": 16, "LEar": 17
-        }
 
+    def close(self):
+        """Stop receiving poses from the shared estimator."""
+        self.pose_estimator.unsubscribe(self.on_pose)
 
-    def extract_keypoints(self, frame):
-        """Extract keypoints using OpenCV's DNN pose estimation."""
-        if self.pose_net is None:
-            # Return empty keypoints if pose model is not available
-            return np.zeros(len(self.BODY_PARTS) * 3)
 
-        frame_height, frame_width = frame.shape[:2]
+    def on_pose(self, pose):
+        """Keep a published PoseFrame; features are computed on prediction.
 
-        try:
-            # Prepare input blob and perform inference
-            blob = cv2.dnn.blobFromImage(frame, 1.0, (368, 368), (127.5, 127.5, 127.5), swapRB=True, crop=False)
-            self.pose_net.setInput(blob)
-            output = self.pose_net.forward()
-
-            # Extract keypoints
-            keypoints = []
-            for i in range(len(self.BODY_PARTS)):
-                # Get confidence map
-                prob_map = output[0, i, :, :]
-                prob_map = cv2.resize(prob_map, (frame_width, frame_height))
-
-                # Find global maxima of the probmap
-                minVal, prob, minLoc, point = cv2.minMaxLoc(prob_map)
-
-                if prob > self.threshold:
-                    x = (frame_width * point[0]) / output.shape[3]
-                    y = (frame_height * point[1]) / output.shape[2]
-                    keypoints.extend([x/frame_width, y/frame_height, prob])
-                else:
-                    keypoints.extend([0, 0, 0])
+        Runs on the estimator's worker thread, so it only hands over.
+        """
+        self.live_poses.append(pose)
 
-            return np.array(keypoints)
-        except Exception as e:
-            print(f"Error extracting keypoints: {str(e)}")
+
+    def live_sequence(self):
+        """Feature sequence of the latest live poses, or None if too few."""
+        poses = list(self.live_poses)
+        if len(poses) < self.sequence_length:
+            return None
+        return np.array([self.pose_features(pose) for pose in poses])
+
+
+    def pose_features(self, pose):
+        """Keypoint features of a PoseFrame, in the model's input scaling.
+
+        Existing action models were trained on the original extractor:
+        each part's peak on the confidence map resized to the frame,
+        with its pixel position divided by the map size. That is kept
+        here instead of the 0..1 PoseFrame.keypoints(), so saved models
+        keep receiving the inputs they were trained on.
+        """
+        rows, cols = pose.heatmaps.shape[1:]
+        keypoints = []
+        for prob_map in pose.heatmaps:
+            prob_map = cv2.resize(prob_map, (pose.frame_width, pose.frame_height))
+            _, prob, _, point = cv2.minMaxLoc(prob_map)
+            if prob > self.threshold:
+                keypoints.extend([point[0] / cols, point[1] / rows, prob])
+            else:
+                keypoints.extend([0, 0, 0])
+        return np.array(keypoints)
+
+
+    def extract_keypoints(self, frame):
+        """Extract keypoints for one frame (e.g. while reading training video)."""
+        pose = self.pose_estimator.estimate(frame, publish=False)
+        if pose is None:
+            # Return empty keypoints if pose model is not available
             return np.zeros(len(self.BODY_PARTS) * 3)
+        return self.pose_features(pose)
 
 
     def create_model(self):
@@ -160,6 +162,8 @@ class ActionRecognizer:
             return None
 
         try:
+            from sklearn.model_selection import train_test_split
+
             X = np.array(sequences)
             y = to_categorical(labels).astype('float32')
 
@@ -180,12 +184,20 @@ class ActionRecognizer:
             return None
 
 
-    def predict_action(self, sequence):
-        """Predict action from a sequence of frames."""
+    def predict_action(self, sequence=None):
+        """Predict action from a sequence of frames.
+
+        Without a sequence the latest live poses are used.
+        """
         if not self.tf_available:
             print("TensorFlow not available, cannot predict action")
             return "Unknown", 0.0
 
+        if sequence is None:
+            sequence = self.live_sequence()
+            if sequence is None:
+                return "Unknown", 0.0
+
         try:
             if not self.model:
                 if os.path.exists(self.model_path):
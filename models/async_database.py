@@ -0,0 +1,178 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from models.database import Database
+
+
+class AsyncDatabase:
+    """asyncio facade over Database.
+
+    Every call runs on a dedicated thread pool, and Database opens one
+    SQLite connection per call, so max_connections bounds both the
+    worker threads and the open connections. Callers beyond
+    max_pending wait on a semaphore instead of queueing unbounded work.
+    """
+
+    def __init__(self, database=None, db_path="classroom.db",
+                 max_connections=4, max_pending=10000):
+        self.database = database or Database(db_path, reset=False)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_connections,
+            thread_name_prefix="classroom-db"
+        )
+        self._max_pending = max_pending
+        self._pending = None
+
+    async def _run(self, method, *args, **kwargs):
+        """Run a blocking Database method on the executor."""
+        if self._pending is None:
+            self._pending = asyncio.Semaphore(self._max_pending)
+
+        async with self._pending:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor,
+                functools.partial(method, *args, **kwargs)
+            )
+
+    async def identify_student(self, face_encoding, tolerance=0.6):
+        return await self._run(
+            self.database.identify_student, face_encoding, tolerance
+        )
+
+    async def record_attendance(self, student_id, class_id):
+        return await self._run(
+            self.database.record_attendance, student_id, class_id
+        )
+
+    async def save_attendance(self, attendance_data):
+        return await self._run(self.database.save_attendance, attendance_data)
+
+    async def record_behavior(self, student_id, class_id, behavior_type,
+                              confidence, start_time, end_time, duration):
+        return await self._run(
+            self.database.record_behavior, student_id, class_id,
+            behavior_type, confidence, start_time, end_time, duration
+        )
+
+    async def get_student(self, student_id):
+        return await self._run(self.database.get_student, student_id)
+
+    async def get_student_name(self, student_id):
+        return await self._run(self.database.get_student_name, student_id)
+
+    async def get_class(self, class_id):
+        return await self._run(self.database.get_class, class_id)
+
+    async def get_classes(self):
+        return await self._run(self.database.get_classes)
+
+    async def get_enrolled_students(self, class_id):
+        return await self._run(self.database.get_enrolled_students, class_id)
+
+    async def get_attendance_records(self, date=None):
+        return await self._run(self.database.get_attendance_records, date)
+
+    async def get_attendance_data(self, start_date, end_date, snapshot=False):
+        return await self._run(
+            self.database.get_attendance_data, start_date, end_date, snapshot
+        )
+
+    async def get_behavior_data(self, start_date, end_date, snapshot=False):
+        return await self._run(
+            self.database.get_behavior_data, start_date, end_date, snapshot
+        )
+
+    async def get_behavior_summary(self, start_date, end_date,
+                                   snapshot=False):
+        return await self._run(
+            self.database.get_behavior_summary, start_date, end_date, snapshot
+        )
+
+    async def get_attendance_summary(self, start_date, end_date,
+                                     snapshot=False):
+        return await self._run(
+            self.database.get_attendance_summary, start_date, end_date,
+            snapshot
+        )
+
+    async def add_face_template(self, student_id, face_encoding,
+                                quality=1.0, source=None):
+        return await self._run(
+            self.database.add_face_template, student_id, face_encoding,
+            quality, source
+        )
+
+    async def iter_behavior_data(self, start_date, end_date,
+                                 chunk_size=1000):
+        """Async-iterate behavior rows with bounded buffering.
+
+        One executor thread owns the cursor (sqlite3 connections are
+        thread-bound) and hands chunks over a small queue, so a slow
+        consumer applies back-pressure to the reader. Errors in the
+        reader are re-raised here.
+
+        An open iterator occupies one of the max_connections workers
+        until it is exhausted or closed. Close iterators abandoned early
+        with aclose() (e.g. via contextlib.aclosing) rather than leaving
+        them to garbage collection, or the pool can run dry.
+        """
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue(maxsize=2)
+        stop = threading.Event()
+
+        def put(item):
+            asyncio.run_coroutine_threadsafe(chunks.put(item), loop).result()
+
+        def produce():
+            # Always end the stream, with None or the reader's error
+            end = None
+            rows = self.database.iter_behavior_data(
+                start_date, end_date, chunk_size
+            )
+            try:
+                chunk = []
+                for row in rows:
+                    chunk.append(row)
+                    if len(chunk) == chunk_size:
+                        put(chunk)
+                        chunk = []
+                        if stop.is_set():
+                            return
+                put(chunk)
+            except Exception as e:
+                end = e
+            finally:
+                rows.close()
+                put(end)
+
+        producer = asyncio.ensure_future(self._run(produce))
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                for row in chunk:
+                    yield row
+        finally:
+            stop.set()
+            while not producer.done():
+                try:
+                    chunks.get_nowait()
+                except asyncio.QueueEmpty:
+                    await asyncio.sleep(0.01)
+            await producer
+
+    def close(self):
+        """Shut down the executor once in-flight calls finish."""
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
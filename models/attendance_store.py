@@ -0,0 +1,164 @@
+import numpy as np
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+PRESENT_STATUSES = ('Present', 'Late')
+
+
+class ColumnarAttendance:
+    """Attendance records held as parallel NumPy columns.
+
+    Each record is one row of date ordinal, student index, class index,
+    status code and check-in second of day (-1 when unknown). Ids and
+    statuses are interned into small lookup tables, so reports can be
+    computed with array masks and group-bys instead of walking nested
+    dicts.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self.dates = np.empty(capacity, dtype=np.int32)
+        self.students = np.empty(capacity, dtype=np.int32)
+        self.classes = np.empty(capacity, dtype=np.int32)
+        self.statuses = np.empty(capacity, dtype=np.int8)
+        self.check_ins = np.empty(capacity, dtype=np.int32)
+
+        self.student_ids: List[str] = []
+        self.class_ids: List[str] = []
+        self.status_names: List[str] = []
+        self._student_index: Dict[str, int] = {}
+        self._class_index: Dict[str, int] = {}
+        self._status_index: Dict[str, int] = {}
+        # (class, date, student) -> row, so re-recording overwrites
+        self._rows: Dict[Tuple[int, int, int], int] = {}
+
+    @classmethod
+    def from_nested(cls, attendance: Dict) -> 'ColumnarAttendance':
+        """Build from StudentManager's class -> date -> student dict."""
+        store = cls()
+        for class_id, days in attendance.items():
+            for date_str, records in days.items():
+                for student_id, record in records.items():
+                    store.record(
+                        class_id, date_str, student_id, record['status'],
+                        record.get('check_in_time')
+                    )
+        return store
+
+    @staticmethod
+    def _intern(value: str, table: List[str], index: Dict[str, int]) -> int:
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(table)
+            table.append(value)
+        return code
+
+    def _grow(self) -> None:
+        capacity = max(1024, len(self.dates) * 2)
+        for name in ('dates', 'students', 'classes', 'statuses', 'check_ins'):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    def record(self, class_id: str, date_str: str, student_id: str,
+               status: str, check_in_time: Optional[str] = None) -> None:
+        """Add a record, replacing any earlier one for the same key."""
+        student = self._intern(student_id, self.student_ids, self._student_index)
+        klass = self._intern(class_id, self.class_ids, self._class_index)
+        code = self._intern(status, self.status_names, self._status_index)
+        ordinal = date.fromisoformat(date_str).toordinal()
+
+        seconds = -1
+        if check_in_time:
+            hours, minutes, secs = (int(part) for part in check_in_time.split(':'))
+            seconds = hours * 3600 + minutes * 60 + secs
+
+        key = (klass, ordinal, student)
+        row = self._rows.get(key)
+        if row is None:
+            if self.size == len(self.dates):
+                self._grow()
+            row = self._rows[key] = self.size
+            self.size += 1
+
+        self.dates[row] = ordinal
+        self.students[row] = student
+        self.classes[row] = klass
+        self.statuses[row] = code
+        self.check_ins[row] = seconds
+
+    def select(self, class_id: str, start_date: str, end_date: str) -> np.ndarray:
+        """Row numbers for a class within an inclusive ISO date range."""
+        klass = self._class_index.get(class_id)
+        if klass is None:
+            return np.empty(0, dtype=np.intp)
+        start = date.fromisoformat(start_date).toordinal()
+        end = date.fromisoformat(end_date).toordinal()
+        dates = self.dates[:self.size]
+        mask = (self.classes[:self.size] == klass) & (dates >= start) & (dates <= end)
+        return np.flatnonzero(mask)
+
+    def columns(self, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        """Decode the selected rows into report-ready columns."""
+        ordinals, date_codes = np.unique(self.dates[rows], return_inverse=True)
+        date_names = np.array([date.fromordinal(int(o)).isoformat() for o in ordinals],
+                              dtype=object)
+
+        check_ins = self.check_ins[rows]
+        hours, rest = np.divmod(check_ins, 3600)
+        minutes, seconds = np.divmod(rest, 60)
+        times = np.char.add(
+            np.char.add(np.char.zfill(hours.astype(str), 2), ':'),
+            np.char.add(np.char.add(np.char.zfill(minutes.astype(str), 2), ':'),
+                        np.char.zfill(seconds.astype(str), 2))
+        ).astype(object)
+        times[check_ins < 0] = 'N/A'
+
+        return {
+            'date': date_names[date_codes],
+            'student_id': np.array(self.student_ids, dtype=object)[self.students[rows]],
+            'status': np.array(self.status_names, dtype=object)[self.statuses[rows]],
+            'check_in_time': times
+        }
+
+    def presence_matrix(self, rows: np.ndarray,
+                        roster: Sequence[str] = ()) -> Tuple[List[str], np.ndarray]:
+        """(student_ids, students x sessions bool matrix of presence).
+
+        Sessions are the distinct dates in rows. Roster students without
+        any record appear as absent for every session.
+        """
+        present_codes = [self._status_index[s] for s in PRESENT_STATUSES
+                         if s in self._status_index]
+
+        session_ordinals, session_cols = np.unique(self.dates[rows], return_inverse=True)
+        roster_codes = [self._student_index[s] for s in roster if s in self._student_index]
+        student_codes, student_rows = np.unique(
+            np.concatenate([self.students[rows], np.array(roster_codes, dtype=np.int32)]),
+            return_inverse=True
+        )
+        student_rows = student_rows[:len(rows)]
+
+        matrix = np.zeros((len(student_codes), len(session_ordinals)), dtype=bool)
+        is_present = np.isin(self.statuses[rows], present_codes)
+        matrix[student_rows[is_present], session_cols[is_present]] = True
+
+        student_ids = [self.student_ids[c] for c in student_codes]
+        unknown = [s for s in roster if s not in self._student_index]
+        if unknown:
+            student_ids += unknown
+            matrix = np.vstack([matrix, np.zeros((len(unknown), matrix.shape[1]), dtype=bool)])
+        return student_ids, matrix
+
+
+def longest_false_runs(matrix: np.ndarray) -> np.ndarray:
+    """Length of the longest run of False in each row of a bool matrix."""
+    if matrix.size == 0:
+        return np.zeros(matrix.shape[0], dtype=np.int64)
+    absent = ~matrix
+    counts = np.cumsum(absent, axis=1)
+    # Subtract the count reached at the most recent present column
+    resets = np.maximum.accumulate(np.where(absent, 0, counts), axis=1)
+    return (counts - resets).max(axis=1)
@@ -0,0 +1,106 @@
+import cv2
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from models.behavior_monitor import BEHAVIOR_NAMES, BehaviorType
+
+
+# Behaviors that count as paying attention on the heatmap
+ATTENTIVE_BEHAVIORS = (BehaviorType.ATTENTIVE.value, BehaviorType.HAND_RAISED.value)
+
+
+class AttentionHeatmap:
+    """Per-session counts of behaviors by position in the room.
+
+    The camera view is split into a coarse rows x cols seating grid.
+    Every analysed frame adds one count per student to the cell of their
+    face centre and the slot of their behavior, with a single np.add.at,
+    so heatmaps are built from these counts and never from raw behavior
+    rows.
+    """
+
+    def __init__(self, rows: int = 6, cols: int = 8,
+                 behaviors: Sequence[str] = BEHAVIOR_NAMES,
+                 counts: Optional[np.ndarray] = None):
+        self.rows = rows
+        self.cols = cols
+        self.behaviors = list(behaviors)
+        self._codes = {name: code for code, name in enumerate(self.behaviors)}
+        if counts is None:
+            counts = np.zeros((rows, cols, len(self.behaviors)), dtype=np.int32)
+        self.counts = counts
+
+    @classmethod
+    def from_record(cls, record: Dict) -> 'AttentionHeatmap':
+        """Build from a Database.get_attention_heatmaps row."""
+        return cls(record['rows'], record['cols'], record['behaviors'], record['counts'])
+
+    def add(self, behaviors: List[Dict], frame_shape: Tuple[int, ...]):
+        """Count one frame of behavior dicts (with face_location)."""
+        behaviors = [b for b in behaviors if b['type'] in self._codes]
+        if not behaviors:
+            return
+        height, width = frame_shape[:2]
+
+        boxes = np.array([b['face_location'] for b in behaviors], dtype=np.float64)
+        centre_y = (boxes[:, 0] + boxes[:, 2]) / 2
+        centre_x = (boxes[:, 1] + boxes[:, 3]) / 2
+        rows = np.clip((centre_y * self.rows / height).astype(np.int64), 0, self.rows - 1)
+        cols = np.clip((centre_x * self.cols / width).astype(np.int64), 0, self.cols - 1)
+        codes = np.array([self._codes[b['type']] for b in behaviors])
+
+        # add.at accumulates repeated cells, unlike fancy-index +=
+        np.add.at(self.counts, (rows, cols, codes), 1)
+
+    def merge(self, other: 'AttentionHeatmap'):
+        """Add another session's counts (same grid and behaviors)."""
+        if (other.rows, other.cols, other.behaviors) != (self.rows, self.cols, self.behaviors):
+            raise ValueError("Heatmaps use different grids or behaviors")
+        self.counts += other.counts
+
+    @property
+    def observations(self) -> int:
+        return int(self.counts.sum())
+
+    def attention_ratio(self) -> np.ndarray:
+        """(rows, cols) share of attentive observations; NaN where empty."""
+        totals = self.counts.sum(axis=2).astype(np.float64)
+        attentive = [self._codes[name] for name in ATTENTIVE_BEHAVIORS if name in self._codes]
+        focused = self.counts[:, :, attentive].sum(axis=2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(totals > 0, focused / totals, np.nan)
+
+    def render(self, cell_size: int = 60) -> np.ndarray:
+        """BGR image of the grid: red is low attention, green is high.
+
+        Cells without observations are grey. Each cell is labelled with
+        its attention percentage.
+        """
+        ratio = self.attention_ratio()
+        empty = np.isnan(ratio)
+
+        # Red (0%) through yellow to green (100%) in BGR
+        level = np.nan_to_num(ratio)
+        cells = np.stack((
+            np.zeros_like(level),
+            np.minimum(1.0, 2 * level),
+            np.minimum(1.0, 2 * (1 - level))
+        ), axis=2) * 255
+        cells[empty] = 128
+        image = cv2.resize(
+            cells.astype(np.uint8),
+            (self.cols * cell_size, self.rows * cell_size),
+            interpolation=cv2.INTER_NEAREST
+        )
+
+        for row in range(self.rows):
+            for col in range(self.cols):
+                x, y = col * cell_size, row * cell_size
+                cv2.rectangle(image, (x, y), (x + cell_size, y + cell_size), (40, 40, 40), 1)
+                if not empty[row, col]:
+                    cv2.putText(
+                        image, f"{ratio[row, col] * 100:.0f}%",
+                        (x + 6, y + cell_size // 2 + 5),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 0, 0), 1
+                    )
+        return image
@@ -1,8 +1,12 @@
 import cv2
+import time
 import numpy as np
+from collections import OrderedDict
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from models.pose_estimator import BODY_PARTS, PoseFrame
 
 
 class BehaviorType(Enum):
@@ -13,13 +17,282 @@ class BehaviorType(Enum):
     USING_PHONE = "using_phone"
 
 
+# Behavior codes stored in StudentHistory: index into BehaviorType
+BEHAVIOR_NAMES = tuple(behavior.value for behavior in BehaviorType)
+BEHAVIOR_CODES = {name: code for code, name in enumerate(BEHAVIOR_NAMES)}
+
+
+class StudentHistory:
+    """Fixed-size NumPy ring buffers of recent observations per student.
+    
+    Each tracked student owns one slot in preallocated (max_students,
+    capacity) arrays of timestamps, face centres, eye-openness proxy and
+    behavior codes, so memory does not grow with session length. Students
+    unseen for ttl seconds are evicted, and when all slots are taken the
+    least recently seen student is dropped.
+    """
+    
+    def __init__(self, capacity: int = 256, max_students: int = 128,
+                 ttl: float = 300.0):
+        self.capacity = capacity
+        self.max_students = max_students
+        self.ttl = ttl
+        
+        self.timestamps = np.zeros((max_students, capacity), dtype=np.float64)
+        self.centres = np.zeros((max_students, capacity, 2), dtype=np.float32)
+        self.ear = np.zeros((max_students, capacity), dtype=np.float32)
+        self.codes = np.zeros((max_students, capacity), dtype=np.int8)
+        self.head = np.zeros(max_students, dtype=np.int64)   # next write index
+        self.count = np.zeros(max_students, dtype=np.int64)  # filled samples
+        self.last_seen = np.full(max_students, -np.inf)
+        
+        # student_id -> slot, least recently seen first
+        self._slots = OrderedDict()
+        self._slot_ids: List[str] = [None] * max_students
+        self._free = list(range(max_students - 1, -1, -1))
+        
+    def __len__(self) -> int:
+        return len(self._slots)
+        
+    def __contains__(self, student_id: str) -> bool:
+        return student_id in self._slots
+        
+    def _release(self, student_id: str) -> int:
+        slot = self._slots.pop(student_id)
+        self._slot_ids[slot] = None
+        self.head[slot] = 0
+        self.count[slot] = 0
+        self.last_seen[slot] = -np.inf
+        return slot
+        
+    def slots_for(self, student_ids: List[str]) -> np.ndarray:
+        """Slot index per student, allocating (and evicting) as needed."""
+        slots = np.empty(len(student_ids), dtype=np.int64)
+        for i, student_id in enumerate(student_ids):
+            slot = self._slots.get(student_id)
+            if slot is None:
+                if not self._free:
+                    self._free.append(self._release(next(iter(self._slots))))
+                slot = self._free.pop()
+                self._slots[student_id] = slot
+                self._slot_ids[slot] = student_id
+            else:
+                self._slots.move_to_end(student_id)
+            slots[i] = slot
+        return slots
+        
+    def latest_centres(self, slots: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(N, 2) most recent centre and (N,) its timestamp per slot.
+        
+        Both are NaN where the slot has no sample yet.
+        """
+        index = (self.head[slots] - 1) % self.capacity
+        latest = self.centres[slots, index].astype(np.float64)
+        timestamps = self.timestamps[slots, index].copy()
+        empty = self.count[slots] == 0
+        latest[empty] = np.nan
+        timestamps[empty] = np.nan
+        return latest, timestamps
+        
+    def append(self, slots: np.ndarray, timestamp: float, centres: np.ndarray,
+               ear: np.ndarray, codes: np.ndarray):
+        """Write one observation for every slot in a single pass."""
+        index = self.head[slots]
+        self.timestamps[slots, index] = timestamp
+        self.centres[slots, index] = centres
+        self.ear[slots, index] = ear
+        self.codes[slots, index] = codes
+        self.head[slots] = (index + 1) % self.capacity
+        self.count[slots] = np.minimum(self.count[slots] + 1, self.capacity)
+        self.last_seen[slots] = timestamp
+        
+    def evict_expired(self, now: float) -> List[str]:
+        """Drop students not seen for ttl seconds; return their ids."""
+        expired_slots = np.flatnonzero(
+            (self.count > 0) & (now - self.last_seen > self.ttl)
+        )
+        evicted = [self._slot_ids[slot] for slot in expired_slots.tolist()]
+        for student_id in evicted:
+            self._free.append(self._release(student_id))
+        return evicted
+        
+    def window(self, student_id: str, seconds: float = None) -> Dict[str, np.ndarray]:
+        """Chronological samples for a student, optionally the last seconds.
+        
+        Returns:
+            Dict of timestamps, centres, ear and codes arrays (copies)
+        """
+        slot = self._slots.get(student_id)
+        if slot is None:
+            return {
+                'timestamps': self.timestamps[0, :0].copy(),
+                'centres': self.centres[0, :0].copy(),
+                'ear': self.ear[0, :0].copy(),
+                'codes': self.codes[0, :0].copy()
+            }
+        count = self.count[slot]
+        order = (self.head[slot] - count + np.arange(count)) % self.capacity
+        timestamps = self.timestamps[slot, order]
+        if seconds is not None and count:
+            order = order[timestamps >= timestamps[-1] - seconds]
+            timestamps = self.timestamps[slot, order]
+        return {
+            'timestamps': timestamps,
+            'centres': self.centres[slot, order],
+            'ear': self.ear[slot, order],
+            'codes': self.codes[slot, order]
+        }
+        
+    def behavior_fractions(self, student_id: str, seconds: float = None) -> Dict[str, float]:
+        """Share of recent samples spent in each behavior."""
+        codes = self.window(student_id, seconds)['codes']
+        if not len(codes):
+            return {}
+        counts = np.bincount(codes, minlength=len(BEHAVIOR_NAMES))
+        return {
+            name: float(counts[code]) / len(codes)
+            for code, name in enumerate(BEHAVIOR_NAMES)
+            if counts[code]
+        }
+        
+    def latest(self, student_id: str) -> Tuple[str, float]:
+        """(behavior_type, timestamp) of the newest sample, or None."""
+        slot = self._slots.get(student_id)
+        if slot is None or not self.count[slot]:
+            return None
+        index = (self.head[slot] - 1) % self.capacity
+        return BEHAVIOR_NAMES[self.codes[slot, index]], float(self.timestamps[slot, index])
+
+
+class BehaviorIntervalBuilder:
+    """Compact per-frame behavior observations into closed intervals.
+
+    Consecutive observations of the same behavior for a student extend
+    one interval. A different behavior only replaces it once it has
+    persisted for min_duration seconds; shorter flickers are dropped and
+    the running interval continues. A student unseen for more than
+    max_gap seconds has their interval closed.
+    """
+
+    def __init__(self, min_duration: float = 3.0, max_gap: float = 2.0):
+        self.min_duration = min_duration
+        self.max_gap = max_gap
+        self._current = {}    # student_id -> open interval
+        self._candidate = {}  # student_id -> competing interval
+        self._last_seen = {}  # student_id -> last observation time
+
+    @staticmethod
+    def _open(behavior: Dict, class_id: str) -> Dict:
+        return {
+            'student_id': behavior['student_id'],
+            'class_id': class_id,
+            'behavior_type': behavior['type'],
+            'start_time': behavior['timestamp'],
+            'end_time': behavior['timestamp'],
+            'confidence_sum': behavior['confidence'],
+            'observations': 1
+        }
+
+    @staticmethod
+    def _extend(interval: Dict, behavior: Dict):
+        interval['end_time'] = behavior['timestamp']
+        interval['confidence_sum'] += behavior['confidence']
+        interval['observations'] += 1
+
+    @staticmethod
+    def _length(interval: Dict) -> float:
+        return (interval['end_time'] - interval['start_time']).total_seconds()
+
+    def _close(self, interval: Dict, closed: List[Dict]):
+        """Emit an interval if it lasted long enough."""
+        duration = self._length(interval)
+        if duration < self.min_duration:
+            return
+        closed.append({
+            'student_id': interval['student_id'],
+            'class_id': interval['class_id'],
+            'behavior_type': interval['behavior_type'],
+            'confidence': interval['confidence_sum'] / interval['observations'],
+            'start_time': interval['start_time'],
+            'end_time': interval['end_time'],
+            'duration': duration
+        })
+
+    def update(self, behaviors: List[Dict], class_id: str) -> List[Dict]:
+        """Feed one frame of behaviors; return intervals closed by it.
+
+        Each returned dict matches the arguments of
+        Database.record_behavior.
+        """
+        closed = []
+        seen = set()
+        now = None
+
+        for behavior in behaviors:
+            student_id = behavior['student_id']
+            timestamp = behavior['timestamp']
+            seen.add(student_id)
+            now = timestamp if now is None else max(now, timestamp)
+
+            current = self._current.get(student_id)
+            last_seen = self._last_seen.get(student_id)
+            self._last_seen[student_id] = timestamp
+            if (current is None or
+                    (timestamp - last_seen).total_seconds() > self.max_gap):
+                if current is not None:
+                    self._close(current, closed)
+                self._current[student_id] = self._open(behavior, class_id)
+                self._candidate.pop(student_id, None)
+                continue
+
+            if behavior['type'] == current['behavior_type']:
+                self._extend(current, behavior)
+                self._candidate.pop(student_id, None)
+                continue
+
+            candidate = self._candidate.get(student_id)
+            if candidate and candidate['behavior_type'] == behavior['type']:
+                self._extend(candidate, behavior)
+            else:
+                candidate = self._open(behavior, class_id)
+                self._candidate[student_id] = candidate
+
+            if self._length(candidate) >= self.min_duration:
+                self._close(current, closed)
+                self._current[student_id] = candidate
+                del self._candidate[student_id]
+
+        # Close intervals of students who have left the frame
+        if now is not None:
+            for student_id in list(self._current):
+                if student_id in seen:
+                    continue
+                last_seen = self._last_seen[student_id]
+                if (now - last_seen).total_seconds() > self.max_gap:
+                    self._close(self._current.pop(student_id), closed)
+                    self._candidate.pop(student_id, None)
+                    del self._last_seen[student_id]
+
+        return closed
+
+    def flush(self) -> List[Dict]:
+        """Close every open interval (e.g. when monitoring stops)."""
+        closed = []
+        for interval in self._current.values():
+            self._close(interval, closed)
+        self._current.clear()
+        self._candidate.clear()
+        self._last_seen.clear()
+        return closed
+
+
 class BehaviorMonitor:
     """Monitor and analyze student behaviors in real-time using OpenCV."""
     
     def __init__(self):
         """Initialize behavior monitoring."""
-        self.current_behaviors = {}  # student_id -> (behavior_type, start_time, confidence)
-        self.behavior_history = {}   # student_id -> list of behaviors
+        # Bounded per-student ring buffers of recent observations
+        self.history = StudentHistory()
         self.active_class_id = None
         
         # Load Haar cascades for feature detection
@@ -32,126 +305,344 @@ class BehaviorMonitor:
         )
         
         # Initialize behavior tracking
-        self.prev_head_pos = {}  # student_id -> (x, y)
+        # Pixels per frame at the capture rate the threshold was tuned
+        # for; displacement between sparser samples is scaled to it
         self.head_movement_threshold = 30
+        self.head_movement_frame_interval = 1 / 30  # seconds
         self.eye_aspect_ratio_threshold = 0.2
+        # Eye search runs on the upper part of each face, resized to a
+        # canonical width so cost no longer grows with face size
+        self.eye_roi_width = 96
+        self.eye_region_height = 0.6  # fraction of the face from the top
         self.behavior_duration_threshold = 3.0  # seconds
+        # Latest PoseFrame published by a shared PoseEstimator
+        self.pose = None
+        self.pose_max_age = 1.0  # seconds
+        self.interval_builder = BehaviorIntervalBuilder(
+            min_duration=self.behavior_duration_threshold
+        )
         
-    def set_active_class(self, class_id: str):
-        """Set the active class for behavior monitoring."""
+    def set_active_class(self, class_id: Optional[str]):
+        """Set the active class for behavior monitoring; None pauses it."""
         self.active_class_id = class_id
         
-    def analyze_frame(self, frame, recognized_students: List[Dict]) -> Tuple[List[Dict], np.ndarray]:
+    def on_pose(self, pose: PoseFrame):
+        """Keep the latest published pose for the next analysis."""
+        self.pose = pose
+        
+    def collect_intervals(self, behaviors: List[Dict]) -> List[Dict]:
+        """Fold a frame's behaviors into intervals; return closed ones."""
+        return self.interval_builder.update(behaviors, self.active_class_id)
+        
+    def flush_intervals(self) -> List[Dict]:
+        """Close and return all open behavior intervals."""
+        return self.interval_builder.flush()
+        
+    def analyze_frame(self, frame, recognized_students: List[Dict]) -> List[Dict]:
         """
         Analyze a frame to detect student behaviors.
         
+        The frame is only read; drawing overlays is left to
+        BehaviorOverlayRenderer, so headless callers pay nothing for it.
+        
         Args:
             frame: Video frame to analyze
             recognized_students: List of recognized student dicts with 'id' and 'face_location'
             
         Returns:
-            Tuple of (behavior_list, annotated_frame)
+            List of behavior dicts with student_id, type, confidence,
+            timestamp and face_location
         """
         if not self.active_class_id:
-            return [], frame
+            return []
             
         # Convert to grayscale for feature detection
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        annotated_frame = frame.copy()
         behaviors = []
         current_time = datetime.now()
         
+        student_ids = []
+        face_locs = []
+        eye_counts = []
         for student in recognized_students:
-            student_id = student['id']
             face_loc = student['face_location']
             
             if not face_loc:
                 continue
                 
-            # Extract face region
-            top, right, bottom, left = face_loc
-            face_roi = gray[top:bottom, left:right]
+            # Detect eyes in face region (per face; cannot be batched)
+            eyes = self.detect_eyes(gray, face_loc)
+            student_ids.append(student['id'])
+            face_locs.append(face_loc)
+            eye_counts.append(len(eyes))
             
-            # Detect eyes in face region
-            eyes = self.eye_cascade.detectMultiScale(
-                face_roi,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(20, 20)
+        if student_ids:
+            behaviors = self._classify_batch(
+                student_ids, face_locs, np.array(eye_counts), current_time
             )
+                
+        return behaviors
+        
+    @staticmethod
+    def eye_cascade_params(face_width: int) -> Tuple[float, int]:
+        """(scaleFactor, minNeighbors) for a face of face_width pixels.
+        
+        Small faces are upscaled to the canonical size and come out soft,
+        so they get a finer scale step and fewer required neighbours.
+        """
+        if face_width < 64:
+            return 1.05, 3
+        if face_width < 128:
+            return 1.1, 4
+        return 1.15, 5
+        
+    def detect_eyes(self, gray: np.ndarray, face_loc: Tuple[int, int, int, int]) -> np.ndarray:
+        """Detect eyes in the upper part of a face.
+        
+        The region is clipped to the frame and resized to a canonical
+        width, and the cascade only searches the eye sizes that can occur
+        at that scale.
+        
+        Args:
+            gray: Grayscale frame
+            face_loc: (top, right, bottom, left) face box
             
-            # Analyze behavior based on features
-            behavior = self._analyze_behavior(
-                student_id, face_loc, eyes, current_time
-            )
+        Returns:
+            (n, 4) array of eye boxes as (x, y, w, h) in frame pixels
+        """
+        top, right, bottom, left = face_loc
+        frame_height, frame_width = gray.shape[:2]
+        top, left = max(top, 0), max(left, 0)
+        right = min(right, frame_width)
+        bottom = min(top + int((bottom - top) * self.eye_region_height), frame_height)
+        if right - left < 8 or bottom - top < 4:
+            return np.empty((0, 4), dtype=np.int32)
             
-            if behavior:
-                behaviors.append(behavior)
-                self._draw_behavior_indicator(
-                    annotated_frame,
-                    face_loc,
-                    behavior['type'],
-                    behavior['confidence']
-                )
-                
-        return behaviors, annotated_frame
+        face_width = right - left
+        scale = self.eye_roi_width / face_width
+        canonical_height = max(1, int(round((bottom - top) * scale)))
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+        roi = cv2.resize(
+            gray[top:bottom, left:right],
+            (self.eye_roi_width, canonical_height),
+            interpolation=interpolation
+        )
         
-    def _analyze_behavior(
+        # An eye spans roughly 15-40% of the face width
+        scale_factor, min_neighbors = self.eye_cascade_params(face_width)
+        min_eye = int(self.eye_roi_width * 0.15)
+        max_eye = int(self.eye_roi_width * 0.4)
+        eyes = self.eye_cascade.detectMultiScale(
+            roi,
+            scaleFactor=scale_factor,
+            minNeighbors=min_neighbors,
+            minSize=(min_eye, min_eye),
+            maxSize=(max_eye, max_eye)
+        )
+        if not len(eyes):
+            return np.empty((0, 4), dtype=np.int32)
+            
+        eyes = np.asarray(eyes, dtype=np.float64) / scale
+        eyes[:, 0] += left
+        eyes[:, 1] += top
+        return eyes.round().astype(np.int32)
+        
+    def _classify_batch(
         self,
-        student_id: str,
-        face_loc: Tuple[int, int, int, int],
-        eyes: np.ndarray,
+        student_ids: List[str],
+        face_locs: List[Tuple[int, int, int, int]],
+        eye_counts: np.ndarray,
         current_time: datetime
-    ) -> Dict:
-        """Analyze student behavior based on detected features."""
-        top, right, bottom, left = face_loc
-        face_center = ((left + right) // 2, (top + bottom) // 2)
-        
-        # Check head movement
-        if student_id in self.prev_head_pos:
-            prev_x, prev_y = self.prev_head_pos[student_id]
-            movement = np.sqrt(
-                (face_center[0] - prev_x)**2 + 
-                (face_center[1] - prev_y)**2
+    ) -> List[Dict]:
+        """Classify every student in a frame in one pass.
+        
+        Face centres and each student's previous centres are stacked
+        into (N, 2) arrays, so head movement, thresholds and the behavior
+        choice are array operations over all students at once. Students
+        are sampled round-robin, so the displacement since a student's
+        previous sample is divided by the time between the two and
+        expressed per capture frame, the unit the threshold is tuned in.
+        
+        Args:
+            student_ids: Ids of the students found in the frame
+            face_locs: (top, right, bottom, left) box per student
+            eye_counts: Number of eyes detected in each face
+            current_time: Frame timestamp
+            
+        Returns:
+            One behavior dict per student, in input order
+        """
+        boxes = np.asarray(face_locs, dtype=np.int64)
+        centres = np.column_stack((
+            (boxes[:, 3] + boxes[:, 1]) // 2,
+            (boxes[:, 0] + boxes[:, 2]) // 2
+        ))
+        
+        # NaN marks students with no previous position
+        timestamp = current_time.timestamp()
+        slots = self.history.slots_for(student_ids)
+        previous, previous_time = self.history.latest_centres(slots)
+        delta = centres - previous
+        # Samples closer than one frame apart count as one frame
+        frames = np.maximum(
+            timestamp - previous_time, self.head_movement_frame_interval
+        ) / self.head_movement_frame_interval
+        movement = np.hypot(delta[:, 0], delta[:, 1]) / frames
+        tracked = ~np.isnan(movement)
+        moving = tracked & (np.nan_to_num(movement) > self.head_movement_threshold)
+        sleeping = eye_counts == 0
+        
+        confidence = np.where(tracked, 0.8, 0.7)
+        confidence = np.where(moving, np.minimum(np.nan_to_num(movement) / 100, 0.9), confidence)
+        confidence = np.where(sleeping, 0.85, confidence)
+        codes = np.where(
+            sleeping, BEHAVIOR_CODES[BehaviorType.SLEEPING.value],
+            np.where(
+                moving, BEHAVIOR_CODES[BehaviorType.INATTENTIVE.value],
+                BEHAVIOR_CODES[BehaviorType.ATTENTIVE.value]
             )
+        )
+        
+        # Pose cues explain more than the face alone (a bowed head over a
+        # phone also hides the eyes), so they take precedence
+        hand_raised, using_phone, pose_confidence = self._pose_behaviors(boxes)
+        pose_detected = hand_raised | using_phone
+        codes = np.where(
+            hand_raised, BEHAVIOR_CODES[BehaviorType.HAND_RAISED.value],
+            np.where(using_phone, BEHAVIOR_CODES[BehaviorType.USING_PHONE.value], codes)
+        )
+        confidence = np.where(pose_detected, pose_confidence, confidence)
+        
+        # Record this frame; eye openness is the share of two eyes found
+        self.history.append(
+            slots, timestamp, centres, np.minimum(eye_counts, 2) / 2, codes
+        )
+        self.history.evict_expired(timestamp)
+        
+        return [
+            {
+                'student_id': student_id,
+                'type': BEHAVIOR_NAMES[code],
+                'confidence': float(conf),
+                'timestamp': current_time,
+                'face_location': face_loc
+            }
+            for student_id, code, conf, face_loc
+            in zip(student_ids, codes.tolist(), confidence, face_locs)
+        ]
+        
+    def _pose_behaviors(self, boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Hand-raise and phone cues per student from the shared pose.
+        
+        Keypoints are read from a body region around each face. A hand
+        is raised when either wrist is clearly above its shoulder; phone
+        use is a bowed head (nose close to the neck) with both wrists
+        together below the face.
+        
+        Args:
+            boxes: (N, 4) face boxes as (top, right, bottom, left)
             
-            if movement > self.head_movement_threshold:
-                behavior_type = BehaviorType.INATTENTIVE.value
-                confidence = min(movement / 100, 0.9)
-            else:
-                behavior_type = BehaviorType.ATTENTIVE.value
-                confidence = 0.8
-        else:
-            behavior_type = BehaviorType.ATTENTIVE.value
-            confidence = 0.7
+        Returns:
+            (hand_raised, using_phone, confidence) arrays of length N;
+            all False when no fresh pose is available
+        """
+        count = len(boxes)
+        hand_raised = np.zeros(count, dtype=bool)
+        using_phone = np.zeros(count, dtype=bool)
+        confidence = np.zeros(count)
+        pose = self.pose
+        if pose is None or time.monotonic() - pose.timestamp > self.pose_max_age:
+            return hand_raised, using_phone, confidence
             
-        # Update head position
-        self.prev_head_pos[student_id] = face_center
+        tops, rights, bottoms, lefts = boxes.T.astype(np.float64)
+        widths = rights - lefts
+        heights = bottoms - tops
         
-        # Check for sleeping based on eye detection
-        if len(eyes) == 0:
-            behavior_type = BehaviorType.SLEEPING.value
-            confidence = 0.85
+        # Raised arms reach above the head, hands rest below the chest
+        regions = np.column_stack((
+            tops - 1.5 * heights, rights + 1.5 * widths,
+            bottoms + 3 * heights, lefts - 1.5 * widths
+        ))
+        keypoints = np.stack([pose.keypoints(tuple(region)) for region in regions])
+        xs = keypoints[..., 0] * pose.frame_width
+        ys = keypoints[..., 1] * pose.frame_height
+        scores = keypoints[..., 2]
+        found = scores > 0
+        
+        for wrist, shoulder in (('RWrist', 'RShoulder'), ('LWrist', 'LShoulder')):
+            w, s = BODY_PARTS[wrist], BODY_PARTS[shoulder]
+            raised = found[:, w] & found[:, s] & (ys[:, w] < ys[:, s] - 0.25 * heights)
+            hand_raised |= raised
+            confidence = np.maximum(
+                confidence, np.where(raised, np.minimum(scores[:, w], scores[:, s]), 0)
+            )
             
-        # Create behavior record
-        behavior = {
-            'student_id': student_id,
-            'type': behavior_type,
-            'confidence': confidence,
-            'timestamp': current_time,
-            'face_location': face_loc
-        }
+        nose, neck = BODY_PARTS['Nose'], BODY_PARTS['Neck']
+        right, left = BODY_PARTS['RWrist'], BODY_PARTS['LWrist']
+        head_down = found[:, nose] & found[:, neck] & (ys[:, neck] - ys[:, nose] < 0.5 * heights)
+        hands_together = (
+            found[:, right] & found[:, left]
+            & (np.hypot(xs[:, right] - xs[:, left], ys[:, right] - ys[:, left]) < widths)
+            & (ys[:, right] > bottoms) & (ys[:, left] > bottoms)
+        )
+        using_phone = head_down & hands_together & ~hand_raised
+        phone_confidence = scores[:, [nose, neck, right, left]].min(axis=1)
+        confidence = np.where(using_phone, phone_confidence, confidence)
         
-        return behavior
+        return hand_raised, using_phone, np.minimum(confidence, 0.95)
+
+
+class BehaviorOverlayRenderer:
+    """Draw behavior overlays onto the frame about to be displayed.
+    
+    Analysis only produces behavior dicts. Drawing happens here, in place
+    on the display buffer, and only while a viewer is attached and at
+    most max_fps times per second.
+    """
+    
+    def __init__(self, max_fps: float = 30.0):
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.viewer_attached = False
+        self._last_render = None
         
-    def _draw_behavior_indicator(
-        self,
+    def frame_due(self, now: float = None) -> bool:
+        """Whether a frame should be drawn and shown now.
+        
+        Args:
+            now: time.monotonic() timestamp, defaults to the current time
+            
+        Returns:
+            True when a viewer is attached and the display interval has
+            passed; the caller is then expected to render and show a frame
+        """
+        if not self.viewer_attached:
+            return False
+        now = time.monotonic() if now is None else now
+        if (self._last_render is not None and
+                now - self._last_render < self.min_interval):
+            return False
+        self._last_render = now
+        return True
+        
+    def render(self, frame: np.ndarray, behaviors: List[Dict]) -> np.ndarray:
+        """Draw every behavior onto frame in place and return it."""
+        for behavior in behaviors:
+            self.draw_indicator(
+                frame,
+                behavior['face_location'],
+                behavior['type'],
+                behavior['confidence']
+            )
+        return frame
+        
+    @staticmethod
+    def draw_indicator(
         frame: np.ndarray,
         face_loc: Tuple[int, int, int, int],
         behavior_type: str,
         confidence: float
     ):
-        """Draw behavior indicator on frame."""
+        """Draw one behavior indicator on frame, in place."""
         top, right, bottom, left = face_loc
         
         # Choose color based on behavior
@@ -4,10 +4,17 @@ import json
 import os
 from pathlib import Path
 from datetime import datetime
-import pandas as pd
-import matplotlib.pyplot as plt
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
+
+# pandas, matplotlib and sklearn are imported by the methods that use
+# them, so importing this module (and the GUI) stays cheap
+
+
+def _pyplot():
+    """Import pyplot with a non-interactive backend on first use."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
 
 
 class BehaviorTrainer:
@@ -21,7 +28,7 @@ class BehaviorTrainer:
             'sleeping': 3,
             'using_phone': 4
         }
-        self.label_encoder = LabelEncoder()
+        self.label_encoder = None
         self.training_data = []
         self.labels = []
         self.landmarks = []
@@ -86,8 +93,13 @@ class BehaviorTrainer:
         if not self.training_data:
             raise ValueError("No training data available")
             
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import LabelEncoder
+
         # Convert data to numpy arrays
         X = np.array(self.landmarks)
+        if self.label_encoder is None:
+            self.label_encoder = LabelEncoder()
         y = self.label_encoder.fit_transform(self.labels)
         
         # Split data
@@ -140,7 +152,9 @@ class BehaviorTrainer:
         data_files = list(self.training_dir.glob('*.json'))
         if not data_files:
             return None
-            
+
+        import pandas as pd
+
         data_list = []
         for file in data_files:
             with open(file) as f:
@@ -154,6 +168,7 @@ class BehaviorTrainer:
 
     def _plot_behavior_distribution(self, data):
         """Plot distribution of behaviors."""
+        plt = _pyplot()
         plt.figure(figsize=(10, 6))
         data['behavior'].value_counts().plot(kind='bar')
         plt.title('Behavior Distribution')
@@ -165,6 +180,7 @@ class BehaviorTrainer:
 
     def _plot_attendance_trends(self, data):
         """Plot attendance trends over time."""
+        plt = _pyplot()
         plt.figure(figsize=(12, 6))
         daily_attendance = data.groupby(
             data['timestamp'].dt.date
@@ -179,6 +195,7 @@ class BehaviorTrainer:
 
     def _plot_behavior_timeline(self, data):
         """Plot behavior changes over time."""
+        plt = _pyplot()
         plt.figure(figsize=(12, 6))
         behavior_timeline = data.pivot_table(
             index=data['timestamp'].dt.date,
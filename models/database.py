@@ -1,91 +1,284 @@
+import os
 import sqlite3
+import threading
+import time
+import zlib
 import numpy as np
-from datetime import datetime
+from pathlib import Path
+from datetime import date, datetime, timedelta, timezone
+
+
+BEHAVIOR_COLUMNS = (
+    "id, student_id, class_id, behavior_type, confidence, "
+    "start_time, end_time, duration"
+)
+
+
+# Dependents first, so the drops never trip over a foreign key
+SCHEMA_TABLES = (
+    "attention_heatmaps",
+    "face_templates",
+    "rollup_state",
+    "attendance_daily",
+    "behavior_daily",
+    "behaviors",
+    "class_students",
+    "attendance",
+    "classes",
+    "students",
+)
+
+
+# Tables copied into the analytics snapshot, with the columns kept;
+# face blobs and raw behavior/attendance rows stay in the live file
+SNAPSHOT_TABLES = {
+    "students": "id, name, class_name, face_image_path, created_at",
+    "classes": "*",
+    "class_students": "*",
+    "behavior_daily": "*",
+    "attendance_daily": "*",
+}
+
+
+def drop_schema(cursor):
+    """Drop every table created by create_schema."""
+    for table in SCHEMA_TABLES:
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def create_schema(cursor):
+    """Create any missing tables and indexes; existing data is kept.
+
+    Shared by Database and the SQLite student storage backend.
+    """
+    # Create students table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS students (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            class_name TEXT NOT NULL,
+            face_encoding BLOB,
+            face_image_path TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Create face_templates table (many float32 templates per student)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS face_templates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id TEXT NOT NULL,
+            template BLOB NOT NULL,
+            quality REAL DEFAULT 1.0,
+            source TEXT,
+            captured_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (student_id) REFERENCES students(id)
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_face_templates_student
+        ON face_templates (student_id)
+    """)
+
+    # Create classes table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS classes (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            room TEXT NOT NULL,
+            schedule TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Create class_students table (many-to-many relationship)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS class_students (
+            class_id TEXT,
+            student_id TEXT,
+            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (class_id, student_id),
+            FOREIGN KEY (class_id) REFERENCES classes(id),
+            FOREIGN KEY (student_id) REFERENCES students(id)
+        )
+    """)
+
+    # Create attendance table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS attendance (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id TEXT,
+            class_id TEXT,
+            session_id TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'Present',
+            UNIQUE (student_id, class_id, session_id),
+            FOREIGN KEY (student_id) REFERENCES students(id),
+            FOREIGN KEY (class_id) REFERENCES classes(id)
+        )
+    """)
+
+    # Files created before the status and session_id columns existed. A
+    # table-level UNIQUE cannot be added by ALTER, so older files get an
+    # equivalent unique index; earlier rows keep a NULL session_id
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(attendance)")}
+    if 'status' not in columns:
+        cursor.execute(
+            "ALTER TABLE attendance ADD COLUMN status TEXT DEFAULT 'Present'"
+        )
+    if 'session_id' not in columns:
+        cursor.execute("ALTER TABLE attendance ADD COLUMN session_id TEXT")
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_session
+            ON attendance (student_id, class_id, session_id)
+        """)
+
+    # Create behaviors table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS behaviors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id TEXT,
+            class_id TEXT,
+            behavior_type TEXT NOT NULL,
+            confidence REAL,
+            start_time TIMESTAMP,
+            end_time TIMESTAMP,
+            duration REAL,
+            FOREIGN KEY (student_id) REFERENCES students(id),
+            FOREIGN KEY (class_id) REFERENCES classes(id)
+        )
+    """)
+
+    # Daily rollups, maintained from the raw tables by refresh_rollups
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS behavior_daily (
+            student_id TEXT,
+            class_id TEXT,
+            day TEXT,
+            behavior_type TEXT,
+            observations INTEGER NOT NULL DEFAULT 0,
+            total_duration REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (student_id, class_id, day, behavior_type)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS attendance_daily (
+            class_id TEXT,
+            day TEXT,
+            checkins INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (class_id, day)
+        )
+    """)
+
+    # High-water marks (last raw row id folded into each rollup)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+    # Per-session seating-grid behavior counts (zlib-compressed int32)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS attention_heatmaps (
+            session_id TEXT PRIMARY KEY,
+            class_id TEXT,
+            started_at TIMESTAMP,
+            rows INTEGER NOT NULL,
+            cols INTEGER NOT NULL,
+            behaviors TEXT NOT NULL,
+            counts BLOB NOT NULL,
+            FOREIGN KEY (class_id) REFERENCES classes(id)
+        )
+    """)
 
 
 class Database:
-    def __init__(self, db_path="classroom.db"):
+    def __init__(self, db_path="classroom.db", attendance_cooldown_minutes=5,
+                 reset=True, snapshot_max_age=60.0, snapshot_cache_kib=65536,
+                 max_templates_per_student=8, archive_dir=None):
         self.db_path = db_path
+        self.reset = reset
+        self.attendance_cooldown = timedelta(minutes=attendance_cooldown_minutes)
+        # (student_id, class_id) -> (last check-in, UTC naive; session_id)
+        self._last_checkin = {}
+        self._checkin_lock = threading.Lock()
+        # Read-only in-memory copy used by analytics queries
+        self.snapshot_max_age = snapshot_max_age
+        self.snapshot_cache_kib = snapshot_cache_kib
+        self._snapshot_conn = None
+        self._snapshot_taken_at = None
+        self._snapshot_lock = threading.RLock()
+        # Recognition matrix built from face_templates, rebuilt on change
+        self.max_templates_per_student = max_templates_per_student
+        self._template_matrix = None
+        self._template_generation = 0
+        self._template_lock = threading.Lock()
+        # Monthly behavior partitions rotated out of the hot file
+        self.archive_dir = archive_dir or os.path.join(
+            os.path.dirname(os.path.abspath(db_path)), 'archive'
+        )
+        self._archive_lock = threading.Lock()
+        self._archive_stop = threading.Event()
+        self._archive_thread = None
         self.setup_database()
+        self.load_checkin_cache()
 
     def setup_database(self):
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
-        # Drop existing tables to ensure schema consistency
-        cursor.execute("DROP TABLE IF EXISTS behaviors")
-        cursor.execute("DROP TABLE IF EXISTS class_students")
-        cursor.execute("DROP TABLE IF EXISTS attendance")
-        cursor.execute("DROP TABLE IF EXISTS classes")
-        cursor.execute("DROP TABLE IF EXISTS students")
+        # Incremental auto-vacuum returns pages freed by archive rotation;
+        # switching an existing file over needs one full VACUUM
+        if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cursor.execute("VACUUM")
 
-        # Create students table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS students (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                class_name TEXT NOT NULL,
-                face_encoding BLOB,
-                face_image_path TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        # WAL lets snapshot readers copy the file while check-ins are written
+        cursor.execute("PRAGMA journal_mode = WAL")
 
-        # Create classes table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS classes (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                subject TEXT NOT NULL,
-                room TEXT NOT NULL,
-                schedule TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Create class_students table (many-to-many relationship)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS class_students (
-                class_id TEXT,
-                student_id TEXT,
-                joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (class_id, student_id),
-                FOREIGN KEY (class_id) REFERENCES classes(id),
-                FOREIGN KEY (student_id) REFERENCES students(id)
-            )
-        """)
+        # Drop existing tables to ensure schema consistency
+        if self.reset:
+            drop_schema(cursor)
 
-        # Create attendance table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS attendance (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id TEXT,
-                class_id TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (student_id) REFERENCES students(id),
-                FOREIGN KEY (class_id) REFERENCES classes(id)
-            )
-        """)
-        
-        # Create behaviors table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS behaviors (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id TEXT,
-                class_id TEXT,
-                behavior_type TEXT NOT NULL,
-                confidence REAL,
-                start_time TIMESTAMP,
-                end_time TIMESTAMP,
-                duration REAL,
-                FOREIGN KEY (student_id) REFERENCES students(id),
-                FOREIGN KEY (class_id) REFERENCES classes(id)
-            )
-        """)
+        create_schema(cursor)
+        self._backfill_face_templates(cursor)
 
         conn.commit()
         conn.close()
 
+    def _backfill_face_templates(self, cursor):
+        """Give students registered before face_templates one template.
+
+        Recognition only reads face_templates, so their registration
+        encoding (students.face_encoding) is copied over once.
+        """
+        cursor.execute(
+            """
+            SELECT id, face_encoding FROM students s
+            WHERE face_encoding IS NOT NULL
+              AND NOT EXISTS (
+                  SELECT 1 FROM face_templates t WHERE t.student_id = s.id
+              )
+            """
+        )
+        templates = []
+        for student_id, face_encoding in cursor.fetchall():
+            try:
+                template = self._to_template(face_encoding)
+            except ValueError:
+                continue
+            templates.append((student_id, template.tobytes(), 'registration'))
+        cursor.executemany(
+            """
+            INSERT INTO face_templates (student_id, template, source)
+            VALUES (?, ?, ?)
+            """,
+            templates
+        )
+
     def add_student(self, student_id, name, face_encoding, 
                    face_image_path, class_name):
         conn = sqlite3.connect(self.db_path)
@@ -100,9 +293,19 @@ class Database:
                 """,
                 (student_id, name, class_name, face_encoding, face_image_path)
             )
+            if face_encoding is not None:
+                cursor.execute(
+                    """
+                    INSERT INTO face_templates (student_id, template, source)
+                    VALUES (?, ?, ?)
+                    """,
+                    (student_id, self._to_template(face_encoding).tobytes(),
+                     'registration')
+                )
             conn.commit()
+            self._invalidate_templates()
             return True
-        except sqlite3.Error:
+        except (sqlite3.Error, ValueError):
             return False
         finally:
             conn.close()
@@ -146,64 +349,346 @@ class Database:
             'created_at': s[5]
         } for s in students]
 
-    def identify_student(self, face_encoding):
+    def iter_students(self, chunk_size=500, include_encodings=False):
+        """Yield students in id order, one chunk of rows at a time.
+
+        Face encodings are only read when include_encodings is set, so
+        roster listings do not pull every blob into memory.
+        """
+        columns = "id, name, class_name, face_image_path, created_at"
+        if include_encodings:
+            columns += ", face_encoding"
+
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
-        cursor.execute("SELECT id, face_encoding FROM students")
-        students = cursor.fetchall()
-        conn.close()
+        try:
+            last_id = ""
+            while True:
+                cursor.execute(
+                    f"""
+                    SELECT {columns}
+                    FROM students
+                    WHERE id > ?
+                    ORDER BY id
+                    LIMIT ?
+                    """,
+                    (last_id, chunk_size)
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    break
 
-        if not students:
+                for row in rows:
+                    student = {
+                        'id': row[0],
+                        'name': row[1],
+                        'class_name': row[2],
+                        'face_image_path': row[3],
+                        'created_at': row[4]
+                    }
+                    if include_encodings:
+                        student['face_encoding'] = row[5]
+                    yield student
+                last_id = rows[-1][0]
+        finally:
+            conn.close()
+
+    def identify_student(self, face_encoding, tolerance=0.6):
+        student_ids, templates = self.load_template_matrix()
+        if not len(student_ids):
             return None
 
-        min_distance = float('inf')
-        matched_student = None
+        test_encoding = self._to_template(face_encoding)
+        distances = np.linalg.norm(templates - test_encoding, axis=1)
+        best = int(np.argmin(distances))
 
-        test_encoding = np.frombuffer(face_encoding, dtype=np.float64)
-        for student_id, stored_encoding in students:
-            if stored_encoding is None:
-                continue
-            
-            stored = np.frombuffer(stored_encoding, dtype=np.float64)
-            distance = np.linalg.norm(test_encoding - stored)
-            
-            if distance < min_distance and distance < 0.6:
-                min_distance = distance
-                matched_student = self.get_student(student_id)
+        if distances[best] < tolerance:
+            return self.get_student(student_ids[best])
+        return None
 
-        return matched_student
+    @staticmethod
+    def _to_template(face_encoding):
+        """Convert an encoding (float64 bytes or array) to a float32 vector."""
+        if isinstance(face_encoding, (bytes, bytearray, memoryview)):
+            face_encoding = np.frombuffer(face_encoding, dtype=np.float64)
+        return np.asarray(face_encoding, dtype=np.float32).ravel()
 
-    def record_attendance(self, student_id, class_id):
+    def add_face_template(self, student_id, face_encoding, quality=1.0,
+                          source=None):
+        """Store another face template for a student.
+
+        The student's templates are pruned back to
+        max_templates_per_student afterwards.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(
+                """
+                INSERT INTO face_templates
+                (student_id, template, quality, source)
+                VALUES (?, ?, ?, ?)
+                """,
+                (student_id, self._to_template(face_encoding).tobytes(),
+                 quality, source)
+            )
+            conn.commit()
+            template_id = cursor.lastrowid
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return None
+        finally:
+            conn.close()
+
+        self._invalidate_templates()
+        self.prune_face_templates(student_id)
+        return template_id
+
+    def get_face_templates(self, student_id):
+        """Get all face templates stored for a student."""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
         try:
-            # Check if attendance already recorded in last 5 minutes
             cursor.execute(
                 """
-                SELECT COUNT(*) FROM attendance 
-                WHERE student_id = ? AND class_id = ? 
-                AND timestamp > datetime('now', '-5 minutes')
+                SELECT id, template, quality, source, captured_at
+                FROM face_templates
+                WHERE student_id = ?
+                ORDER BY id
                 """,
-                (student_id, class_id)
+                (student_id,)
             )
-            recent_count = cursor.fetchone()[0]
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
 
-            if recent_count == 0:
-                cursor.execute(
-                    """
-                    INSERT INTO attendance (student_id, class_id, timestamp)
-                    VALUES (?, ?, datetime('now'))
-                    """,
-                    (student_id, class_id)
-                )
-                conn.commit()
-                return True
+        return [{
+            'id': r[0],
+            'template': np.frombuffer(r[1], dtype=np.float32),
+            'quality': r[2],
+            'source': r[3],
+            'captured_at': r[4]
+        } for r in rows]
+
+    def delete_face_template(self, template_id):
+        """Delete a single face template."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(
+                "DELETE FROM face_templates WHERE id = ?", (template_id,)
+            )
+            conn.commit()
+            self._invalidate_templates()
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
             return False
         finally:
             conn.close()
 
+    def load_template_matrix(self):
+        """Get (student_ids, templates) for recognition.
+
+        templates is an (N, D) float32 matrix whose row i belongs to
+        student_ids[i]. It is read in one query and cached until the
+        templates change.
+        """
+        with self._template_lock:
+            if self._template_matrix is not None:
+                return self._template_matrix
+            generation = self._template_generation
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(
+                "SELECT student_id, template FROM face_templates ORDER BY id"
+            ).fetchall()
+        finally:
+            conn.close()
+
+        if rows:
+            student_ids = np.array([r[0] for r in rows], dtype=object)
+            templates = np.frombuffer(
+                b"".join(r[1] for r in rows), dtype=np.float32
+            ).reshape(len(rows), -1)
+        else:
+            student_ids = np.array([], dtype=object)
+            templates = np.empty((0, 0), dtype=np.float32)
+
+        matrix = (student_ids, templates)
+        with self._template_lock:
+            # Templates changed while reading; use this result once but
+            # leave the cache for a reload that sees the change
+            if self._template_generation == generation:
+                self._template_matrix = matrix
+        return matrix
+
+    def _invalidate_templates(self):
+        """Drop the cached matrix after a face_templates write."""
+        with self._template_lock:
+            self._template_generation += 1
+            self._template_matrix = None
+
+    def prune_face_templates(self, student_id, max_templates=None):
+        """Reduce a student's templates to k medoids.
+
+        Templates are clustered with k-medoids and only the medoid of
+        each cluster is kept, so the retained set still covers the poses
+        and lighting seen so far. Returns the number of templates removed.
+        """
+        k = max_templates or self.max_templates_per_student
+        templates = self.get_face_templates(student_id)
+        if len(templates) <= k:
+            return 0
+
+        vectors = np.stack([t['template'] for t in templates])
+        quality = np.array([t['quality'] or 0.0 for t in templates])
+        distances = np.linalg.norm(
+            vectors[:, None, :] - vectors[None, :, :], axis=2
+        )
+
+        # Farthest-point initialisation from the best-quality template
+        medoids = [int(np.argmax(quality))]
+        while len(medoids) < k:
+            medoids.append(int(np.argmax(distances[:, medoids].min(axis=1))))
+
+        for _ in range(20):
+            labels = np.argmin(distances[:, medoids], axis=1)
+            updated = []
+            for cluster in range(k):
+                members = np.flatnonzero(labels == cluster)
+                if not len(members):
+                    updated.append(medoids[cluster])
+                    continue
+                cost = distances[np.ix_(members, members)].sum(axis=1)
+                updated.append(int(members[np.argmin(cost)]))
+            if updated == medoids:
+                break
+            medoids = updated
+
+        keep = {templates[i]['id'] for i in medoids}
+        removed = [(t['id'],) for t in templates if t['id'] not in keep]
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executemany("DELETE FROM face_templates WHERE id = ?", removed)
+            conn.commit()
+        finally:
+            conn.close()
+
+        self._invalidate_templates()
+        return len(removed)
+
+    def load_checkin_cache(self):
+        """Seed the in-memory cooldown table from the latest check-ins."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            # SQLite takes session_id from the row holding the MAX
+            cursor.execute(
+                """
+                SELECT student_id, class_id, session_id, MAX(timestamp)
+                FROM attendance
+                GROUP BY student_id, class_id
+                """
+            )
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
+
+        last_checkin = {}
+        for student_id, class_id, session_id, timestamp in rows:
+            try:
+                last_checkin[(student_id, class_id)] = (
+                    _as_utc(timestamp), session_id
+                )
+            except ValueError:
+                continue
+
+        with self._checkin_lock:
+            self._last_checkin = last_checkin
+
+    def _write_checkins(self, checkins):
+        """Write check-ins that pass the cooldown; the one attendance writer.
+
+        Args:
+            checkins: (student_id, class_id, session_id, timestamp) tuples;
+                timestamps are UTC (see _as_utc)
+
+        A check-in is skipped when the student already checked in to the
+        class within the cooldown, unless it belongs to the same session,
+        which is updated in place. Returns the number of rows written and
+        re-raises sqlite3.Error after restoring the cooldown table.
+        """
+        rows = []
+        previous = {}
+        with self._checkin_lock:
+            for student_id, class_id, session_id, timestamp in checkins:
+                key = (student_id, class_id)
+                timestamp = _as_utc(timestamp)
+                last = self._last_checkin.get(key)
+                if (last is not None
+                        and (session_id is None or last[1] != session_id)
+                        and abs(timestamp - last[0]) < self.attendance_cooldown):
+                    continue
+                # Claim the slot before writing so concurrent callers
+                # cannot both pass the check. Backfilled or date-only
+                # check-ins older than the cached one never move it back
+                previous.setdefault(key, last)
+                if last is None or timestamp >= last[0]:
+                    self._last_checkin[key] = (timestamp, session_id)
+                rows.append((
+                    student_id, class_id, session_id,
+                    timestamp.strftime('%Y-%m-%d %H:%M:%S')
+                ))
+
+        if not rows:
+            return 0
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            # NULL session ids never conflict, so ad-hoc check-ins insert
+            cursor.executemany(
+                """
+                INSERT INTO attendance
+                (student_id, class_id, session_id, timestamp)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (student_id, class_id, session_id)
+                DO UPDATE SET timestamp = excluded.timestamp
+                """,
+                rows
+            )
+            conn.commit()
+            return len(rows)
+        except sqlite3.Error:
+            conn.rollback()
+            with self._checkin_lock:
+                for key, last in previous.items():
+                    if last is None:
+                        self._last_checkin.pop(key, None)
+                    else:
+                        self._last_checkin[key] = last
+            raise
+        finally:
+            conn.close()
+
+    def record_attendance(self, student_id, class_id):
+        """Record a check-in unless one happened within the cooldown."""
+        try:
+            return self._write_checkins([
+                (student_id, class_id, None, datetime.utcnow())
+            ]) == 1
+        except sqlite3.Error:
+            return False
+
     def get_attendance_records(self, date=None):
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
@@ -239,6 +724,57 @@ class Database:
             'timestamp': r[3]
         } for r in records]
 
+    def iter_attendance_records(self, start_date=None, end_date=None,
+                                chunk_size=1000):
+        """Yield attendance records newest first, one chunk at a time.
+
+        Pages are fetched by keyset on the attendance id, so memory stays
+        bounded regardless of how large the table grows.
+        """
+        conditions = ["a.id < ?"]
+        params = []
+        if start_date:
+            conditions.append("date(a.timestamp) >= date(?)")
+            params.append(start_date)
+        if end_date:
+            conditions.append("date(a.timestamp) <= date(?)")
+            params.append(end_date)
+
+        query = f"""
+            SELECT a.id, s.id, s.name, s.class_name, a.class_id,
+                   c.name, a.timestamp
+            FROM attendance a
+            JOIN students s ON a.student_id = s.id
+            LEFT JOIN classes c ON a.class_id = c.id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY a.id DESC
+            LIMIT ?
+        """
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            last_id = float('inf')
+            while True:
+                cursor.execute(query, (last_id, *params, chunk_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+
+                for r in rows:
+                    yield {
+                        'student_id': r[1],
+                        'name': r[2],
+                        'class_name': r[3],
+                        'class_id': r[4],
+                        'class_title': r[5],
+                        'timestamp': r[6]
+                    }
+                last_id = rows[-1][0]
+        finally:
+            conn.close()
+
     def add_class(self, class_id, name, subject, room, schedule):
         """Add a new class to the database."""
         conn = sqlite3.connect(self.db_path)
@@ -468,36 +1004,41 @@ class Database:
             conn.close()
 
     def save_attendance(self, attendance_data):
-        """Save attendance data for a class session."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            for student_id in attendance_data['students']:
-                check_in_time = attendance_data['check_in_times'].get(
+        """Save attendance data for a class session.
+
+        Rows are keyed by (student_id, class_id, session_id), so saving
+        the same session again updates check-in times instead of adding
+        duplicate rows. The whole session is written in one transaction
+        and shares the check-in cooldown with record_attendance.
+        check_in_times are UTC: aware datetimes are converted, naive ones
+        are taken as UTC already.
+        """
+        class_id = attendance_data['class_id']
+        session_id = (
+            attendance_data.get('session_id')
+            or f"{class_id}_{attendance_data['date']}"
+        )
+        checkins = [
+            (
+                student_id,
+                class_id,
+                session_id,
+                attendance_data['check_in_times'].get(
                     student_id, attendance_data['date']
                 )
-                cursor.execute(
-                    """
-                    INSERT INTO attendance 
-                    (student_id, class_id, timestamp)
-                    VALUES (?, ?, ?)
-                    """,
-                    (student_id, attendance_data['class_id'], check_in_time)
-                )
-            conn.commit()
+            )
+            for student_id in attendance_data['students']
+        ]
+
+        try:
+            self._write_checkins(checkins)
             return True
         except sqlite3.Error:
             return False
-        finally:
-            conn.close()
             
-    def get_attendance_data(self, start_date, end_date):
+    def get_attendance_data(self, start_date, end_date, snapshot=False):
         """Get attendance data for a date range."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(
+        records = self._fetch_analytics(
             """
             SELECT s.name, a.timestamp, c.name as class_name
             FROM attendance a
@@ -507,10 +1048,9 @@ class Database:
             WHERE date(a.timestamp) BETWEEN date(?) AND date(?)
             ORDER BY a.timestamp
             """,
-            (start_date, end_date)
+            (start_date, end_date),
+            snapshot
         )
-        records = cursor.fetchall()
-        conn.close()
         
         return [{
             'student_name': r[0],
@@ -542,26 +1082,23 @@ class Database:
         finally:
             conn.close()
             
-    def get_behavior_data(self, start_date, end_date):
+    def get_behavior_data(self, start_date, end_date, snapshot=False):
         """Get behavior data for a date range."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(
+        records = self._fetch_analytics(
             """
             SELECT s.name, b.behavior_type, b.confidence,
                    b.start_time, b.end_time, b.duration,
                    c.name as class_name
-            FROM behaviors b
+            FROM {behaviors} b
             JOIN students s ON b.student_id = s.id
             JOIN classes c ON b.class_id = c.id
             WHERE date(b.start_time) BETWEEN date(?) AND date(?)
             ORDER BY b.start_time
             """,
-            (start_date, end_date)
+            (start_date, end_date),
+            snapshot,
+            archive_range=(start_date, end_date)
         )
-        records = cursor.fetchall()
-        conn.close()
         
         return [{
             'student_name': r[0],
@@ -573,6 +1110,549 @@ class Database:
             'class_name': r[6]
         } for r in records]
         
+    def iter_behavior_data(self, start_date, end_date, chunk_size=1000):
+        """Yield behavior data for a date range, one chunk at a time.
+
+        Archive partitions are read oldest first and the hot table last,
+        each paged by its own id keyset, so every page is a range scan
+        on one table rather than a re-filtered union of all of them.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            schemas = self._attach_archives(conn, start_date, end_date)
+            for schema in schemas + ["main"]:
+                query = f"""
+                    SELECT b.id, s.name, b.behavior_type, b.confidence,
+                           b.start_time, b.end_time, b.duration,
+                           c.name as class_name
+                    FROM {schema}.behaviors b
+                    JOIN students s ON b.student_id = s.id
+                    JOIN classes c ON b.class_id = c.id
+                    WHERE b.id > ?
+                    AND date(b.start_time) BETWEEN date(?) AND date(?)
+                    ORDER BY b.id
+                    LIMIT ?
+                """
+
+                last_id = 0
+                while True:
+                    cursor.execute(
+                        query, (last_id, start_date, end_date, chunk_size)
+                    )
+                    rows = cursor.fetchall()
+                    if not rows:
+                        break
+
+                    for r in rows:
+                        yield {
+                            'student_name': r[1],
+                            'behavior_type': r[2],
+                            'confidence': r[3],
+                            'start_time': r[4],
+                            'end_time': r[5],
+                            'duration': r[6],
+                            'class_name': r[7]
+                        }
+                    last_id = rows[-1][0]
+        finally:
+            conn.close()
+
+    def refresh_rollups(self):
+        """Fold raw rows added since the last refresh into the rollups.
+
+        Each rollup tracks the highest raw row id it has consumed, so a
+        refresh only aggregates new rows and is cheap to call often.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            self._fold_rollups(cursor)
+            conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def _fold_rollups(self, cursor):
+        """Fold new raw rows into every rollup, in the caller's transaction."""
+        self._fold_rollup(
+            cursor, 'behaviors',
+            """
+            INSERT INTO behavior_daily
+            (student_id, class_id, day, behavior_type,
+             observations, total_duration)
+            SELECT student_id, class_id, date(start_time), behavior_type,
+                   COUNT(*), COALESCE(SUM(duration), 0)
+            FROM behaviors
+            WHERE id > ? AND id <= ?
+            GROUP BY student_id, class_id, date(start_time), behavior_type
+            ON CONFLICT (student_id, class_id, day, behavior_type)
+            DO UPDATE SET
+                observations = observations + excluded.observations,
+                total_duration = total_duration + excluded.total_duration
+            """
+        )
+        self._fold_rollup(
+            cursor, 'attendance',
+            """
+            INSERT INTO attendance_daily (class_id, day, checkins)
+            SELECT class_id, date(timestamp), COUNT(*)
+            FROM attendance
+            WHERE id > ? AND id <= ?
+            GROUP BY class_id, date(timestamp)
+            ON CONFLICT (class_id, day)
+            DO UPDATE SET checkins = checkins + excluded.checkins
+            """
+        )
+
+    def _fold_rollup(self, cursor, table, fold_query):
+        """Aggregate rows of table above its high-water mark."""
+        cursor.execute(
+            "SELECT last_id FROM rollup_state WHERE name = ?", (table,)
+        )
+        row = cursor.fetchone()
+        last_id = row[0] if row else 0
+
+        cursor.execute(f"SELECT MAX(id) FROM {table}")
+        max_id = cursor.fetchone()[0]
+        if max_id is None or max_id <= last_id:
+            return
+
+        cursor.execute(fold_query, (last_id, max_id))
+        cursor.execute(
+            """
+            INSERT INTO rollup_state (name, last_id) VALUES (?, ?)
+            ON CONFLICT (name) DO UPDATE SET last_id = excluded.last_id
+            """,
+            (table, max_id)
+        )
+
+    def rebuild_rollups(self):
+        """Recompute all rollups from the raw tables (e.g. after a backfill).
+
+        The whole rebuild is one transaction on the hot file, so a failure
+        leaves the previous rollups and high-water marks in place.
+        Archive partitions are aggregated on their own connections, since
+        SQLite cannot ATTACH inside a transaction.
+        """
+        with self._archive_lock:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+            try:
+                cursor.execute("DELETE FROM behavior_daily")
+                cursor.execute("DELETE FROM attendance_daily")
+                cursor.execute("DELETE FROM rollup_state")
+
+                # Rows already rotated out live only in the archive files
+                for path in self._archive_files():
+                    archive = sqlite3.connect(path)
+                    try:
+                        totals = archive.execute(
+                            """
+                            SELECT student_id, class_id, date(start_time),
+                                   behavior_type, COUNT(*),
+                                   COALESCE(SUM(duration), 0)
+                            FROM behaviors
+                            GROUP BY student_id, class_id, date(start_time),
+                                     behavior_type
+                            """
+                        ).fetchall()
+                    finally:
+                        archive.close()
+
+                    cursor.executemany(
+                        """
+                        INSERT INTO behavior_daily
+                        (student_id, class_id, day, behavior_type,
+                         observations, total_duration)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (student_id, class_id, day, behavior_type)
+                        DO UPDATE SET
+                            observations = observations + excluded.observations,
+                            total_duration = total_duration + excluded.total_duration
+                        """,
+                        totals
+                    )
+
+                self._fold_rollups(cursor)
+                conn.commit()
+                return True
+            except sqlite3.Error as e:
+                print(f"Database error: {e}")
+                conn.rollback()
+                return False
+            finally:
+                conn.close()
+
+    def get_behavior_summary(self, start_date, end_date, snapshot=False):
+        """Get per student/class/day behavior totals for a date range."""
+        if not snapshot:
+            self.refresh_rollups()
+
+        rows = self._fetch_analytics(
+            """
+            SELECT bd.student_id, s.name, c.name, bd.day,
+                   bd.behavior_type, bd.observations, bd.total_duration
+            FROM behavior_daily bd
+            LEFT JOIN students s ON bd.student_id = s.id
+            LEFT JOIN classes c ON bd.class_id = c.id
+            WHERE bd.day BETWEEN date(?) AND date(?)
+            ORDER BY bd.day
+            """,
+            (start_date, end_date),
+            snapshot
+        )
+
+        return [{
+            'student_id': r[0],
+            'student_name': r[1],
+            'class_name': r[2],
+            'day': r[3],
+            'behavior_type': r[4],
+            'observations': r[5],
+            'total_duration': r[6]
+        } for r in rows]
+
+    def get_attendance_summary(self, start_date, end_date, snapshot=False):
+        """Get per class/day check-in counts for a date range."""
+        if not snapshot:
+            self.refresh_rollups()
+
+        rows = self._fetch_analytics(
+            """
+            SELECT ad.class_id, c.name, ad.day, ad.checkins
+            FROM attendance_daily ad
+            LEFT JOIN classes c ON ad.class_id = c.id
+            WHERE ad.day BETWEEN date(?) AND date(?)
+            ORDER BY ad.day
+            """,
+            (start_date, end_date),
+            snapshot
+        )
+
+        return [{
+            'class_id': r[0],
+            'class_name': r[1],
+            'day': r[2],
+            'checkins': r[3]
+        } for r in rows]
+
+    def save_attention_heatmap(self, session_id, class_id, started_at,
+                               heatmap):
+        """Store (or replace) a session's attention heatmap counts."""
+        counts = np.ascontiguousarray(heatmap.counts, dtype='<i4')
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(
+                """
+                INSERT INTO attention_heatmaps
+                (session_id, class_id, started_at, rows, cols, behaviors, counts)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (session_id) DO UPDATE SET
+                    counts = excluded.counts,
+                    behaviors = excluded.behaviors
+                """,
+                (session_id, class_id,
+                 started_at.strftime('%Y-%m-%d %H:%M:%S'),
+                 heatmap.rows, heatmap.cols, ','.join(heatmap.behaviors),
+                 zlib.compress(counts.tobytes()))
+            )
+            conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            return False
+        finally:
+            conn.close()
+
+    def get_attention_heatmaps(self, start_date, end_date, class_id=None):
+        """Get session heatmaps started in a date range.
+
+        Counts come back decompressed as (rows, cols, behaviors) int32
+        arrays; raw behavior rows are not touched.
+        """
+        query = """
+            SELECT session_id, class_id, started_at, rows, cols,
+                   behaviors, counts
+            FROM attention_heatmaps
+            WHERE date(started_at) BETWEEN ? AND ?
+        """
+        params = [_as_date(start_date).isoformat(), _as_date(end_date).isoformat()]
+        if class_id is not None:
+            query += " AND class_id = ?"
+            params.append(class_id)
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(query + " ORDER BY started_at", params)
+            heatmaps = []
+            for row in cursor.fetchall():
+                behaviors = row[5].split(',')
+                counts = np.frombuffer(zlib.decompress(row[6]), dtype='<i4')
+                heatmaps.append({
+                    'session_id': row[0],
+                    'class_id': row[1],
+                    'started_at': row[2],
+                    'rows': row[3],
+                    'cols': row[4],
+                    'behaviors': behaviors,
+                    'counts': counts.reshape(row[3], row[4], len(behaviors)).copy()
+                })
+            return heatmaps
+        finally:
+            conn.close()
+
+    def refresh_analytics_snapshot(self):
+        """Build a fresh read-only in-memory snapshot for analytics.
+
+        Only the rollups and lookup tables the reports join against
+        (SNAPSHOT_TABLES) are copied, in one read transaction, so the
+        copy stays small however much raw history accumulates. The live
+        file is attached read-only as "live" for the occasional raw-row
+        query, which WAL lets run without blocking check-ins.
+        """
+        self.refresh_rollups()
+
+        snapshot = sqlite3.connect(
+            ":memory:", uri=True, check_same_thread=False,
+            isolation_level=None
+        )
+        try:
+            snapshot.execute(
+                "ATTACH DATABASE ? AS live",
+                (Path(os.path.abspath(self.db_path)).as_uri() + "?mode=ro",)
+            )
+            snapshot.execute("BEGIN")
+            for table, columns in SNAPSHOT_TABLES.items():
+                snapshot.execute(
+                    f"CREATE TABLE main.{table} AS "
+                    f"SELECT {columns} FROM live.{table}"
+                )
+            snapshot.execute("COMMIT")
+        except sqlite3.Error:
+            snapshot.close()
+            raise
+        snapshot.execute(f"PRAGMA cache_size = -{int(self.snapshot_cache_kib)}")
+        snapshot.execute("PRAGMA query_only = ON")
+
+        with self._snapshot_lock:
+            previous = self._snapshot_conn
+            self._snapshot_conn = snapshot
+            self._snapshot_taken_at = time.monotonic()
+        if previous is not None:
+            previous.close()
+
+    def snapshot_age(self):
+        """Seconds since the analytics snapshot was taken, or None."""
+        with self._snapshot_lock:
+            if self._snapshot_taken_at is None:
+                return None
+            return time.monotonic() - self._snapshot_taken_at
+
+    def close_analytics_snapshot(self):
+        """Release the in-memory analytics snapshot."""
+        with self._snapshot_lock:
+            if self._snapshot_conn is not None:
+                self._snapshot_conn.close()
+            self._snapshot_conn = None
+            self._snapshot_taken_at = None
+
+    def _fetch_analytics(self, query, params, snapshot, archive_range=None):
+        """Run a read query on the live file or on the analytics snapshot.
+
+        With archive_range, archive partitions overlapping the date range
+        are attached and {behaviors} in the query names their union. On
+        the snapshot, tables outside SNAPSHOT_TABLES resolve to the
+        read-only "live" attachment.
+        """
+        if snapshot:
+            age = self.snapshot_age()
+            if age is None or age > self.snapshot_max_age:
+                self.refresh_analytics_snapshot()
+            self._snapshot_lock.acquire()
+            conn = self._snapshot_conn
+        else:
+            conn = sqlite3.connect(self.db_path)
+
+        schemas = []
+        try:
+            if archive_range:
+                schemas = self._attach_archives(conn, *archive_range)
+                query = query.format(behaviors=self._behaviors_source(
+                    schemas, "live" if snapshot else "main"
+                ))
+            return conn.execute(query, params).fetchall()
+        finally:
+            if snapshot:
+                for schema in schemas:
+                    conn.execute(f"DETACH DATABASE {schema}")
+                self._snapshot_lock.release()
+            else:
+                conn.close()
+
+    def _archive_path(self, month):
+        """Path of the archive partition for a 'YYYY_MM' month key."""
+        return os.path.join(self.archive_dir, f"behaviors_{month}.db")
+
+    def _archive_files(self):
+        """All existing archive partitions, oldest first."""
+        if not os.path.isdir(self.archive_dir):
+            return []
+        return [
+            os.path.join(self.archive_dir, name)
+            for name in sorted(os.listdir(self.archive_dir))
+            if name.startswith("behaviors_") and name.endswith(".db")
+        ]
+
+    def _attach_archives(self, conn, start_date, end_date):
+        """ATTACH the archive partitions a date range touches.
+
+        Returns the schema names that were attached.
+        """
+        start = _as_date(start_date).replace(day=1)
+        end = _as_date(end_date)
+
+        schemas = []
+        month = start
+        while month <= end:
+            path = self._archive_path(month.strftime("%Y_%m"))
+            if os.path.exists(path):
+                schema = f"archive_{month:%Y_%m}"
+                conn.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+                schemas.append(schema)
+            month = (month + timedelta(days=32)).replace(day=1)
+        return schemas
+
+    @staticmethod
+    def _behaviors_source(schemas, hot="main"):
+        """FROM clause covering the hot table and attached partitions."""
+        if not schemas:
+            return f"{hot}.behaviors"
+        selects = [f"SELECT {BEHAVIOR_COLUMNS} FROM {hot}.behaviors"] + [
+            f"SELECT {BEHAVIOR_COLUMNS} FROM {schema}.behaviors"
+            for schema in schemas
+        ]
+        return "(" + " UNION ALL ".join(selects) + ")"
+
+    def rotate_behaviors(self, keep_months=1):
+        """Move behavior rows older than keep_months into monthly archives.
+
+        Rollups are refreshed first so they keep counting rotated rows.
+        The hot file is incrementally vacuumed afterwards. Returns the
+        number of rows moved.
+        """
+        today = date.today()
+        month_index = today.year * 12 + today.month - 1 - (keep_months - 1)
+        cutoff = date(month_index // 12, month_index % 12 + 1, 1).isoformat()
+
+        with self._archive_lock:
+            self.refresh_rollups()
+            os.makedirs(self.archive_dir, exist_ok=True)
+
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            moved = 0
+
+            try:
+                cursor.execute(
+                    """
+                    SELECT DISTINCT strftime('%Y_%m', start_time)
+                    FROM behaviors
+                    WHERE start_time < ?
+                    """,
+                    (cutoff,)
+                )
+                months = [row[0] for row in cursor.fetchall() if row[0]]
+
+                for month in months:
+                    cursor.execute(
+                        "ATTACH DATABASE ? AS archive",
+                        (self._archive_path(month),)
+                    )
+                    cursor.execute("""
+                        CREATE TABLE IF NOT EXISTS archive.behaviors (
+                            id INTEGER PRIMARY KEY,
+                            student_id TEXT,
+                            class_id TEXT,
+                            behavior_type TEXT NOT NULL,
+                            confidence REAL,
+                            start_time TIMESTAMP,
+                            end_time TIMESTAMP,
+                            duration REAL
+                        )
+                    """)
+                    cursor.execute("""
+                        CREATE INDEX IF NOT EXISTS archive.idx_behaviors_start
+                        ON behaviors (start_time)
+                    """)
+                    # A plain INSERT: an id already in the archive (ids
+                    # restart when the hot file is reset) raises and rolls
+                    # the month back rather than losing the row
+                    cursor.execute(
+                        f"""
+                        INSERT INTO archive.behaviors
+                        SELECT {BEHAVIOR_COLUMNS} FROM main.behaviors
+                        WHERE strftime('%Y_%m', start_time) = ?
+                        AND start_time < ?
+                        """,
+                        (month, cutoff)
+                    )
+                    cursor.execute(
+                        """
+                        DELETE FROM main.behaviors
+                        WHERE strftime('%Y_%m', start_time) = ?
+                        AND start_time < ?
+                        """,
+                        (month, cutoff)
+                    )
+                    moved += cursor.rowcount
+                    conn.commit()
+                    cursor.execute("DETACH DATABASE archive")
+
+                if moved:
+                    cursor.execute("PRAGMA incremental_vacuum")
+                    cursor.fetchall()
+                return moved
+            except sqlite3.Error as e:
+                print(f"Database error: {e}")
+                conn.rollback()
+                return moved
+            finally:
+                conn.close()
+
+    def start_archive_job(self, interval_seconds=3600, keep_months=1):
+        """Rotate old behavior rows in a background thread."""
+        if self._archive_thread and self._archive_thread.is_alive():
+            return
+
+        def run():
+            while not self._archive_stop.wait(interval_seconds):
+                self.rotate_behaviors(keep_months)
+
+        self._archive_stop.clear()
+        self._archive_thread = threading.Thread(
+            target=run, name="behavior-archiver", daemon=True
+        )
+        self._archive_thread.start()
+
+    def stop_archive_job(self):
+        """Stop the background archive rotation."""
+        self._archive_stop.set()
+        if self._archive_thread:
+            self._archive_thread.join()
+            self._archive_thread = None
+
     def get_student_name(self, student_id):
         """Get a student's name by ID."""
         conn = sqlite3.connect(self.db_path)
@@ -649,3 +1729,46 @@ class Database:
             return False
         finally:
             conn.close()
+
+
+
+def _as_utc(value):
+    """Coerce a check-in time to a naive UTC datetime, to the second.
+
+    Aware datetimes are converted; naive datetimes and ISO strings are
+    taken as UTC already, matching SQLite's CURRENT_TIMESTAMP; a bare
+    date means its midnight.
+    """
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    elif not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(microsecond=0)
+
+
+def _as_date(value):
+    """Coerce a date, datetime or ISO string to a date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.fromisoformat(str(value)).date()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Classroom database tools")
+    parser.add_argument("command", choices=["rebuild-rollups", "rotate"])
+    parser.add_argument("--db", default="classroom.db", help="Database path")
+    args = parser.parse_args()
+
+    database = Database(args.db, reset=False)
+    if args.command == "rebuild-rollups":
+        if not database.rebuild_rollups():
+            raise SystemExit(1)
+        print(f"Rebuilt rollups in {args.db}")
+    elif args.command == "rotate":
+        moved = database.rotate_behaviors()
+        print(f"Moved {moved} behavior rows to {database.archive_dir}")
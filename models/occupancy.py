@@ -0,0 +1,111 @@
+import time
+import cv2
+import numpy as np
+from enum import Enum
+from typing import Dict, Optional
+
+
+class PowerMode(Enum):
+    ACTIVE = "active"
+    IDLE = "idle"
+
+
+class OccupancyMonitor:
+    """Drop the capture pipeline to a low-power mode in an empty room.
+
+    After idle_after seconds without a face the monitor switches to IDLE:
+    frames arrive at idle_interval_ms and only a cheap motion check runs
+    on a small downscaled copy, plus a full pass every
+    idle_detection_interval seconds in case someone sits very still.
+    Motion or a detected face switches straight back to ACTIVE. Time
+    spent in each mode is accumulated for battery reporting.
+    """
+
+    def __init__(self, idle_after: float = 60.0, active_interval_ms: int = 30,
+                 idle_interval_ms: int = 500, idle_detection_interval: float = 5.0,
+                 motion_threshold: float = 0.01, pixel_threshold: int = 25,
+                 motion_size: tuple = (64, 48)):
+        self.idle_after = idle_after
+        self.active_interval_ms = active_interval_ms
+        self.idle_interval_ms = idle_interval_ms
+        self.idle_detection_interval = idle_detection_interval
+        self.motion_threshold = motion_threshold  # fraction of changed pixels
+        self.pixel_threshold = pixel_threshold
+        self.motion_size = motion_size
+
+        now = time.monotonic()
+        self.mode = PowerMode.ACTIVE
+        self._mode_since = now
+        self._last_face = now
+        self._last_idle_check = now
+        self._reference = None
+        self._time_in_mode = {mode: 0.0 for mode in PowerMode}
+        self.switches = 0
+
+    @property
+    def interval_ms(self) -> int:
+        """Capture timer interval for the current mode."""
+        if self.mode is PowerMode.IDLE:
+            return self.idle_interval_ms
+        return self.active_interval_ms
+
+    def _switch(self, mode: PowerMode, now: float):
+        if mode is self.mode:
+            return
+        self._time_in_mode[self.mode] += now - self._mode_since
+        self.mode = mode
+        self._mode_since = now
+        self.switches += 1
+        self._reference = None
+        if mode is PowerMode.ACTIVE:
+            self._last_face = now
+        else:
+            self._last_idle_check = now
+
+    def detect_motion(self, frame: np.ndarray) -> bool:
+        """Compare a small blurred grey copy of frame with the previous one."""
+        small = cv2.resize(frame, self.motion_size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        small = cv2.GaussianBlur(small, (5, 5), 0)
+
+        reference, self._reference = self._reference, small
+        if reference is None:
+            return False
+        changed = cv2.absdiff(small, reference) > self.pixel_threshold
+        return changed.mean() > self.motion_threshold
+
+    def should_process(self, frame: np.ndarray, now: Optional[float] = None) -> bool:
+        """Whether this tick should run the full pipeline.
+
+        Always True while ACTIVE. While IDLE only the motion check runs;
+        motion switches back to ACTIVE, and a periodic full pass lets a
+        still but present person be detected.
+        """
+        if self.mode is PowerMode.ACTIVE:
+            return True
+        now = time.monotonic() if now is None else now
+        if self.detect_motion(frame):
+            self._switch(PowerMode.ACTIVE, now)
+            return True
+        if now - self._last_idle_check >= self.idle_detection_interval:
+            self._last_idle_check = now
+            return True
+        return False
+
+    def report_faces(self, count: int, now: Optional[float] = None):
+        """Feed the number of faces from a detection pass."""
+        now = time.monotonic() if now is None else now
+        if count:
+            self._last_face = now
+            self._switch(PowerMode.ACTIVE, now)
+        elif (self.mode is PowerMode.ACTIVE and
+                now - self._last_face >= self.idle_after):
+            self._switch(PowerMode.IDLE, now)
+
+    def time_in_mode(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Seconds spent in each mode so far, including the current one."""
+        now = time.monotonic() if now is None else now
+        totals = {mode.value: seconds for mode, seconds in self._time_in_mode.items()}
+        totals[self.mode.value] += now - self._mode_since
+        return totals
@@ -0,0 +1,112 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+# Target rates in Hz. Identities rarely change and attention shifts over
+# seconds, so only capture/display needs to follow the camera.
+DEFAULT_RATES = {
+    'display': 30.0,
+    'detection': 10.0,
+    'recognition': 1.0,
+    'behavior': 5.0,
+    'pose': 5.0,
+}
+
+
+class RoundRobinBudget:
+    """Spread per-item work over ticks with a bounded refresh latency.
+
+    Each tick serves the items that have waited longest. The number per
+    tick is the smallest that still reaches every item within
+    max_latency seconds at the given tick rate; 40 students at 5 Hz with
+    a 1 s bound means 8 per tick.
+    """
+
+    def __init__(self, max_latency: float = 1.0):
+        self.max_latency = max_latency
+        self._queue = OrderedDict()  # item id -> None, longest waiting first
+
+    def per_tick(self, count: int, rate: float) -> int:
+        """Items to serve per tick for count items at rate Hz."""
+        ticks = max(1, int(self.max_latency * rate))
+        return math.ceil(count / ticks)
+
+    def select(self, ids: List[str], rate: float) -> List[str]:
+        """Pick this tick's share of ids and move them to the back."""
+        present = set(ids)
+        for item in list(self._queue):
+            if item not in present:
+                del self._queue[item]
+        for item in reversed(ids):
+            if item not in self._queue:
+                # Newcomers go to the front, in input order, so they are
+                # served at once
+                self._queue[item] = None
+                self._queue.move_to_end(item, last=False)
+
+        share = self.per_tick(len(ids), rate)
+        chosen = []
+        for item in self._queue:
+            if len(chosen) == share:
+                break
+            chosen.append(item)
+        for item in chosen:
+            self._queue.move_to_end(item)
+        return chosen
+
+
+class PipelineScheduler:
+    """Decide which pipeline stages run on each timer tick.
+
+    The camera timer ticks at the capture rate; every other stage runs
+    only when its own period has elapsed and reuses the latest results
+    of the stages it depends on in between. Per-student behavior work is
+    further budgeted round-robin so large classes do not stall a tick.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None,
+                 behavior_latency: float = 1.0):
+        self.rates = dict(DEFAULT_RATES)
+        self.rates.update(rates or {})
+        self.behavior_budget = RoundRobinBudget(behavior_latency)
+        self._next_run = {stage: 0.0 for stage in self.rates}
+        self.run_counts = {stage: 0 for stage in self.rates}
+
+    def set_rate(self, stage: str, rate: float):
+        """Change a stage's target rate (Hz); 0 disables the stage."""
+        self.rates[stage] = rate
+        self._next_run.setdefault(stage, 0.0)
+        self.run_counts.setdefault(stage, 0)
+
+    def due(self, stage: str, now: Optional[float] = None) -> bool:
+        """Whether stage should run now; if so it is marked as run.
+
+        Args:
+            stage: Stage name, e.g. 'detection'
+            now: time.monotonic() timestamp, defaults to the current time
+
+        Returns:
+            True when the stage's period has elapsed since its last run
+        """
+        rate = self.rates.get(stage, 0.0)
+        if rate <= 0:
+            return False
+        now = time.monotonic() if now is None else now
+        if now < self._next_run[stage]:
+            return False
+        # Advance from the scheduled time, not now, so timer jitter does
+        # not lower the effective rate; after a long stall start afresh
+        period = 1.0 / rate
+        self._next_run[stage] = max(self._next_run[stage], now - period) + period
+        self.run_counts[stage] += 1
+        return True
+
+    def select_students(self, students: List[Dict]) -> List[Dict]:
+        """Subset of recognized students to analyze on this behavior tick."""
+        by_id = {student['id']: student for student in students}
+        chosen = self.behavior_budget.select(
+            list(by_id), self.rates.get('behavior', 0.0)
+        )
+        return [by_id[student_id] for student_id in chosen]
@@ -0,0 +1,178 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from typing import Callable, List, Optional, Tuple
+
+
+# OpenPose (COCO) body part indices
+BODY_PARTS = {
+    "Nose": 0, "Neck": 1, "RShoulder": 2, "RElbow": 3, "RWrist": 4,
+    "LShoulder": 5, "LElbow": 6, "LWrist": 7, "RHip": 8, "RKnee": 9,
+    "RAnkle": 10, "LHip": 11, "LKnee": 12, "LAnkle": 13, "REye": 14,
+    "LEye": 15, "REar": 16, "LEar": 17
+}
+
+DEFAULT_MODEL_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'data', 'models', 'pose', 'graph_opt.pb'
+)
+
+
+class PoseFrame:
+    """Confidence maps from one pose inference on one frame.
+
+    Keypoints are read out of the maps on demand, either for the whole
+    frame (one person) or for a region around a single student, so every
+    consumer shares the same network pass.
+    """
+
+    def __init__(self, heatmaps: np.ndarray, frame_size: Tuple[int, int],
+                 timestamp: float, threshold: float = 0.2):
+        self.heatmaps = heatmaps  # (parts, rows, cols)
+        self.frame_width, self.frame_height = frame_size
+        self.timestamp = timestamp
+        self.threshold = threshold
+
+    def keypoints(self, region: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        """Strongest location of every body part.
+
+        Args:
+            region: Optional (top, right, bottom, left) box in frame
+                pixels to search in; defaults to the whole frame
+
+        Returns:
+            (parts, 3) array of normalized x, y and confidence; parts
+            below the threshold are all zeros
+        """
+        parts, rows, cols = self.heatmaps.shape
+        row0, col0, row1, col1 = 0, 0, rows, cols
+        if region is not None:
+            top, right, bottom, left = region
+            row0 = int(np.clip(top * rows / self.frame_height, 0, rows - 1))
+            row1 = int(np.clip(np.ceil(bottom * rows / self.frame_height), row0 + 1, rows))
+            col0 = int(np.clip(left * cols / self.frame_width, 0, cols - 1))
+            col1 = int(np.clip(np.ceil(right * cols / self.frame_width), col0 + 1, cols))
+
+        window = self.heatmaps[:, row0:row1, col0:col1].reshape(parts, -1)
+        flat = window.argmax(axis=1)
+        confidence = window[np.arange(parts), flat]
+        width = col1 - col0
+        result = np.column_stack((
+            (col0 + flat % width + 0.5) / cols,
+            (row0 + flat // width + 0.5) / rows,
+            confidence
+        ))
+        result[confidence <= self.threshold] = 0
+        return result
+
+
+class PoseEstimator:
+    """Run pose estimation once per scheduled frame and publish it.
+
+    Consumers subscribe a callback and receive every PoseFrame, so the
+    behavior monitor and action recognizer share a single inference.
+    A pass costs tens of milliseconds on CPU, so live callers use
+    estimate_async, which runs it on one background worker; callbacks
+    then run on that worker thread and must only hand the pose over.
+    """
+
+    def __init__(self, model_path: str = DEFAULT_MODEL_PATH,
+                 input_size: Tuple[int, int] = (368, 368), threshold: float = 0.2):
+        self.input_size = input_size
+        self.threshold = threshold
+        self.latest: Optional[PoseFrame] = None
+        self._subscribers: List[Callable[[PoseFrame], None]] = []
+        # cv2.dnn nets are not safe to run from two threads at once
+        self._net_lock = threading.Lock()
+        self._executor = None
+        self._pending = None
+
+        try:
+            if os.path.exists(model_path):
+                self.net = cv2.dnn.readNetFromTensorflow(model_path)
+            else:
+                print(f"Pose model not found at {model_path}")
+                self.net = None
+        except Exception as e:
+            print(f"Error initializing pose model: {str(e)}")
+            self.net = None
+
+    @property
+    def available(self) -> bool:
+        return self.net is not None
+
+    def subscribe(self, callback: Callable[[PoseFrame], None]):
+        """Call callback with every new PoseFrame."""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[PoseFrame], None]):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def estimate(self, frame: np.ndarray, publish: bool = True) -> Optional[PoseFrame]:
+        """Run the network on frame.
+
+        Args:
+            frame: BGR video frame
+            publish: Whether to hand the result to subscribers
+
+        Returns:
+            The PoseFrame, or None when the model is unavailable or fails
+        """
+        if self.net is None:
+            return None
+
+        frame_height, frame_width = frame.shape[:2]
+        try:
+            blob = cv2.dnn.blobFromImage(
+                frame, 1.0, self.input_size, (127.5, 127.5, 127.5),
+                swapRB=True, crop=False
+            )
+            with self._net_lock:
+                self.net.setInput(blob)
+                output = self.net.forward()
+        except Exception as e:
+            print(f"Error estimating pose: {str(e)}")
+            return None
+
+        pose = PoseFrame(
+            output[0, :len(BODY_PARTS)], (frame_width, frame_height),
+            time.monotonic(), self.threshold
+        )
+        if publish:
+            self.latest = pose
+            for callback in list(self._subscribers):
+                callback(pose)
+        return pose
+
+    def estimate_async(self, frame: np.ndarray) -> bool:
+        """Run estimate() on the background worker and publish the result.
+
+        Frames arriving while a pass is still running are dropped rather
+        than queued, so the pose never lags behind the camera.
+
+        Returns:
+            Whether the frame was taken
+        """
+        if self.net is None:
+            return False
+        if self._pending is not None and not self._pending.done():
+            return False
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='pose-estimator'
+            )
+        # The caller goes on to draw on its frame
+        self._pending = self._executor.submit(self.estimate, frame.copy())
+        return True
+
+    def close(self):
+        """Wait for a running pass and stop the background worker."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._pending = None
@@ -0,0 +1,504 @@
+import os
+import ast
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+from models.database import _as_utc, create_schema
+
+
+Stores = Tuple[Dict, Dict, Dict]
+
+
+def set_entry(store: str, path: List[str], value) -> Dict:
+    return {'op': 'set', 'store': store, 'path': path, 'value': value}
+
+
+def delete_entry(store: str, path: List[str]) -> Dict:
+    return {'op': 'del', 'store': store, 'path': path}
+
+
+class StorageBackend(ABC):
+    """Persistence for StudentManager's students, classes and attendance.
+
+    StudentManager keeps the three dicts in memory and serves reads from
+    them. Every mutation is described as a list of entries built with
+    set_entry/delete_entry, where store is 'students', 'classes' or
+    'attendance' and path is the key path inside that dict
+    ([student_id], [class_id] or [class_id, date, student_id]). A backend
+    only has to load the dicts once and persist entries durably.
+    """
+
+    def __init__(self):
+        self._batch_depth = 0
+
+    @abstractmethod
+    def load(self) -> Stores:
+        """Return the (students, classes, attendance) dicts."""
+
+    @abstractmethod
+    def write(self, entries: List[Dict]) -> None:
+        """Persist mutations that were already applied in memory."""
+
+    @property
+    def in_batch(self) -> bool:
+        return self._batch_depth > 0
+
+    @contextmanager
+    def batch(self):
+        """Persist every write inside the block together on normal exit.
+
+        If the outermost block raises, its writes are discarded instead.
+        """
+        if not self._batch_depth:
+            self._begin_batch()
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._abort_batch()
+            raise
+        self._batch_depth -= 1
+        if not self._batch_depth:
+            self._end_batch()
+
+    def _begin_batch(self) -> None:
+        pass
+
+    def _end_batch(self) -> None:
+        pass
+
+    def _abort_batch(self) -> None:
+        pass
+
+    def compact(self, background: bool = False) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class JsonJournalBackend(StorageBackend):
+    """JSON snapshot files plus an append-only JSON-lines journal.
+
+    Mutations are appended to the journal and folded into the snapshots
+    by periodic compaction, which runs in the background.
+    """
+
+    def __init__(self, data_dir: str, compact_every: int = 1000):
+        super().__init__()
+        self.students_file = os.path.join(data_dir, 'students.json')
+        self.classes_file = os.path.join(data_dir, 'classes.json')
+        self.attendance_file = os.path.join(data_dir, 'attendance.json')
+        self.journal_file = os.path.join(data_dir, 'journal.jsonl')
+        self.compact_every = compact_every
+        self._journal_lock = threading.Lock()
+        self._journal_entries = 0
+        self._compaction_thread = None
+        self._stores: Dict[str, Tuple[dict, str]] = {}
+
+    def _load_data(self, file_path: str, default: dict) -> dict:
+        if os.path.exists(file_path):
+            try:
+                with open(file_path, 'r') as f:
+                    return json.load(f)
+            except json.JSONDecodeError:
+                print(f"Error reading {file_path}, creating new file")
+                return default
+        return default
+
+    def load(self) -> Stores:
+        self._journal_entries = 0
+        students = self._load_data(self.students_file, {})
+        classes = self._load_data(self.classes_file, {})
+        attendance = self._load_data(self.attendance_file, {})
+        self._stores = {
+            'students': (students, self.students_file),
+            'classes': (classes, self.classes_file),
+            'attendance': (attendance, self.attendance_file)
+        }
+        self._replay_journal()
+        return students, classes, attendance
+
+    def _atomic_write(self, file_path: str, text: str) -> None:
+        """Write a file via temp file + rename so readers never see half of it."""
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        temp_path = file_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+
+    def _apply(self, entry: Dict) -> None:
+        target = self._stores[entry['store']][0]
+        for key in entry['path'][:-1]:
+            target = target.setdefault(key, {})
+        if entry['op'] == 'set':
+            target[entry['path'][-1]] = entry['value']
+        else:
+            target.pop(entry['path'][-1], None)
+
+    def write(self, entries: List[Dict]) -> None:
+        if self._batch_depth:
+            # Persisted once by the enclosing batch()
+            return
+
+        lines = ''.join(json.dumps(entry) + '\n' for entry in entries)
+        with self._journal_lock:
+            with open(self.journal_file, 'a') as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_entries += len(entries)
+            due = self._journal_entries >= self.compact_every
+
+        if due:
+            self.compact(background=True)
+
+    def _end_batch(self) -> None:
+        self.compact()
+
+    def _abort_batch(self) -> None:
+        # Batched writes were never journalled; the files are untouched
+        pass
+
+    def _replay_journal(self) -> None:
+        """Apply journalled mutations on top of the loaded snapshots."""
+        compacting_file = self.journal_file + '.compacting'
+        interrupted = os.path.exists(compacting_file)
+
+        for path in (compacting_file, self.journal_file):
+            if not os.path.exists(path):
+                continue
+            line = '\n'
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn final line from a crash mid-append
+                        continue
+                    self._apply(entry)
+                    self._journal_entries += 1
+            if not line.endswith('\n'):
+                # Terminate the torn line so new appends start cleanly
+                with open(path, 'a') as f:
+                    f.write('\n')
+
+        if interrupted:
+            self.compact()
+
+    @classmethod
+    def _copy_tree(cls, value):
+        """Copy nested dicts and lists; StudentManager edits records in place."""
+        if isinstance(value, dict):
+            return {key: cls._copy_tree(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [cls._copy_tree(item) for item in value]
+        return value
+
+    def compact(self, background: bool = False) -> None:
+        """Fold the journal into the JSON snapshots.
+
+        Only the journal swap and a copy of the stores happen under the
+        lock; serializing and writing the copy runs afterwards (on the
+        compaction thread when background), while mutations keep
+        appending to a fresh journal.
+        """
+        compacting_file = self.journal_file + '.compacting'
+
+        if self._compaction_thread and self._compaction_thread.is_alive():
+            if background:
+                return
+            self._compaction_thread.join()
+
+        with self._journal_lock:
+            snapshots = [
+                (file_path, self._copy_tree(data))
+                for data, file_path in self._stores.values()
+            ]
+            if os.path.exists(self.journal_file):
+                if os.path.exists(compacting_file):
+                    with open(self.journal_file, 'r') as src, \
+                            open(compacting_file, 'a') as dst:
+                        dst.write(src.read())
+                    os.remove(self.journal_file)
+                else:
+                    os.replace(self.journal_file, compacting_file)
+            self._journal_entries = 0
+
+        def write_snapshots():
+            for file_path, data in snapshots:
+                self._atomic_write(file_path, json.dumps(data, indent=4))
+            if os.path.exists(compacting_file):
+                os.remove(compacting_file)
+
+        if background:
+            self._compaction_thread = threading.Thread(
+                target=write_snapshots, name='student-manager-compaction'
+            )
+            self._compaction_thread.start()
+        else:
+            write_snapshots()
+
+    def close(self) -> None:
+        """Wait for background compaction and fold the journal once more."""
+        if self._compaction_thread:
+            self._compaction_thread.join()
+        self.compact()
+
+
+class SqliteBackend(StorageBackend):
+    """Rows in the same SQLite file and schema as Database.
+
+    Students and classes go to their tables, enrolments to class_students
+    and attendance to attendance with one session per class and day, so
+    the GUI and StudentManager see a single store. Attendance times are
+    stored in UTC like Database's and handed back in local time. Each
+    write() is one transaction; inside batch() all writes share one
+    transaction.
+    """
+
+    def __init__(self, db_path: str = "classroom.db"):
+        super().__init__()
+        self.db_path = db_path
+        self._conn = None
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            create_schema(conn.cursor())
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _session_id(class_id: str, date_str: str) -> str:
+        return f"{class_id}_{date_str}"
+
+    @staticmethod
+    def _to_utc(date_str: str, time_str: str = None) -> str:
+        """attendance.timestamp (UTC, as Database writes it) for a local time."""
+        local = datetime.strptime(
+            f"{date_str} {time_str or '00:00:00'}", '%Y-%m-%d %H:%M:%S'
+        ).astimezone()
+        return _as_utc(local).strftime('%Y-%m-%d %H:%M:%S')
+
+    @staticmethod
+    def _to_local(timestamp) -> Tuple[str, str]:
+        """(date, time) in local time for a UTC attendance.timestamp."""
+        local = _as_utc(timestamp).replace(tzinfo=timezone.utc).astimezone()
+        return local.strftime('%Y-%m-%d'), local.strftime('%H:%M:%S')
+
+    @staticmethod
+    def _parse_schedule(text):
+        if not text:
+            return {}
+        try:
+            return json.loads(text)
+        except ValueError:
+            # Written by Database.add_class as str(dict)
+            try:
+                return ast.literal_eval(text)
+            except (ValueError, SyntaxError):
+                return {}
+
+    def load(self) -> Stores:
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            students = {
+                row[0]: {
+                    'name': row[1],
+                    'class_ids': [],
+                    'registration_date': row[2]
+                }
+                for row in cursor.execute(
+                    "SELECT id, name, created_at FROM students ORDER BY rowid"
+                )
+            }
+            classes = {
+                row[0]: {
+                    'name': row[1],
+                    'subject': row[2],
+                    'schedule': self._parse_schedule(row[4]),
+                    'room': row[3],
+                    'students': [],
+                    'creation_date': row[5]
+                }
+                for row in cursor.execute(
+                    """
+                    SELECT id, name, subject, room, schedule, created_at
+                    FROM classes ORDER BY rowid
+                    """
+                )
+            }
+
+            for class_id, student_id in cursor.execute(
+                "SELECT class_id, student_id FROM class_students ORDER BY rowid"
+            ):
+                if class_id in classes and student_id in students:
+                    classes[class_id]['students'].append(student_id)
+                    students[student_id]['class_ids'].append(class_id)
+
+            # Timestamps are UTC; StudentManager keys attendance by local day
+            attendance = {}
+            for class_id, student_id, timestamp, status in cursor.execute(
+                """
+                SELECT class_id, student_id, timestamp,
+                       COALESCE(status, 'Present')
+                FROM attendance
+                WHERE timestamp IS NOT NULL
+                ORDER BY timestamp
+                """
+            ):
+                try:
+                    day, check_in_time = self._to_local(timestamp)
+                except ValueError:
+                    continue
+                attendance.setdefault(class_id, {}).setdefault(day, {})[student_id] = {
+                    'status': status,
+                    'check_in_time': check_in_time
+                }
+
+            return students, classes, attendance
+        finally:
+            conn.close()
+
+    def _write_entry(self, cursor, entry: Dict) -> None:
+        store, path = entry['store'], entry['path']
+
+        if entry['op'] == 'del':
+            if store == 'attendance':
+                self._delete_attendance(cursor, path)
+                return
+            column = 'student_id' if store == 'students' else 'class_id'
+            cursor.execute(f"DELETE FROM class_students WHERE {column} = ?", (path[0],))
+            cursor.execute(f"DELETE FROM {store} WHERE id = ?", (path[0],))
+            return
+
+        value = entry['value']
+        if store == 'students':
+            cursor.execute(
+                """
+                INSERT INTO students (id, name, class_name, created_at)
+                VALUES (?, ?, '', ?)
+                ON CONFLICT (id) DO UPDATE SET name = excluded.name
+                """,
+                (path[0], value['name'], value.get('registration_date'))
+            )
+            self._sync_enrolments(cursor, 'student_id', 'class_id', path[0], value['class_ids'])
+        elif store == 'classes':
+            cursor.execute(
+                """
+                INSERT INTO classes (id, name, subject, room, schedule, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    name = excluded.name,
+                    subject = excluded.subject,
+                    room = excluded.room,
+                    schedule = excluded.schedule
+                """,
+                (path[0], value['name'], value['subject'], value['room'],
+                 json.dumps(value['schedule']), value.get('creation_date'))
+            )
+            self._sync_enrolments(cursor, 'class_id', 'student_id', path[0], value['students'])
+        else:
+            class_id, date_str, student_id = path
+            timestamp = self._to_utc(date_str, value.get('check_in_time'))
+            cursor.execute(
+                """
+                INSERT INTO attendance
+                (student_id, class_id, session_id, timestamp, status)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (student_id, class_id, session_id)
+                DO UPDATE SET timestamp = excluded.timestamp,
+                              status = excluded.status
+                """,
+                (student_id, class_id, self._session_id(class_id, date_str),
+                 timestamp, value['status'])
+            )
+
+    def _delete_attendance(self, cursor, path: List[str]) -> None:
+        """Delete the rows under [class_id], [class_id, date] or the full path.
+
+        Dates are local, so a day is the UTC range between its local
+        midnights.
+        """
+        if not 1 <= len(path) <= 3:
+            raise ValueError(f"Invalid attendance path: {path!r}")
+        query = "DELETE FROM attendance WHERE class_id = ?"
+        params = [path[0]]
+        if len(path) > 1:
+            next_day = (
+                datetime.strptime(path[1], '%Y-%m-%d') + timedelta(days=1)
+            ).strftime('%Y-%m-%d')
+            query += " AND timestamp >= ? AND timestamp < ?"
+            params += [self._to_utc(path[1]), self._to_utc(next_day)]
+        if len(path) > 2:
+            query += " AND student_id = ?"
+            params.append(path[2])
+        cursor.execute(query, params)
+
+    @staticmethod
+    def _sync_enrolments(cursor, key_column: str, other_column: str,
+                         key: str, others: List[str]) -> None:
+        """Make class_students match others for one student or class.
+
+        Surviving rows are left alone so their rowid keeps list order.
+        """
+        placeholders = ', '.join('?' * len(others))
+        cursor.execute(
+            f"DELETE FROM class_students WHERE {key_column} = ? "
+            f"AND {other_column} NOT IN ({placeholders})",
+            [key, *others]
+        )
+        cursor.executemany(
+            f"INSERT OR IGNORE INTO class_students ({key_column}, {other_column}) "
+            f"VALUES (?, ?)",
+            [(key, other) for other in others]
+        )
+
+    def write(self, entries: List[Dict]) -> None:
+        if self._conn is not None:
+            cursor = self._conn.cursor()
+            for entry in entries:
+                self._write_entry(cursor, entry)
+            return
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            for entry in entries:
+                self._write_entry(cursor, entry)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _begin_batch(self) -> None:
+        self._conn = sqlite3.connect(self.db_path)
+
+    def _end_batch(self) -> None:
+        conn, self._conn = self._conn, None
+        try:
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _abort_batch(self) -> None:
+        conn, self._conn = self._conn, None
+        try:
+            conn.rollback()
+        finally:
+            conn.close()
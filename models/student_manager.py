@@ -1,49 +1,159 @@
 import os
-import json
 import csv
-from typing import List, Dict, Optional, Tuple
-import pandas as pd
-from datetime import datetime
+import gzip
+import shutil
+from contextlib import contextmanager
+from itertools import groupby
+from typing import Iterable, List, Dict, Optional, Tuple, TYPE_CHECKING
+import numpy as np
+from datetime import datetime, timedelta
+from models.attendance_store import ColumnarAttendance, longest_false_runs
+from models.storage_backends import (
+    StorageBackend, JsonJournalBackend, SqliteBackend, set_entry, delete_entry
+)
+
+if TYPE_CHECKING:
+    # Only the report methods need pandas; they import it themselves
+    import pandas as pd
 
 class StudentManager:
-    def __init__(self, data_dir: str = None):
+    def __init__(self, data_dir: str = None, compact_every: int = 1000,
+                 backend: Optional[StorageBackend] = None):
         if data_dir is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             data_dir = os.path.join(base_dir, 'data')
             os.makedirs(data_dir, exist_ok=True)
 
         self.data_dir = data_dir
-        self.students_file = os.path.join(data_dir, 'students.json')
-        self.classes_file = os.path.join(data_dir, 'classes.json')
-        self.attendance_file = os.path.join(data_dir, 'attendance.json')
-        self.students = self._load_data(self.students_file, {})
-        self.classes = self._load_data(self.classes_file, {})
-        self.attendance = self._load_data(self.attendance_file, {})
-
+        # Where students, classes and attendance are persisted; reads are
+        # always served from the in-memory dicts below
+        self.backend = backend or JsonJournalBackend(data_dir, compact_every)
+        self.students, self.classes, self.attendance = self.backend.load()
+
+        # Secondary indexes, kept in step with every mutation
+        self._name_index: Dict[str, List[str]] = {}
+        self._class_students: Dict[str, set] = {}
+        self._student_classes: Dict[str, set] = {}
+        self._rebuild_indexes()
+
+        # Attendance log, one CSV per day; past days are gzipped
         self.attendance_log_file = os.path.join(data_dir, 'attendance_log.csv')
+        self.attendance_log_dir = os.path.join(data_dir, 'attendance_log')
         self._ensure_attendance_log_exists()
 
-    def _load_data(self, file_path: str, default: dict) -> dict:
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                print(f"Error reading {file_path}, creating new file")
-                return default
-        return default
-
-    def _save_data(self, data: dict, file_path: str) -> None:
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=4)
+    def _persist(self, *entries: Dict) -> None:
+        self.backend.write(list(entries))
+
+    def compact(self, background: bool = False) -> None:
+        self.backend.compact(background)
+
+    @contextmanager
+    def batch(self):
+        """Suppress per-mutation persistence and save once on exit.
+
+        Mutations inside the block only touch memory until the outermost
+        block exits (one compaction or one SQLite transaction). If it
+        exits with an exception nothing is saved and the in-memory state
+        is reloaded from the backend.
+        """
+        try:
+            with self.backend.batch():
+                yield self
+        except BaseException:
+            if not self.backend.in_batch:
+                self.students, self.classes, self.attendance = self.backend.load()
+                self._rebuild_indexes()
+            raise
+
+    def close(self) -> None:
+        self.backend.close()
+
+    def _rebuild_indexes(self) -> None:
+        self._name_index = {}
+        for student_id, data in self.students.items():
+            self._index_name(student_id, data['name'])
+        self._student_classes = {
+            student_id: set(data['class_ids'])
+            for student_id, data in self.students.items()
+        }
+        self._class_students = {
+            class_id: set(data['students'])
+            for class_id, data in self.classes.items()
+        }
+        self._attendance_columns = ColumnarAttendance.from_nested(self.attendance)
+
+    def _index_name(self, student_id: str, name: str) -> None:
+        self._name_index.setdefault(name.casefold(), []).append(student_id)
+
+    def _unindex_name(self, student_id: str, name: str) -> None:
+        ids = self._name_index.get(name.casefold(), [])
+        if student_id in ids:
+            ids.remove(student_id)
+        if not ids:
+            self._name_index.pop(name.casefold(), None)
 
     def _ensure_attendance_log_exists(self):
-        if not os.path.exists(self.attendance_log_file):
-            os.makedirs(os.path.dirname(self.attendance_log_file), exist_ok=True)
-            with open(self.attendance_log_file, 'w', newline='') as f:
-                writer = csv.writer(f)
+        os.makedirs(self.attendance_log_dir, exist_ok=True)
+
+        # Split a legacy single-file log into day partitions once; the
+        # log is chronological, so each day is one run written in one go
+        if os.path.exists(self.attendance_log_file):
+            with open(self.attendance_log_file, 'r', newline='') as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                rows = (row[:4] for row in reader if len(row) >= 4)
+                for date_str, day_rows in groupby(rows, key=lambda row: row[0]):
+                    self._append_attendance_rows(date_str, day_rows)
+            os.replace(self.attendance_log_file, self.attendance_log_file + '.migrated')
+
+        self.compress_attendance_log()
+
+    def _attendance_log_path(self, date_str: str, compressed: bool = False) -> str:
+        suffix = '.csv.gz' if compressed else '.csv'
+        return os.path.join(self.attendance_log_dir, date_str + suffix)
+
+    def _append_attendance_rows(self, date_str: str, rows: Iterable[List[str]]) -> bool:
+        """Append rows to one day partition; True if it was created."""
+        path = self._attendance_log_path(date_str)
+        is_new = not os.path.exists(path)
+        with open(path, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if is_new:
                 writer.writerow(['Date', 'Time', 'Student', 'Status'])
+            writer.writerows(rows)
+        return is_new
+
+    def _append_attendance_row(self, row: List[str]) -> None:
+        if self._append_attendance_rows(row[0], [row]):
+            self.compress_attendance_log()
+
+    def compress_attendance_log(self, keep_days: int = 1) -> None:
+        """Gzip plain day partitions older than the last keep_days days.
+
+        Today counts as one of them, so the default compresses every
+        past day.
+        """
+        cutoff = (datetime.now().date() - timedelta(days=keep_days - 1)).isoformat()
+        plain = sorted(
+            name for name in os.listdir(self.attendance_log_dir)
+            if name.endswith('.csv')
+        )
+        for name in plain:
+            date_str = name[:-len('.csv')]
+            if date_str >= cutoff:
+                continue
+            source = self._attendance_log_path(date_str)
+            target = self._attendance_log_path(date_str, compressed=True)
+            if os.path.exists(target):
+                # Late rows for an already compressed day: add a gzip member
+                with open(source, 'rb') as src, gzip.open(target, 'ab') as dst:
+                    src.readline()
+                    shutil.copyfileobj(src, dst)
+            else:
+                with open(source, 'rb') as src, gzip.open(target + '.tmp', 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                os.replace(target + '.tmp', target)
+            os.remove(source)
 
     def add_student(self, student_id: str, name: str, class_ids: List[str] = None) -> bool:
         if student_id in self.students:
@@ -54,14 +164,17 @@ class StudentManager:
             'class_ids': class_ids or [],
             'registration_date': datetime.now().isoformat()
         }
-        self._save_data(self.students, self.students_file)
+        self._index_name(student_id, name)
+        self._student_classes[student_id] = set(self.students[student_id]['class_ids'])
+        self._persist(set_entry('students', [student_id], self.students[student_id]))
         return True
 
     def get_student_by_name(self, name: str) -> Optional[str]:
-        for student_id, data in self.students.items():
-            if data['name'].lower() == name.lower():
-                return student_id
-        return None
+        student_ids = self._name_index.get(name.casefold())
+        return student_ids[0] if student_ids else None
+
+    def is_enrolled(self, student_id: str, class_id: str) -> bool:
+        return student_id in self._class_students.get(class_id, ())
 
     def add_class(self, class_id: str, name: str, subject: str, schedule: Dict[str, str], room: str) -> bool:
         if class_id in self.classes:
@@ -75,19 +188,24 @@ class StudentManager:
             'students': [],
             'creation_date': datetime.now().isoformat()
         }
-        self._save_data(self.classes, self.classes_file)
+        self._class_students[class_id] = set()
+        self._persist(set_entry('classes', [class_id], self.classes[class_id]))
         return True
 
     def add_student_to_class(self, student_id: str, class_id: str) -> bool:
-        if student_id not in self.students or class_id not in self.classes or student_id in self.classes[class_id]['students']:
+        if student_id not in self.students or class_id not in self.classes or self.is_enrolled(student_id, class_id):
             return False
 
         self.classes[class_id]['students'].append(student_id)
-        if class_id not in self.students[student_id]['class_ids']:
+        self._class_students[class_id].add(student_id)
+        if class_id not in self._student_classes[student_id]:
             self.students[student_id]['class_ids'].append(class_id)
+            self._student_classes[student_id].add(class_id)
 
-        self._save_data(self.classes, self.classes_file)
-        self._save_data(self.students, self.students_file)
+        self._persist(
+            set_entry('classes', [class_id], self.classes[class_id]),
+            set_entry('students', [student_id], self.students[student_id])
+        )
         return True
 
     def record_attendance(self, student_name: str, status: str = "Present") -> bool:
@@ -95,9 +213,7 @@ class StudentManager:
         date_str = now.strftime("%Y-%m-%d")
         time_str = now.strftime("%H:%M:%S")
 
-        with open(self.attendance_log_file, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([date_str, time_str, student_name, status])
+        self._append_attendance_row([date_str, time_str, student_name, status])
 
         student_id = self.get_student_by_name(student_name)
         if student_id and self.classes:
@@ -113,24 +229,50 @@ class StudentManager:
                 'status': status,
                 'check_in_time': time_str
             }
+            self._attendance_columns.record(class_id, date_str, student_id, status, time_str)
 
-            self._save_data(self.attendance, self.attendance_file)
+            self._persist(set_entry(
+                'attendance', [class_id, date_str, student_id],
+                self.attendance[class_id][date_str][student_id]
+            ))
 
         return True
 
-    def get_attendance_records(self) -> List[Tuple[str, str, str]]:
-        records = []
-
-        if os.path.exists(self.attendance_log_file):
-            with open(self.attendance_log_file, 'r') as f:
+    def iter_attendance_log(self, start_date: Optional[str] = None,
+                            end_date: Optional[str] = None):
+        """Stream (date, time, student, status) rows for a date range.
+
+        Only the day partitions inside the range are opened.
+        """
+        partitions = sorted(
+            name for name in os.listdir(self.attendance_log_dir)
+            if name.endswith(('.csv', '.csv.gz'))
+        )
+
+        for name in partitions:
+            date_str = name.split('.', 1)[0]
+            if start_date and date_str < start_date:
+                continue
+            if end_date and date_str > end_date:
+                break
+            path = os.path.join(self.attendance_log_dir, name)
+            opener = gzip.open if name.endswith('.gz') else open
+            with opener(path, 'rt', newline='') as f:
                 reader = csv.reader(f)
-                next(reader)
+                next(reader, None)
                 for row in reader:
                     if len(row) >= 4:
-                        date, time, student, status = row
-                        records.append((student, time, status))
+                        yield tuple(row[:4])
 
-        return records
+    def get_attendance_records(self, date: Optional[str] = None,
+                               start_date: Optional[str] = None,
+                               end_date: Optional[str] = None) -> List[Tuple[str, str, str]]:
+        if date:
+            start_date = end_date = date
+        return [
+            (student, time, status)
+            for _, time, student, status in self.iter_attendance_log(start_date, end_date)
+        ]
 
     def get_student_attendance(self, student_id: str, class_id: Optional[str] = None) -> Dict:
         attendance_records = {}
@@ -160,24 +302,55 @@ class StudentManager:
             return self.attendance[class_id].get(date, {})
         return self.attendance[class_id]
 
-    def generate_attendance_report(self, class_id: str, start_date: str, end_date: str) -> pd.DataFrame:
-        if class_id not in self.attendance:
+    def _student_names(self, student_ids: np.ndarray) -> np.ndarray:
+        unique_ids, inverse = np.unique(student_ids.astype(str), return_inverse=True)
+        names = np.array([
+            self.students.get(student_id, {}).get('name', 'Unknown')
+            for student_id in unique_ids
+        ], dtype=object)
+        return names[inverse]
+
+    def generate_attendance_report(self, class_id: str, start_date: str, end_date: str) -> 'pd.DataFrame':
+        import pandas as pd
+
+        rows = self._attendance_columns.select(class_id, start_date, end_date)
+        if not len(rows):
             return pd.DataFrame()
 
-        data = []
-        for date, attendance_data in self.attendance[class_id].items():
-            if start_date <= date <= end_date:
-                for student_id, status in attendance_data.items():
-                    student_name = self.students[student_id]['name']
-                    data.append({
-                        'Date': date,
-                        'Student ID': student_id,
-                        'Student Name': student_name,
-                        'Status': status['status'],
-                        'Check-in Time': status.get('check_in_time', 'N/A')
-                    })
-
-        return pd.DataFrame(data)
+        columns = self._attendance_columns.columns(rows)
+        return pd.DataFrame({
+            'Date': columns['date'],
+            'Student ID': columns['student_id'],
+            'Student Name': self._student_names(columns['student_id']),
+            'Status': columns['status'],
+            'Check-in Time': columns['check_in_time']
+        })
+
+    def generate_attendance_summary(self, class_id: str, start_date: str, end_date: str) -> 'pd.DataFrame':
+        """Per-student attendance rate and longest absence streak.
+
+        Sessions are the dates with any attendance recorded for the class;
+        enrolled students with no record count as absent.
+        """
+        import pandas as pd
+
+        rows = self._attendance_columns.select(class_id, start_date, end_date)
+        roster = self.classes.get(class_id, {}).get('students', [])
+        student_ids, presence = self._attendance_columns.presence_matrix(rows, roster)
+        if not student_ids:
+            return pd.DataFrame()
+
+        sessions = presence.shape[1]
+        attended = presence.sum(axis=1)
+        student_ids = np.array(student_ids, dtype=object)
+        return pd.DataFrame({
+            'Student ID': student_ids,
+            'Student Name': self._student_names(student_ids),
+            'Sessions': sessions,
+            'Attended': attended,
+            'Attendance Rate': attended / sessions if sessions else 0.0,
+            'Longest Absence Streak': longest_false_runs(presence)
+        })
 
     def get_all_students(self) -> Dict[str, Dict]:
         return self.students
@@ -196,11 +369,14 @@ class StudentManager:
             return False
 
         if name:
+            self._unindex_name(student_id, self.students[student_id]['name'])
             self.students[student_id]['name'] = name
+            self._index_name(student_id, name)
         if class_ids is not None:
             self.students[student_id]['class_ids'] = class_ids
+            self._student_classes[student_id] = set(class_ids)
 
-        self._save_data(self.students, self.students_file)
+        self._persist(set_entry('students', [student_id], self.students[student_id]))
         return True
 
     def update_class(self, class_id: str, name: str = None, subject: str = None, schedule: Dict[str, str] = None, room: str = None) -> bool:
@@ -216,35 +392,163 @@ class StudentManager:
         if room:
             self.classes[class_id]['room'] = room
 
-        self._save_data(self.classes, self.classes_file)
+        self._persist(set_entry('classes', [class_id], self.classes[class_id]))
         return True
 
     def remove_student(self, student_id: str) -> bool:
         if student_id not in self.students:
             return False
 
-        for class_id in self.students[student_id]['class_ids']:
+        entries = [delete_entry('students', [student_id])]
+        for class_id in self._student_classes.pop(student_id):
             if class_id in self.classes:
-                if student_id in self.classes[class_id]['students']:
+                if self.is_enrolled(student_id, class_id):
                     self.classes[class_id]['students'].remove(student_id)
+                    self._class_students[class_id].discard(student_id)
+                    entries.append(set_entry('classes', [class_id], self.classes[class_id]))
 
+        self._unindex_name(student_id, self.students[student_id]['name'])
         del self.students[student_id]
 
-        self._save_data(self.students, self.students_file)
-        self._save_data(self.classes, self.classes_file)
+        self._persist(*entries)
         return True
 
     def remove_class(self, class_id: str) -> bool:
         if class_id not in self.classes:
             return False
 
-        for student_id in self.classes[class_id]['students']:
+        entries = [delete_entry('classes', [class_id])]
+        for student_id in self._class_students.pop(class_id):
             if student_id in self.students:
-                if class_id in self.students[student_id]['class_ids']:
+                if class_id in self._student_classes[student_id]:
                     self.students[student_id]['class_ids'].remove(class_id)
+                    self._student_classes[student_id].discard(class_id)
+                    entries.append(set_entry('students', [student_id], self.students[student_id]))
 
         del self.classes[class_id]
 
-        self._save_data(self.students, self.students_file)
-        self._save_data(self.classes, self.classes_file)
+        self._persist(*entries)
         return True
+
+    def import_roster(self, csv_path: str) -> Dict[str, int]:
+        """Import students, classes and enrolments from a roster CSV.
+
+        Columns: student_id, student_name and optionally class_id,
+        class_name, subject, room (one row per enrolment). Empty class
+        cells are unspecified; only the given ones must match earlier
+        rows or an existing class. Every row is validated before
+        anything is changed; on any problem a ValueError listing all of
+        them is raised. Valid rosters are applied in one batch and
+        persisted once.
+        """
+        with open(csv_path, 'r', newline='') as f:
+            reader = csv.DictReader(f)
+            missing = {'student_id', 'student_name'} - set(reader.fieldnames or [])
+            if missing:
+                raise ValueError(f"Roster is missing columns: {', '.join(sorted(missing))}")
+            rows = list(reader)
+
+        errors = []
+        students: Dict[str, str] = {}
+        classes: Dict[str, Tuple[str, str, str]] = {}
+        enrolments = []
+
+        for line, row in enumerate(rows, start=2):
+            student_id = (row.get('student_id') or '').strip()
+            name = (row.get('student_name') or '').strip()
+            class_id = (row.get('class_id') or '').strip()
+
+            if not student_id or not name:
+                errors.append(f"line {line}: student_id and student_name are required")
+                continue
+            known_name = students.get(student_id) or self.students.get(student_id, {}).get('name')
+            if known_name and known_name != name:
+                errors.append(f"line {line}: student {student_id} is already named '{known_name}'")
+                continue
+            students[student_id] = name
+
+            if not class_id:
+                continue
+            # Empty cells mean "unspecified"; only given details must agree
+            details = tuple((row.get(key) or '').strip() for key in ('class_name', 'subject', 'room'))
+            known = classes.get(class_id)
+            if known is None and class_id in self.classes:
+                existing = self.classes[class_id]
+                known = (existing['name'], existing['subject'], existing['room'])
+            if known is not None and any(
+                    given and current and given != current
+                    for given, current in zip(details, known)):
+                errors.append(f"line {line}: class {class_id} details differ from earlier rows")
+                continue
+            if known is None and not details[0]:
+                errors.append(f"line {line}: new class {class_id} needs a class_name")
+                continue
+            classes[class_id] = tuple(
+                current or given for given, current in zip(details, known or details)
+            )
+            enrolments.append((student_id, class_id))
+
+        if errors:
+            raise ValueError("Invalid roster:\n" + "\n".join(errors))
+
+        summary = {'students': 0, 'classes': 0, 'enrolments': 0}
+        with self.batch():
+            for class_id, (name, subject, room) in classes.items():
+                if self.add_class(class_id, name, subject, {}, room):
+                    summary['classes'] += 1
+            for student_id, name in students.items():
+                if self.add_student(student_id, name):
+                    summary['students'] += 1
+            for student_id, class_id in enrolments:
+                if self.add_student_to_class(student_id, class_id):
+                    summary['enrolments'] += 1
+        return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Student roster tools")
+    parser.add_argument('--data-dir', default=None)
+    parser.add_argument('--db', default=None,
+                        help="Use the SQLite backend on this database file")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    roster_parser = subparsers.add_parser('import-roster', help="Bulk import a roster CSV")
+    roster_parser.add_argument('csv_path')
+    subparsers.add_parser('migrate-to-sqlite',
+                          help="Copy the JSON stores into the --db database")
+    args = parser.parse_args(argv)
+
+    if args.command == 'migrate-to-sqlite':
+        if not args.db:
+            parser.error("migrate-to-sqlite needs --db")
+        source = StudentManager(args.data_dir)
+        target = SqliteBackend(args.db)
+        entries = [set_entry('classes', [class_id], data) for class_id, data in source.classes.items()]
+        entries += [set_entry('students', [student_id], data) for student_id, data in source.students.items()]
+        entries += [
+            set_entry('attendance', [class_id, date_str, student_id], record)
+            for class_id, days in source.attendance.items()
+            for date_str, records in days.items()
+            for student_id, record in records.items()
+        ]
+        with target.batch():
+            target.write(entries)
+        print(f"Copied {len(source.students)} students, {len(source.classes)} classes "
+              f"and {len(entries) - len(source.students) - len(source.classes)} "
+              f"attendance records to {args.db}")
+        return 0
+
+    backend = SqliteBackend(args.db) if args.db else None
+    manager = StudentManager(args.data_dir, backend=backend)
+    try:
+        summary = manager.import_roster(args.csv_path)
+    except ValueError as e:
+        print(e)
+        return 1
+    print(f"Imported {summary['students']} students, {summary['classes']} classes "
+          f"and {summary['enrolments']} enrolments")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,20 @@
+import pytest
+
+from models.database import Database
+
+
+@pytest.fixture
+def database(tmp_path):
+    """A fresh Database in a temp directory, with its own archive dir."""
+    return Database(
+        str(tmp_path / "classroom.db"),
+        archive_dir=str(tmp_path / "archive")
+    )
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Empty StudentManager data directory."""
+    path = tmp_path / "data"
+    path.mkdir()
+    return str(path)
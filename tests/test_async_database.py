@@ -0,0 +1,67 @@
+import asyncio
+import sqlite3
+from contextlib import aclosing
+from datetime import date, datetime
+
+import pytest
+
+from models.async_database import AsyncDatabase
+
+
+def seed_behaviors(database, count):
+    database.add_student('s1', 'Ann', None, None, 'A')
+    database.add_class('C1', 'Maths', 'Algebra', 'R1', '{}')
+    start = datetime(2024, 3, 4, 10, 0)
+    for _ in range(count):
+        database.record_behavior('s1', 'C1', 'attentive', 0.9, start, start, 1.0)
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, timeout=10))
+
+
+def test_iter_behavior_data_streams_all_rows(database):
+    seed_behaviors(database, 25)
+
+    async def collect():
+        async with AsyncDatabase(database, max_connections=1) as db:
+            return [row async for row in db.iter_behavior_data(
+                date(2024, 3, 1), date(2024, 3, 31), chunk_size=4
+            )]
+
+    assert len(run(collect())) == 25
+
+
+def test_iter_behavior_data_reraises_reader_errors(database, monkeypatch):
+    seed_behaviors(database, 10)
+
+    def failing(start_date, end_date, chunk_size):
+        yield {'behavior_type': 'attentive'}
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(database, 'iter_behavior_data', failing)
+
+    async def collect():
+        async with AsyncDatabase(database, max_connections=1) as db:
+            return [row async for row in db.iter_behavior_data(
+                date(2024, 3, 1), date(2024, 3, 31), chunk_size=4
+            )]
+
+    with pytest.raises(sqlite3.OperationalError):
+        run(collect())
+
+
+def test_closed_iterator_releases_its_worker(database):
+    seed_behaviors(database, 50)
+
+    async def abandon_then_query():
+        async with AsyncDatabase(database, max_connections=1) as db:
+            async with aclosing(db.iter_behavior_data(
+                date(2024, 3, 1), date(2024, 3, 31), chunk_size=2
+            )) as rows:
+                async for _ in rows:
+                    break
+            # Would hang if the only worker were still held by the reader
+            return await db.get_student('s1')
+
+    assert run(abandon_then_query())['name'] == 'Ann'
@@ -0,0 +1,72 @@
+import numpy as np
+
+from models.attendance_store import ColumnarAttendance, longest_false_runs
+from models.student_manager import StudentManager
+
+
+def test_record_replaces_same_key_and_grows():
+    store = ColumnarAttendance(capacity=2)
+    store.record('C1', '2024-03-04', 's1', 'Late', '09:05:00')
+    store.record('C1', '2024-03-04', 's1', 'Present', '09:01:02')
+    store.record('C1', '2024-03-05', 's1', 'Absent')
+    store.record('C1', '2024-03-05', 's2', 'Present', '09:00:00')
+    store.record('C2', '2024-03-04', 's1', 'Present', '10:00:00')
+    assert store.size == 4
+
+    rows = store.select('C1', '2024-03-04', '2024-03-04')
+    columns = store.columns(rows)
+    assert list(columns['student_id']) == ['s1']
+    assert list(columns['status']) == ['Present']
+    assert list(columns['check_in_time']) == ['09:01:02']
+
+    columns = store.columns(store.select('C1', '2024-03-05', '2024-03-31'))
+    assert list(columns['check_in_time']) == ['N/A', '09:00:00']
+    assert len(store.select('C9', '2024-03-01', '2024-03-31')) == 0
+
+
+def test_presence_matrix_includes_roster_without_records():
+    store = ColumnarAttendance()
+    store.record('C1', '2024-03-04', 's1', 'Present')
+    store.record('C1', '2024-03-05', 's1', 'Absent')
+    store.record('C1', '2024-03-05', 's2', 'Late')
+
+    rows = store.select('C1', '2024-03-01', '2024-03-31')
+    student_ids, matrix = store.presence_matrix(rows, roster=['s1', 's3'])
+    assert student_ids == ['s1', 's2', 's3']
+    np.testing.assert_array_equal(matrix, [
+        [True, False],
+        [False, True],
+        [False, False],
+    ])
+
+
+def test_longest_false_runs():
+    matrix = np.array([
+        [True, False, False, True, False],
+        [False, False, False, False, False],
+        [True, True, True, True, True],
+    ])
+    np.testing.assert_array_equal(longest_false_runs(matrix), [2, 5, 0])
+    assert longest_false_runs(np.zeros((3, 0), dtype=bool)).tolist() == [0, 0, 0]
+
+
+def test_summary_report(data_dir):
+    manager = StudentManager(data_dir)
+    manager.add_class('C1', 'Maths', 'Algebra', {}, 'R1')
+    for student_id, name in (('s1', 'Ann'), ('s2', 'Bob')):
+        manager.add_student(student_id, name)
+        manager.add_student_to_class(student_id, 'C1')
+    manager.attendance = {'C1': {
+        '2024-03-04': {'s1': {'status': 'Present', 'check_in_time': '09:00:00'}},
+        '2024-03-05': {'s1': {'status': 'Late', 'check_in_time': '09:10:00'}},
+    }}
+    manager._rebuild_indexes()
+
+    report = manager.generate_attendance_report('C1', '2024-03-01', '2024-03-31')
+    assert list(report['Student Name']) == ['Ann', 'Ann']
+
+    summary = manager.generate_attendance_summary('C1', '2024-03-01', '2024-03-31')
+    by_id = summary.set_index('Student ID')
+    assert by_id.loc['s1', 'Attendance Rate'] == 1.0
+    assert by_id.loc['s2', 'Attended'] == 0
+    assert by_id.loc['s2', 'Longest Absence Streak'] == 2
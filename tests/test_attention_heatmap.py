@@ -0,0 +1,79 @@
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from models.attention_heatmap import AttentionHeatmap
+
+
+FRAME = (480, 640, 3)
+
+
+def seen(behavior, top, right, bottom, left):
+    return {'type': behavior, 'face_location': (top, right, bottom, left)}
+
+
+def test_add_counts_each_face_in_its_cell():
+    heatmap = AttentionHeatmap(rows=2, cols=2, behaviors=['attentive', 'distracted'])
+    heatmap.add([
+        seen('attentive', 10, 100, 110, 10),       # top left
+        seen('attentive', 20, 120, 120, 20),       # top left again
+        seen('distracted', 300, 600, 400, 500),    # bottom right
+        seen('unknown', 10, 100, 110, 10),         # not a tracked behavior
+    ], FRAME)
+
+    assert heatmap.observations == 3
+    # Repeated cells accumulate rather than overwrite
+    assert heatmap.counts[0, 0, 0] == 2
+    assert heatmap.counts[1, 1, 1] == 1
+
+
+def test_add_clips_faces_at_the_frame_edge():
+    heatmap = AttentionHeatmap(rows=2, cols=2, behaviors=['attentive'])
+    heatmap.add([seen('attentive', 470, 700, 520, 630)], FRAME)
+    assert heatmap.counts[1, 1, 0] == 1
+
+
+def test_attention_ratio_and_merge():
+    behaviors = ['attentive', 'hand_raised', 'distracted']
+    first = AttentionHeatmap(rows=1, cols=2, behaviors=behaviors)
+    first.add([
+        seen('attentive', 0, 100, 100, 0),
+        seen('distracted', 0, 100, 100, 0),
+    ], FRAME)
+    second = AttentionHeatmap(rows=1, cols=2, behaviors=behaviors)
+    second.add([seen('hand_raised', 0, 100, 100, 0)], FRAME)
+
+    first.merge(second)
+    ratio = first.attention_ratio()
+    assert ratio[0, 0] == pytest.approx(2 / 3)
+    assert np.isnan(ratio[0, 1])
+
+    with pytest.raises(ValueError):
+        first.merge(AttentionHeatmap(rows=2, cols=2, behaviors=behaviors))
+
+
+def test_render_size():
+    heatmap = AttentionHeatmap(rows=3, cols=4)
+    image = heatmap.render(cell_size=10)
+    assert image.shape == (30, 40, 3)
+    assert image.dtype == np.uint8
+
+
+def test_database_round_trip(database):
+    heatmap = AttentionHeatmap(rows=2, cols=3)
+    heatmap.add([seen('attentive', 0, 100, 100, 0)], FRAME)
+    started = datetime(2024, 3, 4, 9, 0)
+
+    assert database.save_attention_heatmap('C1_S1', 'C1', started, heatmap)
+    heatmap.add([seen('attentive', 0, 100, 100, 0)], FRAME)
+    # Saving the session again replaces its counts
+    assert database.save_attention_heatmap('C1_S1', 'C1', started, heatmap)
+
+    [record] = database.get_attention_heatmaps(date(2024, 3, 4), date(2024, 3, 4))
+    loaded = AttentionHeatmap.from_record(record)
+    assert record['session_id'] == 'C1_S1'
+    assert loaded.behaviors == heatmap.behaviors
+    np.testing.assert_array_equal(loaded.counts, heatmap.counts)
+
+    assert database.get_attention_heatmaps(date(2024, 3, 4), date(2024, 3, 4), 'C2') == []
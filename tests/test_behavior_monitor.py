@@ -0,0 +1,234 @@
+import time
+from datetime import datetime, timedelta
+
+import cv2
+import numpy as np
+import pytest
+
+from models.behavior_monitor import (
+    BehaviorIntervalBuilder, BehaviorMonitor, BehaviorOverlayRenderer, StudentHistory
+)
+from models.pose_estimator import BODY_PARTS, PoseFrame
+
+
+START = datetime(2024, 3, 4, 10, 0, 0)
+
+
+def observation(student_id, behavior, seconds, confidence=0.8):
+    return {
+        'student_id': student_id,
+        'type': behavior,
+        'confidence': confidence,
+        'timestamp': START + timedelta(seconds=seconds),
+    }
+
+
+def feed(builder, frames, class_id='C1'):
+    closed = []
+    for frame in frames:
+        closed.extend(builder.update(frame, class_id))
+    return closed
+
+
+def test_steady_behavior_becomes_one_interval():
+    builder = BehaviorIntervalBuilder(min_duration=3.0, max_gap=2.0)
+    assert feed(builder, [[observation('s1', 'attentive', t)] for t in range(6)]) == []
+
+    [interval] = builder.flush()
+    assert interval['behavior_type'] == 'attentive'
+    assert interval['class_id'] == 'C1'
+    assert interval['duration'] == 5.0
+    assert interval['confidence'] == pytest.approx(0.8)
+
+
+def test_short_flicker_is_absorbed():
+    builder = BehaviorIntervalBuilder(min_duration=3.0, max_gap=2.0)
+    frames = [[observation('s1', 'attentive', t)] for t in range(4)]
+    frames.append([observation('s1', 'inattentive', 4)])
+    frames += [[observation('s1', 'attentive', t)] for t in range(5, 8)]
+    assert feed(builder, frames) == []
+
+    [interval] = builder.flush()
+    assert interval['behavior_type'] == 'attentive'
+    assert interval['duration'] == 7.0
+
+
+def test_persistent_change_closes_previous_interval():
+    builder = BehaviorIntervalBuilder(min_duration=3.0, max_gap=2.0)
+    frames = [[observation('s1', 'attentive', t)] for t in range(5)]
+    frames += [[observation('s1', 'sleeping', t)] for t in range(5, 9)]
+    [closed] = feed(builder, frames)
+    assert closed['behavior_type'] == 'attentive'
+    assert closed['end_time'] == START + timedelta(seconds=4)
+
+    [interval] = builder.flush()
+    assert interval['behavior_type'] == 'sleeping'
+
+
+def test_student_leaving_closes_interval():
+    builder = BehaviorIntervalBuilder(min_duration=3.0, max_gap=2.0)
+    frames = [[observation('s1', 'attentive', t), observation('s2', 'attentive', t)]
+              for t in range(4)]
+    frames += [[observation('s2', 'attentive', t)] for t in range(4, 8)]
+    [closed] = feed(builder, frames)
+    assert closed['student_id'] == 's1'
+    assert builder.flush()[0]['student_id'] == 's2'
+
+
+class FakeCascade:
+    """Stands in for the Haar cascades: always finds two eyes."""
+
+    def __init__(self, path=None):
+        pass
+
+    def detectMultiScale(self, image, **kwargs):
+        return np.array([[10, 10, 20, 20], [50, 10, 20, 20]])
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    monkeypatch.setattr(cv2, 'CascadeClassifier', FakeCascade, raising=False)
+    monitor = BehaviorMonitor()
+    monitor.set_active_class('C1')
+    return monitor
+
+
+def classify(monitor, student_id, shift, seconds):
+    """Type of a student seen again shifted by shift px after seconds."""
+    box = (100, 200, 200, 100)
+    monitor._classify_batch([student_id], [box], np.array([2]), START)
+    moved = (box[0], box[1] + shift, box[2], box[3] + shift)
+    [behavior] = monitor._classify_batch(
+        [student_id], [moved], np.array([2]), START + timedelta(seconds=seconds)
+    )
+    return behavior['type']
+
+
+def test_head_movement_is_judged_per_frame(monitor):
+    # 40 px between consecutive frames is a sharp turn
+    assert classify(monitor, 's1', 40, 1 / 30) == 'inattentive'
+    # The same drift over a second-long round-robin gap is not
+    assert classify(monitor, 's2', 40, 1.0) == 'attentive'
+    assert classify(monitor, 's3', 1200, 1.0) == 'inattentive'
+
+
+def pose_at(points, age=0.0):
+    """PoseFrame for a 640x480 frame with parts at (x, y) frame pixels.
+
+    The maps have one cell per 10 px, as the network's output would.
+    """
+    maps = np.zeros((len(BODY_PARTS), 48, 64), dtype=np.float32)
+    for part, (x, y) in points.items():
+        maps[BODY_PARTS[part], y // 10, x // 10] = 0.8
+    return PoseFrame(maps, (640, 480), time.monotonic() - age)
+
+
+FACE = (100, 300, 200, 200)   # 100 px face, top right bottom left
+UPRIGHT = {'Nose': (250, 150), 'Neck': (250, 225),
+           'RShoulder': (200, 235), 'LShoulder': (300, 235)}
+
+
+def pose_type(monitor, pose, student_id='s1'):
+    monitor.on_pose(pose)
+    [behavior] = monitor._classify_batch([student_id], [FACE], np.array([2]), START)
+    return behavior
+
+
+def test_wrist_above_shoulder_is_a_raised_hand(monitor):
+    behavior = pose_type(monitor, pose_at({
+        **UPRIGHT, 'RWrist': (170, 65), 'LWrist': (310, 330)
+    }))
+    assert behavior['type'] == 'hand_raised'
+    assert behavior['confidence'] == pytest.approx(0.8)
+
+
+def test_bowed_head_over_joined_hands_is_phone_use(monitor):
+    behavior = pose_type(monitor, pose_at({
+        **UPRIGHT, 'Nose': (250, 195), 'Neck': (250, 215),
+        'RWrist': (245, 305), 'LWrist': (265, 305)
+    }))
+    assert behavior['type'] == 'using_phone'
+
+    # The same hands with the head up are not
+    assert pose_type(monitor, pose_at({
+        **UPRIGHT, 'RWrist': (245, 305), 'LWrist': (265, 305)
+    }), 's2')['type'] == 'attentive'
+
+
+def test_stale_pose_is_ignored(monitor):
+    raised = {**UPRIGHT, 'RWrist': (170, 65)}
+    assert pose_type(monitor, pose_at(raised, age=monitor.pose_max_age + 1))['type'] == 'attentive'
+
+
+def test_analyze_frame_needs_an_active_class(monitor):
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    students = [{'id': 's1', 'face_location': (100, 200, 200, 100)}]
+    assert [b['type'] for b in monitor.analyze_frame(frame, students)] == ['attentive']
+
+    monitor.set_active_class(None)
+    assert monitor.analyze_frame(frame, students) == []
+
+
+def test_history_keeps_only_the_latest_samples():
+    history = StudentHistory(capacity=3, max_students=4)
+    [slot] = history.slots_for(['s1'])
+    for t in range(5):
+        history.append(np.array([slot]), float(t), np.array([[t, t]]),
+                       np.array([0.3]), np.array([t % 2]))
+
+    window = history.window('s1')
+    assert window['timestamps'].tolist() == [2.0, 3.0, 4.0]
+    assert window['codes'].tolist() == [0, 1, 0]
+    assert history.window('s1', seconds=1)['timestamps'].tolist() == [3.0, 4.0]
+
+    centres, timestamps = history.latest_centres(np.array([slot]))
+    assert centres.tolist() == [[4.0, 4.0]] and timestamps.tolist() == [4.0]
+
+
+def test_history_evicts_expired_and_least_recent():
+    history = StudentHistory(capacity=4, max_students=2, ttl=10.0)
+    slots = history.slots_for(['s1', 's2'])
+    history.append(slots, 0.0, np.zeros((2, 2)), np.zeros(2), np.zeros(2))
+
+    # Full: s1 was seen least recently and gives up its slot
+    [slot] = history.slots_for(['s3'])
+    assert 's1' not in history and slot == slots[0]
+    assert not len(history.window('s3')['timestamps'])
+    centres, _ = history.latest_centres(np.array([slot]))
+    assert np.isnan(centres).all()
+
+    history.append(np.array([slot]), 8.0, np.zeros((1, 2)), np.zeros(1), np.zeros(1))
+    assert history.evict_expired(now=15.0) == ['s2']
+    assert len(history) == 1
+
+
+def test_overlay_frames_are_throttled_and_need_a_viewer():
+    renderer = BehaviorOverlayRenderer(max_fps=10)
+    assert not renderer.frame_due(now=0.0)
+
+    renderer.viewer_attached = True
+    assert renderer.frame_due(now=0.0)
+    assert not renderer.frame_due(now=0.05)
+    assert renderer.frame_due(now=0.1)
+
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    behaviors = [{'face_location': (20, 80, 80, 20), 'type': 'attentive', 'confidence': 0.9}]
+    assert renderer.render(frame, behaviors) is frame
+    assert frame.any()
+
+
+def test_eye_boxes_map_back_from_the_canonical_roi(monitor):
+    seen = []
+    monitor.eye_cascade.detectMultiScale = (
+        lambda roi, **kwargs: seen.append(roi.shape) or FakeCascade().detectMultiScale(roi)
+    )
+    gray = np.zeros((480, 640), dtype=np.uint8)
+
+    # A 192 px face is searched at half scale in its upper 60%
+    eyes = monitor.detect_eyes(gray, (100, 292, 292, 100))
+    assert seen == [(58, 96)]
+    assert eyes.tolist() == [[120, 120, 40, 40], [200, 120, 40, 40]]
+
+    # Faces clipped to almost nothing are skipped
+    assert monitor.detect_eyes(gray, (-50, 640, 2, 630)).shape == (0, 4)
+    assert len(seen) == 1
@@ -0,0 +1,337 @@
+import os
+import sqlite3
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+from models.database import Database
+
+
+def attendance_rows(database):
+    conn = sqlite3.connect(database.db_path)
+    try:
+        return conn.execute(
+            "SELECT student_id, class_id, session_id, timestamp "
+            "FROM attendance ORDER BY id"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def session(check_in_times, session_id="C1_S1", students=None):
+    return {
+        'class_id': 'C1',
+        'session_id': session_id,
+        'date': date(2024, 3, 4),
+        'students': students or list(check_in_times),
+        'check_in_times': check_in_times,
+    }
+
+
+def test_record_attendance_enforces_cooldown(database):
+    assert database.record_attendance('s1', 'C1')
+    assert not database.record_attendance('s1', 'C1')
+    # Other classes and students have their own cooldown
+    assert database.record_attendance('s1', 'C2')
+    assert database.record_attendance('s2', 'C1')
+    assert len(attendance_rows(database)) == 3
+
+
+def test_save_attendance_upserts_session(database):
+    first = datetime(2024, 3, 4, 9, 0, tzinfo=timezone.utc)
+    assert database.save_attendance(session({'s1': first, 's2': first}))
+    assert database.save_attendance(
+        session({'s1': first + timedelta(minutes=1), 's2': first})
+    )
+
+    rows = attendance_rows(database)
+    assert len(rows) == 2
+    assert rows[0] == ('s1', 'C1', 'C1_S1', '2024-03-04 09:01:00')
+
+
+def test_save_attendance_feeds_cooldown(database):
+    now = datetime.now(timezone.utc)
+    assert database.save_attendance(session({'s1': now}))
+
+    # A GUI check-in blocks an immediate ad-hoc one, and vice versa
+    assert not database.record_attendance('s1', 'C1')
+    assert database.record_attendance('s2', 'C1')
+    assert database.save_attendance(session({'s2': now}, session_id="C1_S2"))
+    assert len(attendance_rows(database)) == 2
+
+
+def test_older_checkins_do_not_reset_cooldown(database):
+    assert database.record_attendance('s1', 'C1')
+    # No check_in_times: the session date (midnight) is used
+    assert database.save_attendance({
+        'class_id': 'C1',
+        'session_id': 'X',
+        'date': datetime.now(timezone.utc).date() - timedelta(days=1),
+        'students': ['s1'],
+        'check_in_times': {},
+    })
+    # A backfill of a past session
+    assert database.save_attendance(
+        session({'s1': datetime(2024, 3, 4, 9, 0, tzinfo=timezone.utc)})
+    )
+
+    assert not database.record_attendance('s1', 'C1')
+    assert database._last_checkin[('s1', 'C1')][1] is None
+    assert len(attendance_rows(database)) == 3
+
+
+def test_check_in_times_are_stored_as_utc(database):
+    local = datetime(2024, 3, 4, 9, 0, tzinfo=timezone(timedelta(hours=2)))
+    database.save_attendance(session({'s1': local}))
+    assert attendance_rows(database)[0][3] == '2024-03-04 07:00:00'
+
+
+def test_checkin_cache_survives_reopen(database):
+    assert database.record_attendance('s1', 'C1')
+    reopened = Database(
+        database.db_path, reset=False, archive_dir=database.archive_dir
+    )
+    assert not reopened.record_attendance('s1', 'C1')
+
+
+# Tables as created before this series (no session_id, status or templates)
+ORIGINAL_SCHEMA = """
+    CREATE TABLE students (
+        id TEXT PRIMARY KEY, name TEXT NOT NULL, class_name TEXT NOT NULL,
+        face_encoding BLOB, face_image_path TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE classes (
+        id TEXT PRIMARY KEY, name TEXT NOT NULL, subject TEXT NOT NULL,
+        room TEXT NOT NULL, schedule TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE class_students (
+        class_id TEXT, student_id TEXT,
+        joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (class_id, student_id)
+    );
+    CREATE TABLE attendance (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, student_id TEXT, class_id TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE behaviors (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, student_id TEXT, class_id TEXT,
+        behavior_type TEXT NOT NULL, confidence REAL, start_time TIMESTAMP,
+        end_time TIMESTAMP, duration REAL
+    );
+"""
+
+
+def original_file(tmp_path):
+    path = str(tmp_path / "original.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(ORIGINAL_SCHEMA)
+    conn.execute(
+        "INSERT INTO attendance (student_id, class_id, timestamp) "
+        "VALUES ('s1', 'C1', '2024-03-01 09:00:00')"
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_original_schema_is_migrated_in_place(tmp_path):
+    path = original_file(tmp_path)
+    database = Database(path, reset=False, archive_dir=str(tmp_path / "archive"))
+
+    assert database.record_attendance('s1', 'C1')
+    first = datetime(2024, 3, 4, 9, 0, tzinfo=timezone.utc)
+    assert database.save_attendance(session({'s2': first}))
+    assert database.save_attendance(session({'s2': first + timedelta(minutes=1)}))
+
+    rows = attendance_rows(database)
+    assert rows[0] == ('s1', 'C1', None, '2024-03-01 09:00:00')
+    assert [row[:3] for row in rows[1:]] == [('s1', 'C1', None), ('s2', 'C1', 'C1_S1')]
+    assert rows[2][3] == '2024-03-04 09:01:00'
+
+    # Opening the migrated file again leaves it as it is
+    Database(path, reset=False, archive_dir=database.archive_dir)
+    assert len(attendance_rows(database)) == 3
+
+
+def test_registered_encodings_become_templates(tmp_path):
+    path = original_file(tmp_path)
+    encoding = np.arange(128, dtype=np.float64) / 128
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO students (id, name, class_name, face_encoding) VALUES (?, ?, ?, ?)",
+        [('s1', 'Ann', 'A', encoding.tobytes()), ('s2', 'Bob', 'A', None)]
+    )
+    conn.commit()
+    conn.close()
+
+    database = Database(path, reset=False, archive_dir=str(tmp_path / "archive"))
+    assert database.identify_student(encoding)['id'] == 's1'
+    [template] = database.get_face_templates('s1')
+    assert template['source'] == 'registration'
+    assert database.get_face_templates('s2') == []
+
+    # Students that already have templates are left alone
+    Database(path, reset=False, archive_dir=database.archive_dir)
+    assert len(database.get_face_templates('s1')) == 1
+
+
+def seed_class(database):
+    database.add_student('s1', 'Ann', b'\0' * 1024, 'faces/s1.jpg', 'A')
+    database.add_class('C1', 'Maths', 'Algebra', 'R1', '{}')
+    database.enroll_student('C1', 's1')
+
+
+def test_snapshot_copies_only_analytics_tables(database):
+    seed_class(database)
+    now = datetime.now()
+    database.record_attendance('s1', 'C1')
+    database.record_behavior('s1', 'C1', 'attentive', 0.9, now, now, 3.0)
+
+    summary = database.get_behavior_summary(now.date(), now.date(), snapshot=True)
+    assert [row['observations'] for row in summary] == [1]
+
+    tables = {
+        row[0] for row in database._snapshot_conn.execute(
+            "SELECT name FROM main.sqlite_master WHERE type = 'table'"
+        )
+    }
+    assert 'behaviors' not in tables and 'face_templates' not in tables
+    columns = [
+        row[1] for row in database._snapshot_conn.execute(
+            "PRAGMA main.table_info(students)"
+        )
+    ]
+    assert 'face_encoding' not in columns
+
+    # Raw-row reports still work on the snapshot through the live file
+    assert len(database.get_behavior_data(now.date(), now.date(), snapshot=True)) == 1
+    assert len(database.get_attendance_data(now.date(), now.date(), snapshot=True)) == 1
+    database.close_analytics_snapshot()
+
+
+def test_template_matrix_tracks_template_changes(database):
+    seed_class(database)
+    ids, templates = database.load_template_matrix()
+    assert list(ids) == ['s1'] and templates.shape == (1, 128)
+
+    template_id = database.add_face_template('s1', np.ones(128))
+    assert len(database.load_template_matrix()[0]) == 2
+    database.delete_face_template(template_id)
+    assert len(database.load_template_matrix()[0]) == 1
+
+
+def test_template_matrix_not_cached_when_invalidated_mid_load(database, monkeypatch):
+    seed_class(database)
+    connect = sqlite3.connect
+
+    def racing_connect(*args, **kwargs):
+        # A template write lands while the loader is reading
+        monkeypatch.setattr(sqlite3, 'connect', connect)
+        database._invalidate_templates()
+        return connect(*args, **kwargs)
+
+    monkeypatch.setattr(sqlite3, 'connect', racing_connect)
+    ids, _ = database.load_template_matrix()
+    assert list(ids) == ['s1']
+    assert database._template_matrix is None
+
+
+def add_behaviors(database, *days):
+    for day in days:
+        start = datetime.combine(day, datetime.min.time()).replace(hour=10)
+        database.record_behavior('s1', 'C1', 'attentive', 0.9, start, start, 2.0)
+
+
+def daily_observations(database):
+    conn = sqlite3.connect(database.db_path)
+    try:
+        return dict(conn.execute(
+            "SELECT day, observations FROM behavior_daily ORDER BY day"
+        ).fetchall())
+    finally:
+        conn.close()
+
+
+def test_refresh_rollups_folds_only_new_rows(database):
+    seed_class(database)
+    add_behaviors(database, date(2024, 1, 15), date(2024, 1, 15))
+    assert database.refresh_rollups()
+    assert database.refresh_rollups()
+    assert daily_observations(database) == {'2024-01-15': 2}
+
+    add_behaviors(database, date(2024, 1, 15), date(2024, 1, 16))
+    database.record_attendance('s1', 'C1')
+    assert database.refresh_rollups()
+    assert daily_observations(database) == {'2024-01-15': 3, '2024-01-16': 1}
+    summary = database.get_attendance_summary(date.min, date.max)
+    assert [row['checkins'] for row in summary] == [1]
+
+
+def test_rotation_keeps_rollups_and_streams_every_partition(database):
+    seed_class(database)
+    add_behaviors(
+        database, date(2024, 1, 15), date(2024, 2, 10), date(2024, 2, 11),
+        date.today()
+    )
+
+    assert database.rotate_behaviors(keep_months=1) == 3
+    assert sorted(os.listdir(database.archive_dir)) == [
+        'behaviors_2024_01.db', 'behaviors_2024_02.db'
+    ]
+    assert sum(daily_observations(database).values()) == 4
+
+    # Partitions are paged separately, oldest first, hot table last
+    rows = list(database.iter_behavior_data(
+        date(2024, 1, 1), date.today(), chunk_size=1
+    ))
+    assert [row['start_time'][:10] for row in rows] == [
+        '2024-01-15', '2024-02-10', '2024-02-11', date.today().isoformat()
+    ]
+    assert len(database.get_behavior_data(date(2024, 2, 1), date(2024, 2, 29))) == 2
+
+    assert database.rebuild_rollups()
+    assert sum(daily_observations(database).values()) == 4
+
+
+def test_rotation_never_drops_rows_on_id_collision(database):
+    seed_class(database)
+    add_behaviors(database, date(2024, 1, 15))
+    assert database.rotate_behaviors(keep_months=1) == 1
+
+    # A reset file starts ids again from 1
+    reset = Database(database.db_path, archive_dir=database.archive_dir)
+    seed_class(reset)
+    add_behaviors(reset, date(2024, 1, 20))
+    assert reset.rotate_behaviors(keep_months=1) == 0
+
+    assert len(reset.get_behavior_data(date(2024, 1, 20), date(2024, 1, 20))) == 1
+    archived = list(reset.iter_behavior_data(date(2024, 1, 1), date(2024, 1, 31)))
+    assert [row['start_time'][:10] for row in archived] == ['2024-01-15', '2024-01-20']
+
+
+def test_rebuild_rollups_is_atomic(database):
+    seed_class(database)
+    add_behaviors(database, date(2024, 1, 15), date.today())
+    database.rotate_behaviors(keep_months=1)
+    before = daily_observations(database)
+
+    with open(os.path.join(database.archive_dir, 'behaviors_2099_01.db'), 'wb') as f:
+        f.write(b'not a database' * 100)
+
+    assert not database.rebuild_rollups()
+    assert daily_observations(database) == before
+
+
+def test_keyset_iterators_return_every_row_once(database):
+    for i in range(7):
+        database.add_student(f's{i}', f'Student {i}', None, None, 'A')
+        database.record_attendance(f's{i}', 'C1')
+
+    students = list(database.iter_students(chunk_size=3))
+    assert [s['id'] for s in students] == [f's{i}' for i in range(7)]
+    assert 'face_encoding' not in students[0]
+
+    records = list(database.iter_attendance_records(chunk_size=2))
+    assert sorted(r['student_id'] for r in records) == [f's{i}' for i in range(7)]
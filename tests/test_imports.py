@@ -0,0 +1,20 @@
+import importlib.util
+
+import pytest
+
+from benchmarks.import_time import HEAVY, MODULES, measure
+
+
+@pytest.mark.parametrize('module', list(MODULES))
+def test_attendance_path_import_is_light_and_fast(module):
+    if module.startswith('gui.') and importlib.util.find_spec('PyQt5') is None:
+        pytest.skip('PyQt5 is not installed')
+    budget_us = MODULES[module] * 1000
+
+    # Best of a few runs, so one slow interpreter start is not a failure
+    for _ in range(3):
+        cumulative, imported = measure(module)
+        assert not imported & HEAVY
+        if cumulative <= budget_us:
+            break
+    assert cumulative <= budget_us, f"{module} took {cumulative / 1000:.1f} ms"
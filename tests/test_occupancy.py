@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from models.occupancy import OccupancyMonitor, PowerMode
+
+
+def blank(value=0):
+    return np.full((240, 320, 3), value, dtype=np.uint8)
+
+
+@pytest.fixture
+def monitor():
+    monitor = OccupancyMonitor(idle_after=10.0, idle_detection_interval=5.0)
+    # Pin the clock so the tests pass explicit times
+    monitor._mode_since = monitor._last_face = monitor._last_idle_check = 0.0
+    return monitor
+
+
+def test_goes_idle_after_no_faces(monitor):
+    monitor.report_faces(0, now=9.0)
+    assert monitor.mode is PowerMode.ACTIVE
+    monitor.report_faces(0, now=10.0)
+    assert monitor.mode is PowerMode.IDLE
+    assert monitor.interval_ms == monitor.idle_interval_ms
+
+
+def test_idle_runs_periodic_full_pass(monitor):
+    monitor.report_faces(0, now=10.0)
+    assert monitor.should_process(blank(), now=11.0) is False   # motion reference
+    assert monitor.should_process(blank(), now=12.0) is False
+    assert monitor.should_process(blank(), now=15.0) is True
+    assert monitor.should_process(blank(), now=16.0) is False
+    assert monitor.mode is PowerMode.IDLE
+
+
+def test_motion_or_face_wakes_up(monitor):
+    monitor.report_faces(0, now=10.0)
+    monitor.should_process(blank(), now=11.0)
+    assert monitor.should_process(blank(255), now=12.0) is True
+    assert monitor.mode is PowerMode.ACTIVE
+
+    monitor.report_faces(0, now=22.0)
+    assert monitor.mode is PowerMode.IDLE
+    monitor.report_faces(2, now=23.0)
+    assert monitor.mode is PowerMode.ACTIVE
+    assert monitor.switches == 4
+
+
+def test_time_in_mode(monitor):
+    monitor.report_faces(0, now=10.0)
+    monitor.report_faces(1, now=40.0)
+    assert monitor.time_in_mode(now=45.0) == {
+        'active': pytest.approx(15.0),
+        'idle': pytest.approx(30.0),
+    }
@@ -0,0 +1,40 @@
+from models.pipeline_scheduler import PipelineScheduler, RoundRobinBudget
+
+
+def test_budget_reaches_every_student_within_latency():
+    budget = RoundRobinBudget(max_latency=1.0)
+    students = [f's{i}' for i in range(40)]
+    assert budget.per_tick(40, 5.0) == 8
+
+    served = [budget.select(students, 5.0) for _ in range(5)]
+    assert all(len(tick) == 8 for tick in served)
+    assert sorted(sum(served, [])) == sorted(students)
+    # The next round starts again with the longest waiting
+    assert budget.select(students, 5.0) == served[0]
+
+
+def test_budget_serves_newcomers_first_and_forgets_leavers():
+    budget = RoundRobinBudget(max_latency=1.0)
+    budget.select(['a', 'b', 'c', 'd'], 2.0)
+    assert budget.select(['b', 'c', 'd', 'new'], 2.0) == ['new', 'c']
+    assert 'a' not in budget._queue
+
+
+def test_stages_run_at_their_own_rates():
+    scheduler = PipelineScheduler({'detection': 10.0, 'recognition': 1.0})
+    ticks = [i / 30 for i in range(90)]  # three seconds of 30 Hz frames
+    detections = sum(scheduler.due('detection', now) for now in ticks)
+    recognitions = sum(scheduler.due('recognition', now) for now in ticks)
+    assert detections == 30
+    assert recognitions == 3
+
+    scheduler.set_rate('pose', 0)
+    assert not scheduler.due('pose', 10.0)
+
+
+def test_select_students_keeps_student_dicts():
+    scheduler = PipelineScheduler({'behavior': 5.0})
+    students = [{'id': f's{i}', 'face_location': (i, i, i, i)} for i in range(10)]
+    chosen = scheduler.select_students(students)
+    assert len(chosen) == 2
+    assert all(student in students for student in chosen)
@@ -0,0 +1,130 @@
+import threading
+from collections import deque
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from models.action_recognition import ActionRecognizer
+from models.pose_estimator import BODY_PARTS, PoseEstimator, PoseFrame
+
+
+PARTS = len(BODY_PARTS)
+
+
+def heatmaps(peaks, rows=46, cols=46, value=0.9):
+    """Maps with a single peak per listed part: {part: (row, col)}."""
+    maps = np.zeros((PARTS, rows, cols), dtype=np.float32)
+    for part, (row, col) in peaks.items():
+        maps[part, row, col] = value
+    return maps
+
+
+class FakeNet:
+    """cv2.dnn net stand-in; forward() blocks until released."""
+
+    def __init__(self, output):
+        self.output = output
+        self.release = threading.Event()
+        self.calls = 0
+
+    def setInput(self, blob):
+        pass
+
+    def forward(self):
+        self.release.wait(5)
+        self.calls += 1
+        return self.output
+
+
+@pytest.fixture
+def estimator(tmp_path):
+    estimator = PoseEstimator(model_path=str(tmp_path / 'missing.pb'))
+    yield estimator
+    estimator.close()
+
+
+def test_keypoints_whole_frame_and_region():
+    pose = PoseFrame(heatmaps({0: (10, 20), 1: (40, 5)}), (460, 460), 0.0)
+
+    points = pose.keypoints()
+    assert points.shape == (PARTS, 3)
+    assert points[0] == pytest.approx([20.5 / 46, 10.5 / 46, 0.9])
+    assert points[1] == pytest.approx([5.5 / 46, 40.5 / 46, 0.9])
+    assert not points[2:].any()
+
+    # Region covers the nose peak only, in frame pixels (top, right, bottom, left)
+    points = pose.keypoints(region=(50, 300, 200, 150))
+    assert points[0] == pytest.approx([20.5 / 46, 10.5 / 46, 0.9])
+    assert not points[1].any()
+
+
+def test_unavailable_model_does_nothing(estimator):
+    frame = np.zeros((60, 80, 3), dtype=np.uint8)
+    assert not estimator.available
+    assert estimator.estimate(frame) is None
+    assert not estimator.estimate_async(frame)
+
+
+def test_estimate_async_publishes_and_drops_busy_frames(estimator):
+    output = heatmaps({0: (3, 4)})[np.newaxis]
+    estimator.net = FakeNet(output)
+    received = []
+    estimator.subscribe(received.append)
+    frame = np.zeros((60, 80, 3), dtype=np.uint8)
+
+    assert estimator.estimate_async(frame)
+    # The first pass is still blocked in forward(), so this one is dropped
+    assert not estimator.estimate_async(frame)
+
+    estimator.net.release.set()
+    estimator._pending.result(5)
+    assert estimator.net.calls == 1
+    [pose] = received
+    assert estimator.latest is pose
+    assert (pose.frame_width, pose.frame_height) == (80, 60)
+
+    assert estimator.estimate_async(frame)
+    estimator.close()
+    assert estimator.net.calls == 2
+    assert len(received) == 2
+
+
+def test_action_features_keep_legacy_scaling():
+    # Maps are 46x46 for a 92x92 frame: the peak is located on the map
+    # resized to the frame, then divided by the map size, as the saved
+    # action models expect
+    pose = PoseFrame(heatmaps({0: (10, 20)}), (92, 92), 0.0)
+    recognizer = SimpleNamespace(threshold=0.2)
+
+    features = ActionRecognizer.pose_features(recognizer, pose).reshape(PARTS, 3)
+    x, y, confidence = features[0]
+    assert 40 / 46 <= x <= 41 / 46
+    assert 20 / 46 <= y <= 21 / 46
+    assert 0.2 < confidence <= 0.9
+    assert not features[1:].any()
+
+
+def test_live_poses_are_featurized_only_on_demand(monkeypatch):
+    # Built without __init__, which needs TensorFlow
+    recognizer = ActionRecognizer.__new__(ActionRecognizer)
+    recognizer.sequence_length = 2
+    recognizer.threshold = 0.2
+    recognizer.live_poses = deque(maxlen=2)
+    calls = []
+    featurize = ActionRecognizer.pose_features
+    monkeypatch.setattr(
+        ActionRecognizer, 'pose_features',
+        lambda self, pose: calls.append(pose) or featurize(self, pose)
+    )
+
+    poses = [PoseFrame(heatmaps({0: (t, t)}), (92, 92), float(t)) for t in range(3)]
+    recognizer.on_pose(poses[0])
+    assert recognizer.live_sequence() is None
+    recognizer.on_pose(poses[1])
+    recognizer.on_pose(poses[2])
+    assert calls == []
+
+    sequence = recognizer.live_sequence()
+    assert sequence.shape == (2, PARTS * 3)
+    assert calls == poses[1:]
@@ -0,0 +1,139 @@
+import sqlite3
+import time
+
+import pytest
+
+from models.storage_backends import (
+    SqliteBackend, StorageBackend, delete_entry, set_entry
+)
+from models.student_manager import StudentManager
+
+
+def test_incomplete_backend_fails_at_construction():
+    class LoadOnly(StorageBackend):
+        def load(self):
+            return {}, {}, {}
+
+    with pytest.raises(TypeError):
+        LoadOnly()
+
+
+def test_sqlite_backend_round_trips_through_student_manager(data_dir, tmp_path):
+    db_path = str(tmp_path / "classroom.db")
+    manager = StudentManager(data_dir, backend=SqliteBackend(db_path))
+    manager.add_class('C1', 'Maths', 'Algebra', {'mon': '09:00'}, 'R1')
+    manager.add_student('s1', 'Ann')
+    manager.add_student_to_class('s1', 'C1')
+    manager.record_attendance('Ann', 'Late')
+
+    reloaded = StudentManager(data_dir, backend=SqliteBackend(db_path))
+    assert reloaded.classes['C1']['schedule'] == {'mon': '09:00'}
+    assert reloaded.classes['C1']['students'] == ['s1']
+    assert reloaded.students['s1']['class_ids'] == ['C1']
+    [day] = reloaded.attendance['C1'].values()
+    assert day['s1']['status'] == 'Late'
+
+
+@pytest.fixture
+def local_tz(monkeypatch):
+    """Run with local time five and a half hours ahead of UTC."""
+    monkeypatch.setenv('TZ', 'IST-5:30')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def attendance_timestamps(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT student_id, timestamp FROM attendance ORDER BY id"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def test_sqlite_attendance_is_stored_in_utc(tmp_path, local_tz):
+    db_path = str(tmp_path / "classroom.db")
+    backend = SqliteBackend(db_path)
+    backend.write([
+        set_entry('attendance', ['C1', '2024-03-04', 's1'],
+                  {'status': 'Present', 'check_in_time': '02:00:00'}),
+        set_entry('attendance', ['C1', '2024-03-04', 's2'],
+                  {'status': 'Late', 'check_in_time': '23:00:00'}),
+        set_entry('attendance', ['C1', '2024-03-03', 's1'],
+                  {'status': 'Present', 'check_in_time': '09:00:00'}),
+    ])
+
+    assert attendance_timestamps(db_path) == [
+        ('s1', '2024-03-03 20:30:00'),
+        ('s2', '2024-03-04 17:30:00'),
+        ('s1', '2024-03-03 03:30:00'),
+    ]
+    _, _, attendance = backend.load()
+    assert attendance['C1']['2024-03-04'] == {
+        's1': {'status': 'Present', 'check_in_time': '02:00:00'},
+        's2': {'status': 'Late', 'check_in_time': '23:00:00'},
+    }
+
+    # Deletes follow the local day, not the UTC one
+    backend.write([delete_entry('attendance', ['C1', '2024-03-04', 's2'])])
+    assert [row[0] for row in attendance_timestamps(db_path)] == ['s1', 's1']
+    backend.write([delete_entry('attendance', ['C1', '2024-03-04'])])
+    assert attendance_timestamps(db_path) == [('s1', '2024-03-03 03:30:00')]
+    backend.write([delete_entry('attendance', ['C1'])])
+    assert attendance_timestamps(db_path) == []
+
+    with pytest.raises(ValueError):
+        backend.write([delete_entry('attendance', [])])
+
+
+def test_sqlite_batch_rolls_back_on_error(data_dir, tmp_path):
+    db_path = str(tmp_path / "classroom.db")
+    manager = StudentManager(data_dir, backend=SqliteBackend(db_path))
+    manager.add_student('s0', 'Keep')
+
+    with pytest.raises(RuntimeError):
+        with manager.batch():
+            manager.add_student('s1', 'Ann')
+            manager.add_class('C1', 'Maths', 'Algebra', {}, 'R1')
+            raise RuntimeError("roster import failed")
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("SELECT id FROM students").fetchall() == [('s0',)]
+        assert conn.execute("SELECT COUNT(*) FROM classes").fetchone() == (0,)
+    finally:
+        conn.close()
+    # Memory is put back in step with what was persisted
+    assert list(manager.students) == ['s0'] and manager.classes == {}
+    assert manager.get_student_by_name('Ann') is None
+
+
+def test_json_batch_discards_writes_on_error(data_dir):
+    manager = StudentManager(data_dir)
+    manager.add_student('s0', 'Keep')
+
+    with pytest.raises(RuntimeError):
+        with manager.batch():
+            manager.add_student('s1', 'Ann')
+            raise RuntimeError("roster import failed")
+
+    assert list(manager.students) == ['s0']
+    manager.add_student('s2', 'Bob')
+    manager.close()
+    assert list(StudentManager(data_dir).students) == ['s0', 's2']
+
+
+def test_nested_batch_commits_once_at_outermost_exit(tmp_path):
+    backend = SqliteBackend(str(tmp_path / "classroom.db"))
+    with backend.batch():
+        with backend.batch():
+            backend.write([set_entry('students', ['s1'], {
+                'name': 'Ann', 'class_ids': [], 'registration_date': None
+            })])
+        assert backend.in_batch
+        # Not visible to other connections until the outer block ends
+        assert SqliteBackend(backend.db_path).load()[0] == {}
+    assert list(backend.load()[0]) == ['s1']
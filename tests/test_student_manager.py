@@ -0,0 +1,192 @@
+import csv
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from models.storage_backends import JsonJournalBackend
+from models.student_manager import StudentManager
+
+
+def read_json(data_dir, name):
+    with open(os.path.join(data_dir, name)) as f:
+        return json.load(f)
+
+
+def test_mutations_survive_reload_from_journal(data_dir):
+    manager = StudentManager(data_dir)
+    manager.add_class('C1', 'Maths', 'Algebra', {'mon': '09:00'}, 'R1')
+    manager.add_student('s1', 'Ann')
+    manager.add_student_to_class('s1', 'C1')
+
+    # Nothing compacted yet: state is rebuilt from the journal
+    assert not os.path.exists(os.path.join(data_dir, 'students.json'))
+    reloaded = StudentManager(data_dir)
+    assert reloaded.students == manager.students
+    assert reloaded.classes == manager.classes
+    assert reloaded.is_enrolled('s1', 'C1')
+
+
+def test_compaction_folds_journal_into_snapshots(data_dir):
+    manager = StudentManager(data_dir)
+    manager.add_student('s1', 'Ann')
+    manager.compact()
+
+    assert read_json(data_dir, 'students.json')['s1']['name'] == 'Ann'
+    assert not os.path.exists(os.path.join(data_dir, 'journal.jsonl'))
+    assert not os.path.exists(os.path.join(data_dir, 'journal.jsonl.compacting'))
+
+
+def test_background_compaction_writes_a_consistent_copy(data_dir):
+    manager = StudentManager(data_dir, compact_every=3)
+    manager.add_class('C1', 'Maths', 'Algebra', {}, 'R1')
+    for i in range(3):
+        manager.add_student(f's{i}', f'Student {i}')
+    # Edited in place while the compaction thread may still be writing
+    manager.add_student_to_class('s0', 'C1')
+    manager.update_student('s1', name='Renamed')
+    manager.close()
+
+    reloaded = StudentManager(data_dir)
+    assert reloaded.students == manager.students
+    assert reloaded.classes['C1']['students'] == ['s0']
+
+
+def test_interrupted_compaction_is_finished_on_load(data_dir):
+    manager = StudentManager(data_dir)
+    manager.add_student('s1', 'Ann')
+    os.replace(
+        os.path.join(data_dir, 'journal.jsonl'),
+        os.path.join(data_dir, 'journal.jsonl.compacting')
+    )
+
+    backend = JsonJournalBackend(data_dir)
+    students, _, _ = backend.load()
+    assert students['s1']['name'] == 'Ann'
+    assert read_json(data_dir, 'students.json')['s1']['name'] == 'Ann'
+
+
+def write_legacy_log(data_dir, rows):
+    with open(os.path.join(data_dir, 'attendance_log.csv'), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Date', 'Time', 'Student', 'Status'])
+        writer.writerows(rows)
+
+
+def test_legacy_log_is_split_once_per_day(data_dir, monkeypatch):
+    rows = [
+        ['2024-03-04', f'09:0{i}:00', f'Student {i}', 'Present'] for i in range(5)
+    ] + [
+        ['2024-03-05', f'09:0{i}:00', f'Student {i}', 'Late'] for i in range(3)
+    ]
+    write_legacy_log(data_dir, rows)
+
+    writes = []
+    append = StudentManager._append_attendance_rows
+
+    def counting(self, date_str, day_rows):
+        writes.append(date_str)
+        return append(self, date_str, day_rows)
+
+    monkeypatch.setattr(StudentManager, '_append_attendance_rows', counting)
+    manager = StudentManager(data_dir)
+
+    assert writes == ['2024-03-04', '2024-03-05']
+    assert [list(row) for row in manager.iter_attendance_log()] == rows
+    assert os.path.exists(os.path.join(data_dir, 'attendance_log.csv.migrated'))
+
+
+def test_compression_skips_only_recent_days(data_dir):
+    # The newest partition is for a past day, so it is compressed too
+    write_legacy_log(data_dir, [['2024-03-04', '09:00:00', 'Ann', 'Present']])
+    manager = StudentManager(data_dir)
+    assert sorted(os.listdir(manager.attendance_log_dir)) == ['2024-03-04.csv.gz']
+
+    manager.record_attendance('Ann')
+    today = datetime.now().strftime('%Y-%m-%d')
+    assert sorted(os.listdir(manager.attendance_log_dir)) == [
+        '2024-03-04.csv.gz', f'{today}.csv'
+    ]
+    manager.compress_attendance_log(keep_days=0)
+    assert f'{today}.csv.gz' in os.listdir(manager.attendance_log_dir)
+    assert len(manager.get_attendance_records(date=today)) == 1
+
+
+def write_roster(tmp_path, lines):
+    path = tmp_path / "roster.csv"
+    path.write_text("student_id,student_name,class_id,class_name,subject,room\n"
+                    + "\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_import_roster_applies_valid_rows_once(data_dir, tmp_path):
+    manager = StudentManager(data_dir)
+    summary = manager.import_roster(write_roster(tmp_path, [
+        "s1,Ann,C1,Maths,Algebra,R1",
+        "s2,Bob,C1,,,",
+        "s2,Bob,C2,Art,,",
+    ]))
+
+    assert summary == {'students': 2, 'classes': 2, 'enrolments': 3}
+    assert manager.classes['C1']['students'] == ['s1', 's2']
+    assert manager.students['s2']['class_ids'] == ['C1', 'C2']
+    # Persisted by one compaction, not journalled row by row
+    assert not os.path.exists(os.path.join(data_dir, 'journal.jsonl'))
+    assert read_json(data_dir, 'classes.json')['C2']['name'] == 'Art'
+
+
+def test_import_roster_treats_empty_cells_as_unspecified(data_dir, tmp_path):
+    manager = StudentManager(data_dir)
+    manager.add_class('C1', 'Maths', 'Algebra', {}, 'R1')
+
+    summary = manager.import_roster(write_roster(tmp_path, [
+        "s1,Ann,C1,Maths,,",
+        "s2,Bob,C1,,Algebra,",
+    ]))
+    assert summary['enrolments'] == 2
+
+
+def test_import_roster_reports_every_error_and_changes_nothing(data_dir, tmp_path):
+    manager = StudentManager(data_dir)
+    manager.add_class('C1', 'Maths', 'Algebra', {}, 'R1')
+
+    roster = write_roster(tmp_path, [
+        "s1,Ann,C1,Physics,,",
+        ",Nameless,,,,",
+        "s2,Bob,C9,,,",
+        "s3,Cy,C1,,,",
+    ])
+    with pytest.raises(ValueError) as error:
+        manager.import_roster(roster)
+    message = str(error.value)
+
+    assert "line 2: class C1 details differ" in message
+    assert "line 3: student_id and student_name are required" in message
+    assert "line 4: new class C9 needs a class_name" in message
+    assert "line 5" not in message
+    assert manager.students == {}
+
+
+def test_indexes_follow_renames_and_removals(data_dir):
+    manager = StudentManager(data_dir)
+    manager.add_class('C1', 'Maths', 'Algebra', {}, 'R1')
+    manager.add_student('s1', 'Ann')
+    manager.add_student_to_class('s1', 'C1')
+
+    assert manager.get_student_by_name('ann') == 's1'
+    manager.update_student('s1', name='Anna')
+    assert manager.get_student_by_name('Ann') is None
+    assert manager.get_student_by_name('ANNA') == 's1'
+
+    manager.remove_class('C1')
+    assert not manager.is_enrolled('s1', 'C1')
+    assert manager.students['s1']['class_ids'] == []
+
+    manager.remove_student('s1')
+    assert manager.get_student_by_name('Anna') is None
+
+    # Indexes rebuilt on load agree with the ones kept in step
+    reloaded = StudentManager(data_dir)
+    assert reloaded._name_index == manager._name_index == {}
+    assert reloaded._class_students == manager._class_students